@@ -5,23 +5,64 @@ from typing import List, Dict, Any, Optional
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.models.gemini import GeminiModel
 from pydantic_ai.providers.google_gla import GoogleGLAProvider
-from pydantic_ai.messages import ModelMessagesTypeAdapter
+from pydantic_ai.messages import (
+    ModelMessagesTypeAdapter,
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    UserPromptPart,
+)
 from pydantic_core import to_jsonable_python
+from memoria import (
+    PoliticaMemoria,
+    separar_sistema,
+    texto_das_mensagens,
+    montar_historico,
+    turnos_de_mensagens_chat,
+    tokens_do_uso,
+)
+from faq import FAQ_ATIVO, IndiceFAQ, formatar_resposta
+from cache_respostas import CACHE_ATIVO, CacheRespostas, pergunta_independente, versao_prompt
+from recuperacao import PROMPT_RECUPERACAO, PROMPT_TOP_K, BaseConhecimento, separar_instrucoes
+from manual_aluno import manual_aluno_conhecimento, manual_disponivel
 import logfire
 import json
 from datetime import datetime
 
 import asyncio
+import concurrent.futures
+import httpx
+import threading
+import time
 
 # Load environment variables
 load_dotenv()
 
-#inicializacao do logfire
-logfire.configure()  
-logfire.instrument_pydantic_ai()
+_logfire_configurado = False
+_logfire_lock = threading.Lock()
+
+def configurar_logfire():
+    """Inicializa o logfire uma única vez por processo (na criação do agente, não no import)"""
+    global _logfire_configurado
+    if _logfire_configurado:
+        return
+    with _logfire_lock:
+        if not _logfire_configurado:
+            # Sem LOGFIRE_TOKEN os dados não são enviados, em vez de falhar ao abrir o chat
+            logfire.configure(send_to_logfire="if-token-present")
+            logfire.instrument_pydantic_ai()
+            _logfire_configurado = True
+
+# A tool do manual só é registrada com um índice já publicado (python manual_aluno.py indexar),
+# e a instrução só entra no prompt junto com ela (ver _criar_agente)
+MANUAL_DISPONIVEL = manual_disponivel()
+INSTRUCAO_MANUAL = '''Quando a dúvida estiver relacionada ao **manual do aluno** (regras acadêmicas, calendário, serviços, procedimentos), utilize a tool **`manual_aluno_conhecimento`** para consultar as informações antes de responder e cite a fonte do trecho utilizado.
+
+''' if MANUAL_DISPONIVEL else ''
 
 # Prompt do assistente
-PROMPT = '''
+PROMPT = f'''
 Você é um assistente virtual especializado em responder dúvidas frequentes sobre a **PUC Campinas**. Forneça respostas claras, objetivas e atualizadas sobre:  
 
 - Cursos  
@@ -32,7 +73,7 @@ Você é um assistente virtual especializado em responder dúvidas frequentes so
 - Contato  
 - Serviços oferecidos pela universidade  
 
-Caso a pergunta seja fora do escopo ou você não saiba a resposta, oriente o usuário a consultar o site oficial da PUC Campinas ou entrar em contato com a central de atendimento, enviando o seguinte link:  
+{INSTRUCAO_MANUAL}Caso a pergunta seja fora do escopo ou você não saiba a resposta, oriente o usuário a consultar o site oficial da PUC Campinas ou entrar em contato com a central de atendimento, enviando o seguinte link:  
  https://www.puc-campinas.edu.br/
 
 Forneça uma experiência personalizada, utilize as informações que você tem do usuário ao seu favor. Chame o usuário pelo nome quando possível e utilizando uma linguagem amigável.
@@ -102,83 +143,452 @@ Na **CAA**, você pode solicitar:
 
 '''
 
-class ConversaComMemoria:
-    """Gerenciador de conversa com memória usando pydantic-ai"""
-    
-    def __init__(self, estado_sessao: dict):
-        self.estado_sessao = estado_sessao
-        self.historico_mensagens = []
-        self.agent = self._criar_agente()
-        self._loop = None
+@dataclass(frozen=True)
+class PerfilUsuario:
+    """Informações do usuário injetadas no agente a cada execução"""
+    nome: str = 'Usuário'
+    tipo_usuario: str = 'estudante'
+    ra: Optional[str] = 'Não informado'
+    curso: Optional[str] = 'Não informado'
     
-    def _criar_agente(self):
-        """Cria o agente com prompt personalizado"""
-        prompt_personalizado = self._criar_prompt_personalizado()
-        
-        modelo = GeminiModel(
-            'gemini-2.0-flash', 
-            provider=GoogleGLAProvider(api_key=os.getenv("GEMINI_API_KEY"))
+    @classmethod
+    def do_estado_sessao(cls, sessao):
+        """Monta o perfil a partir do usuário logado (usuarios.SessaoUsuario)"""
+        return cls(
+            nome=sessao.nome_completo or 'Usuário',
+            tipo_usuario=sessao.tipo_usuario or 'estudante',
+            ra=sessao.ra or 'Não informado',
+            curso=sessao.curso or 'Não informado',
         )
-        
-        return Agent(  
-            model=modelo,
-            output_retries=2,
-            output_type=str,
-            system_prompt=prompt_personalizado,
-        )
-    
-    def _criar_prompt_personalizado(self):
-        """Cria prompt personalizado com informações do usuário"""
-        nome = self.estado_sessao.get('nome_completo', 'Usuário')
-        tipo_usuario = self.estado_sessao.get('tipo_usuario', 'estudante')
-        curso = self.estado_sessao.get('curso', 'Não informado')
-        ra = self.estado_sessao.get('ra', 'Não informado')
-        
-        prompt_personalizado = f"""{PROMPT}
 
+def formatar_informacoes_usuario(perfil: PerfilUsuario):
+    """Trecho do prompt com as informações do usuário"""
+    return f"""
         Informações do usuário:
-        - Nome: {nome}
-        - Tipo de usuário: {tipo_usuario.title()}
-        - RA: {ra}
-        - Curso: {curso}
+        - Nome: {perfil.nome}
+        - Tipo de usuário: {perfil.tipo_usuario.title()}
+        - RA: {perfil.ra}
+        - Curso: {perfil.curso}
         """
-        return prompt_personalizado
+
+MODELO = 'gemini-2.0-flash'
+
+# Limites das chamadas ao modelo
+TIMEOUT_AGENTE_S = float(os.getenv("AGENTE_TIMEOUT_S") or 60)
+MAX_CONEXOES_HTTP = int(os.getenv("AGENTE_MAX_CONEXOES") or 100)
+
+class LoopEmSegundoPlano:
+    """Loop asyncio de longa duração numa thread própria, dono dos clientes HTTP do agente"""
+    
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._executar, name="loop-agente", daemon=True)
+        self._thread.start()
     
-    def _get_or_create_loop(self):
-        """Obtém ou cria um loop de eventos"""
+    def _executar(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+    
+    def submeter(self, coro) -> concurrent.futures.Future:
+        """Agenda a corrotina no loop a partir de qualquer thread"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def executar(self, coro, timeout: Optional[float] = TIMEOUT_AGENTE_S):
+        """Executa a corrotina no loop e espera o resultado; cancela se passar do timeout"""
+        return self.aguardar(self.submeter(coro), timeout)
+    
+    def aguardar(self, futuro: concurrent.futures.Future, timeout: Optional[float] = TIMEOUT_AGENTE_S):
+        """Espera um futuro do loop, cancelando a corrotina em timeout ou interrupção"""
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_closed():
-                raise RuntimeError("Loop is closed")
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        return loop
+            return futuro.result(timeout)
+        except concurrent.futures.TimeoutError:
+            futuro.cancel()
+            raise TimeoutError(f"O assistente não respondeu em {timeout:.0f}s")
+        except BaseException:
+            # Ex.: a thread do Streamlit foi interrompida por um rerun
+            futuro.cancel()
+            raise
+
+_loop_agente = None
+_loop_lock = threading.Lock()
+
+def obter_loop():
+    """Retorna o loop de eventos único do processo, iniciando a thread na primeira chamada"""
+    global _loop_agente
+    if _loop_agente is None:
+        with _loop_lock:
+            if _loop_agente is None:
+                _loop_agente = LoopEmSegundoPlano()
+    return _loop_agente
+
+# Instruções do PROMPT sem a seção de perguntas frequentes (que entra por recuperação)
+INSTRUCOES = separar_instrucoes(PROMPT)
+
+_base_conhecimento = None
+
+def obter_base_conhecimento():
+    """Entradas do FAQ indexadas com BM25 (construídas uma vez por processo)"""
+    global _base_conhecimento
+    if _base_conhecimento is None:
+        _base_conhecimento = BaseConhecimento.do_prompt(PROMPT)
+    return _base_conhecimento
+
+def informacoes_usuario(ctx: RunContext[PerfilUsuario]) -> str:
+    return formatar_informacoes_usuario(ctx.deps)
+
+def conhecimento_relevante(ctx: RunContext[PerfilUsuario]) -> str:
+    """Só as entradas do FAQ relevantes para a pergunta atual (recalculado a cada turno)"""
+    pergunta = ctx.prompt if isinstance(ctx.prompt, str) else ""
+    return obter_base_conhecimento().trecho_prompt(pergunta, PROMPT_TOP_K)
+
+def _criar_modelo():
+    """Modelo Gemini com cliente HTTP com keep-alive, usado apenas pelo loop em segundo plano"""
+    cliente_http = httpx.AsyncClient(
+        timeout=httpx.Timeout(TIMEOUT_AGENTE_S, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=MAX_CONEXOES_HTTP,
+            max_keepalive_connections=MAX_CONEXOES_HTTP // 5,
+            keepalive_expiry=60.0,
+        ),
+    )
+    return GeminiModel(
+        MODELO, 
+        provider=GoogleGLAProvider(api_key=os.getenv("GEMINI_API_KEY"), http_client=cliente_http)
+    )
+
+def _criar_agente(modelo=None, recuperacao: bool = PROMPT_RECUPERACAO):
+    """
+    Cria o agente compartilhado; o perfil do usuário entra como dependência da execução.
+
+    Args:
+        modelo: modelo do pydantic-ai (padrão: Gemini); TestModel/FunctionModel para testes offline
+        recuperacao: envia só as instruções + entradas relevantes do FAQ em vez do PROMPT inteiro
+    """
+    agente = Agent(  
+        model=modelo or _criar_modelo(),
+        deps_type=PerfilUsuario,
+        output_retries=2,
+        output_type=str,
+        system_prompt=INSTRUCOES if recuperacao else PROMPT,
+    )
+    agente.system_prompt(informacoes_usuario)
+    if recuperacao:
+        agente.system_prompt(dynamic=True)(conhecimento_relevante)
+    if MANUAL_DISPONIVEL:
+        agente.tool_plain(manual_aluno_conhecimento)
+    return agente
+
+_agente = None
+_agente_lock = threading.Lock()
+
+def obter_agente():
+    """Retorna o agente único do processo (um modelo e um cliente HTTP para todas as sessões)"""
+    global _agente
+    if _agente is None:
+        configurar_logfire()
+        with _agente_lock:
+            if _agente is None:
+                _agente = _criar_agente()
+    return _agente
+
+_indice_faq = None
+
+def obter_indice_faq():
+    """Índice local das perguntas frequentes do PROMPT (construído uma vez por processo)"""
+    global _indice_faq
+    if _indice_faq is None:
+        _indice_faq = IndiceFAQ.do_prompt(PROMPT)
+    return _indice_faq
+
+_cache_respostas = None
+
+def obter_cache_respostas():
+    """Cache de respostas do processo; a versão muda quando o PROMPT ou o modelo mudam"""
+    global _cache_respostas
+    if _cache_respostas is None:
+        _cache_respostas = CacheRespostas(
+            versao_prompt(PROMPT, MODELO, f"recuperacao={PROMPT_RECUPERACAO}:{PROMPT_TOP_K}")
+        )
+    return _cache_respostas
+
+# Agente auxiliar que condensa os turnos antigos da conversa
+PROMPT_RESUMO = """Você resume conversas entre um usuário e o assistente virtual da PUC Campinas.
+Escreva em português um resumo curto (no máximo 8 frases) com os fatos, pedidos e respostas
+importantes. Se houver um resumo anterior, incorpore-o ao novo resumo."""
+
+_agente_resumo = None
+
+def obter_agente_resumo():
+    """Retorna o agente de resumo, que reutiliza o mesmo modelo do agente principal"""
+    global _agente_resumo
+    if _agente_resumo is None:
+        modelo = obter_agente().model
+        with _agente_lock:
+            if _agente_resumo is None:
+                _agente_resumo = Agent(
+                    model=modelo,
+                    output_type=str,
+                    system_prompt=PROMPT_RESUMO,
+                )
+    return _agente_resumo
+
+class RespostaInterrompida(RuntimeError):
+    """O stream falhou depois de parte da resposta já ter sido enviada ao usuário"""
+
+    def __init__(self, parcial: str, erro: Exception):
+        super().__init__(f"Resposta interrompida: {erro}")
+        self.parcial = parcial
+
+class ConversaComMemoria:
+    """Gerenciador de conversa com memória usando pydantic-ai"""
+    
+    def __init__(self, sessao):
+        # A sessão guarda só o perfil e o histórico; o agente é compartilhado
+        self.perfil = PerfilUsuario.do_estado_sessao(sessao)
+        self.historico_mensagens = []
+        self.agent = obter_agente()
+        self._loop = obter_loop()
+        self._futuro_atual = None
+        self.ultima_metrica = {}
+        # Memória limitada: janela de turnos literais + resumo dos turnos antigos
+        self.politica_memoria = PoliticaMemoria.do_ambiente()
+        self.resumo = None
+        self.tokens_por_turno = []
+        self._tarefa_resumo = None
+        self._geracao = 0
+    
+    def _executar(self, coro, timeout: Optional[float] = TIMEOUT_AGENTE_S):
+        """Executa a corrotina no loop compartilhado guardando o futuro para cancelamento"""
+        futuro = self._loop.submeter(coro)
+        self._futuro_atual = futuro
+        try:
+            return self._loop.aguardar(futuro, timeout)
+        finally:
+            self._futuro_atual = None
+    
+    def cancelar(self):
+        """Cancela a chamada ao modelo em andamento, se houver"""
+        futuro = self._futuro_atual
+        if futuro is not None:
+            futuro.cancel()
+    
+    def _registrar_metrica(self, modo: str, inicio: float, primeiro_token: Optional[float]):
+        """Guarda e envia ao logfire o tempo até o primeiro token e o tempo total"""
+        fim = time.perf_counter()
+        self.ultima_metrica = {
+            "modo": modo,
+            "ttft_s": (primeiro_token or fim) - inicio,
+            "tempo_total_s": fim - inicio,
+            **(self.tokens_por_turno[-1] if self.tokens_por_turno else {}),
+        }
+        logfire.info("resposta do agente ({modo})", **self.ultima_metrica)
+    
+    def _atualizar_memoria(self, resultado):
+        """Guarda o histórico e o uso de tokens; agenda o resumo se a janela estourar"""
+        self.historico_mensagens = resultado.all_messages()
+        partes_sistema, turnos = separar_sistema(self.historico_mensagens)
+        self.tokens_por_turno.append({
+            **tokens_do_uso(resultado.usage()),
+            "turnos_na_janela": len(turnos),
+            "resumo_chars": len(self.resumo or ""),
+        })
+        if self.politica_memoria.estourou(turnos):
+            # Resume fora do caminho da resposta; o próximo turno espera terminar
+            self._tarefa_resumo = asyncio.ensure_future(
+                self._resumir(partes_sistema, turnos, self._geracao)
+            )
+    
+    async def _resumir(self, partes_sistema, turnos, geracao: int):
+        """Incorpora os turnos mais antigos ao resumo e reduz a janela"""
+        antigos, janela = self.politica_memoria.separar(turnos)
+        if not antigos:
+            return
+        texto = texto_das_mensagens([mensagem for turno in antigos for mensagem in turno])
+        if self.resumo:
+            texto = f"Resumo anterior:\n{self.resumo}\n\nNovos turnos:\n{texto}"
+        resultado = await obter_agente_resumo().run(texto)
+        # O histórico foi limpo enquanto o resumo era gerado
+        if geracao != self._geracao:
+            return
+        self.resumo = resultado.data
+        self.historico_mensagens = montar_historico(partes_sistema, self.resumo, janela)
+    
+    async def _aguardar_resumo(self):
+        """Espera um resumo pendente antes de usar o histórico"""
+        tarefa, self._tarefa_resumo = self._tarefa_resumo, None
+        if tarefa is not None:
+            try:
+                await tarefa
+            except Exception as e:
+                # Sem resumo a janela continua grande; tenta de novo no próximo estouro
+                logfire.warn("falha ao resumir conversa: {erro}", erro=str(e))
+    
+    def _resposta_local(self, mensagem_usuario: str):
+        """Resposta sem chamar o modelo: FAQ com alta confiança ou cache; retorna (resposta, modo)"""
+        # No meio da conversa, uma continuação ("e em medicina?") não pode receber resposta pronta
+        if FAQ_ATIVO and self._sem_contexto(mensagem_usuario):
+            entrada = obter_indice_faq().responder(mensagem_usuario)
+            if entrada is not None:
+                return formatar_resposta(entrada, self.perfil.nome), "faq"
+        if self._elegivel_cache(mensagem_usuario):
+            resposta = obter_cache_respostas().buscar(
+                mensagem_usuario, self.perfil.tipo_usuario, self.perfil.curso, self.perfil.nome
+            )
+            if resposta is not None:
+                return resposta, "cache"
+        return None, None
+    
+    def _sem_contexto(self, mensagem_usuario: str) -> bool:
+        """Primeiro turno, ou pergunta que não depende do que já foi conversado"""
+        return not self.historico_mensagens or pergunta_independente(mensagem_usuario)
+    
+    def _elegivel_cache(self, mensagem_usuario: str) -> bool:
+        """Só perguntas do primeiro turno ou que não dependem do contexto usam o cache"""
+        return CACHE_ATIVO and self._sem_contexto(mensagem_usuario)
+    
+    def _guardar_em_cache(self, mensagem_usuario: str, resposta: str, primeiro_turno: bool, inicio: float):
+        """Só respostas geradas sem contexto anterior são reaproveitadas por outros usuários"""
+        if CACHE_ATIVO and primeiro_turno:
+            obter_cache_respostas().guardar(
+                mensagem_usuario, self.perfil.tipo_usuario, self.perfil.curso, resposta,
+                nome=self.perfil.nome, ra=self.perfil.ra, tempo_modelo_s=time.perf_counter() - inicio
+            )
+    
+    async def _registrar_turno_local(self, mensagem_usuario: str, resposta: str):
+        """Acrescenta ao histórico um turno respondido sem o modelo"""
+        await self._aguardar_resumo()
+        pedido = [UserPromptPart(content=mensagem_usuario)]
+        if not self.historico_mensagens:
+            pedido = self._partes_sistema() + pedido
+        self.historico_mensagens = self.historico_mensagens + [
+            ModelRequest(parts=pedido),
+            ModelResponse(parts=[TextPart(content=resposta)]),
+        ]
+        self.tokens_por_turno.append({"tokens_entrada": 0, "tokens_saida": 0, "tokens_total": 0})
+    
+    async def _conversar_async(self, mensagem_usuario: str):
+        await self._aguardar_resumo()
+        resultado = await self.agent.run(
+            mensagem_usuario, 
+            message_history=self.historico_mensagens,
+            deps=self.perfil,
+        )
+        self._atualizar_memoria(resultado)
+        return resultado
     
     def conversar(self, mensagem_usuario: str):
         """Processa mensagem do usuário mantendo o histórico"""
+        inicio = time.perf_counter()
         try:
-            loop = self._get_or_create_loop()
+            resposta_local, modo = self._resposta_local(mensagem_usuario)
+            if resposta_local is not None:
+                self._executar(self._registrar_turno_local(mensagem_usuario, resposta_local))
+                self._registrar_metrica(modo, inicio, None)
+                return resposta_local
             
-            # Executa o agente de forma síncrona
-            resultado = loop.run_until_complete(
-                self.agent.run(
-                    mensagem_usuario, 
-                    message_history=self.historico_mensagens,
-                )
-            )
-            
-            # Usa o histórico atualizado do resultado
-            self.historico_mensagens = resultado.all_messages()
+            # Executa o agente no loop compartilhado e espera o resultado
+            primeiro_turno = not self.historico_mensagens
+            resultado = self._executar(self._conversar_async(mensagem_usuario))
+            self._guardar_em_cache(mensagem_usuario, resultado.data, primeiro_turno, inicio)
             
+            # No modo bloqueante o primeiro token chega junto com a resposta inteira
+            self._registrar_metrica("bloqueante", inicio, None)
             return resultado.data
         
         except Exception as e:
             return f"Erro ao processar mensagem: {str(e)}"
     
+    async def _conversar_stream_async(self, mensagem_usuario: str):
+        """Gera os trechos de texto da resposta e atualiza o histórico ao final"""
+        await self._aguardar_resumo()
+        async with self.agent.run_stream(
+            mensagem_usuario,
+            message_history=self.historico_mensagens,
+            deps=self.perfil,
+        ) as resultado:
+            async for delta in resultado.stream_text(delta=True):
+                yield delta
+        
+        # Só depois do stream completo o histórico inclui a resposta final
+        self._atualizar_memoria(resultado)
+    
+    def conversar_stream(self, mensagem_usuario: str):
+        """Versão em streaming de `conversar`: gera a resposta trecho a trecho"""
+        inicio = time.perf_counter()
+        primeiro_token = None
+        try:
+            resposta_local, modo = self._resposta_local(mensagem_usuario)
+            if resposta_local is not None:
+                self._executar(self._registrar_turno_local(mensagem_usuario, resposta_local))
+                self._registrar_metrica(modo, inicio, None)
+                yield resposta_local
+                return
+        except Exception as e:
+            yield f"Erro ao processar mensagem: {str(e)}"
+            return
+        
+        primeiro_turno = not self.historico_mensagens
+        trechos = []
+        gerador = self._conversar_stream_async(mensagem_usuario)
+        try:
+            while True:
+                try:
+                    # Cada trecho é buscado no loop compartilhado, com timeout por trecho
+                    delta = self._executar(gerador.__anext__())
+                except StopAsyncIteration:
+                    break
+                if primeiro_token is None:
+                    primeiro_token = time.perf_counter()
+                trechos.append(delta)
+                yield delta
+            self._registrar_metrica("streaming", inicio, primeiro_token)
+            self._guardar_em_cache(mensagem_usuario, "".join(trechos), primeiro_turno, inicio)
+        except Exception as e:
+            # Com trechos já exibidos, a mensagem de erro não pode virar parte da resposta
+            if trechos:
+                raise RespostaInterrompida("".join(trechos), e) from e
+            yield f"Erro ao processar mensagem: {str(e)}"
+        finally:
+            try:
+                self._loop.executar(gerador.aclose(), timeout=5)
+            except Exception:
+                pass
+    
+    def _partes_sistema(self):
+        """Partes de sistema atuais (as mesmas que o agente gera no primeiro turno)"""
+        partes = [
+            SystemPromptPart(content=INSTRUCOES if PROMPT_RECUPERACAO else PROMPT),
+            SystemPromptPart(content=formatar_informacoes_usuario(self.perfil)),
+        ]
+        if PROMPT_RECUPERACAO:
+            # Parte dinâmica: o agente preenche com as entradas relevantes a cada execução
+            partes.append(SystemPromptPart(content="", dynamic_ref=conhecimento_relevante.__qualname__))
+        return partes
+    
+    def exportar_snapshot(self):
+        """Histórico sem as partes de sistema e o resumo, para salvar por chat"""
+        _, turnos = separar_sistema(self.historico_mensagens)
+        return [mensagem for turno in turnos for mensagem in turno], self.resumo
+    
+    def restaurar_historico(self, mensagens, resumo=None):
+        """Retoma um chat a partir de um snapshot, com o prompt de sistema atual"""
+        self.limpar_historico()
+        _, turnos = separar_sistema(mensagens)
+        self.resumo = resumo
+        self.historico_mensagens = montar_historico(self._partes_sistema(), resumo, turnos)
+    
+    def restaurar_de_mensagens(self, mensagens_chat):
+        """Retoma um chat sem snapshot a partir das mensagens já exibidas (últimos turnos)"""
+        self.limpar_historico()
+        turnos = turnos_de_mensagens_chat(mensagens_chat)[-self.politica_memoria.max_turnos:]
+        self.historico_mensagens = montar_historico(self._partes_sistema(), None, turnos)
+    
     def limpar_historico(self):
         """Limpa o histórico de mensagens"""
         self.historico_mensagens = []
+        self.resumo = None
+        self._tarefa_resumo = None
+        self._geracao += 1
     
     def obter_historico_formatado(self):
         """Retorna o histórico formatado para exibição"""
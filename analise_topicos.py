@@ -0,0 +1,240 @@
+# analise_topicos.py - Análise de temas de todo o histórico (job em lote, paralelo e retomável)
+import argparse
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DeleteMany, ReplaceOne
+from pymongo.errors import OperationFailure
+from banco import conectar_mongodb, preencher_gravado_em
+from coocorrencia import CoocorrenciaVetorizada
+
+COLECAO_RESULTADOS = "analise_topicos"
+ID_CHECKPOINT = "checkpoint"
+
+PROCESSOS = int(os.getenv("ANALISE_PROCESSOS") or os.cpu_count() or 1)
+TAMANHO_LOTE = int(os.getenv("ANALISE_TAMANHO_LOTE") or 5000)
+# Turnos gravados há menos que isso ficam para a próxima execução (um lote ainda pode estar sendo escrito)
+MARGEM_S = float(os.getenv("ANALISE_MARGEM_S") or 300)
+TOP_RESULTADOS = 20
+
+SEM_CURSO = "sem curso"
+ERRO_SEM_TRANSACAO = 20  # IllegalOperation: servidor standalone, sem transações
+
+
+def semana_iso(momento: datetime) -> str:
+    ano, semana, _ = momento.isocalendar()
+    return f"{ano}-W{semana:02d}"
+
+
+def processar_lote(linhas):
+    """
+    Executado nos processos do pool: extrai as palavras-chave uma vez e separa por escopo.
+
+    Args:
+        linhas: lista de (curso, semana, texto), uma por mensagem
+
+    Returns:
+        dict: escopo -> (frequências, pesos, mensagens)
+    """
+    import numpy as np
+    motor = CoocorrenciaVetorizada()
+    documentos, termos = motor.codificar([texto for _, _, texto in linhas])
+
+    grupos = {"global": np.arange(len(linhas))}
+    indices = {}
+    for i, (curso, semana, _) in enumerate(linhas):
+        indices.setdefault(f"curso:{curso}", []).append(i)
+        indices.setdefault(f"semana:{semana}", []).append(i)
+    grupos.update((escopo, np.asarray(lista)) for escopo, lista in indices.items())
+
+    parciais = {}
+    for escopo, mensagens in grupos.items():
+        parcial = CoocorrenciaVetorizada()
+        mascara = np.isin(documentos, mensagens)
+        parcial.adicionar_ocorrencias(documentos[mascara], termos[mascara], len(mensagens))
+        parciais[escopo] = (parcial.frequencias, parcial.pesos, parcial.mensagens)
+    return parciais
+
+
+def _combinar_parciais(motores, parciais):
+    for escopo, (frequencias, pesos, mensagens) in parciais.items():
+        motor = motores.get(escopo)
+        if motor is None:
+            motor = motores[escopo] = CoocorrenciaVetorizada()
+        motor.frequencias += frequencias
+        motor.pesos += pesos
+        motor.mensagens += mensagens
+
+
+def _ler_turnos(db, desde, ate, tamanho_lote):
+    """Turnos gravados no intervalo, em ordem de gravação, só com os campos usados, fora de chats apagados"""
+    chats_apagados = {c["_id"] for c in db["chats"].find({"deleted": True}, {"_id": 1})}
+    cursos = {
+        str(u["_id"]): u.get("curso") or SEM_CURSO
+        for u in db["usuarios"].find({}, {"curso": 1})
+    }
+    # Pelo momento da gravação, não pelo timestamp do turno: turnos regravados do spool depois
+    # de uma queda do MongoDB têm timestamp antigo, mas entram na próxima execução
+    filtro = {"gravado_em": {"$lte": ate}, "deleted": {"$ne": True}}
+    if desde is not None:
+        filtro["gravado_em"]["$gt"] = desde
+    cursor = db["historico_conversas"].find(
+        filtro,
+        {"_id": 0, "userId": 1, "chatId": 1, "userMessage": 1, "AiMessage": 1, "timestamp": 1}
+    ).sort("gravado_em", ASCENDING).batch_size(tamanho_lote)
+
+    for turno in cursor:
+        if turno.get("chatId") in chats_apagados:
+            continue
+        curso = cursos.get(turno.get("userId"), SEM_CURSO)
+        semana = semana_iso(turno["timestamp"])
+        for campo in ("userMessage", "AiMessage"):
+            yield curso, semana, turno.get(campo) or ""
+
+
+def _documento_resultado(escopo, motor, agora, ate):
+    tipo, _, chave = escopo.partition(":")
+    arestas = sorted(motor.arestas(), key=lambda a: a[2], reverse=True)
+    return {
+        "escopo": tipo,
+        "chave": chave or None,
+        "mensagens": motor.mensagens,
+        "top_palavras": motor.contador().most_common(TOP_RESULTADOS),
+        "top_arestas": [list(a) for a in arestas[:TOP_RESULTADOS]],
+        "motor": motor.para_dict(),
+        "ate": ate,
+        "atualizado_em": agora,
+    }
+
+
+def _gravar(db, motores, checkpoint, refazer=False):
+    """
+    Mescla com os resultados anteriores e grava tudo junto com o checkpoint.
+
+    Com refazer, os resultados anteriores são descartados nesta mesma gravação (e não antes
+    do processamento), para que uma execução que falhe no meio não apague nada.
+    """
+    colecao = db[COLECAO_RESULTADOS]
+    anteriores = [] if refazer else colecao.find({"_id": {"$in": list(motores)}}, {"motor": 1})
+    for documento in anteriores:
+        anterior = CoocorrenciaVetorizada.de_dict(documento.get("motor"))
+        if anterior is None:
+            raise RuntimeError(
+                f"Resultado '{documento['_id']}' foi gerado com outra lista de palavras-chave; "
+                "execute novamente com --refazer"
+            )
+        motores[documento["_id"]].combinar(anterior)
+
+    agora = datetime.utcnow()
+    operacoes = []
+    if refazer:
+        operacoes.append(DeleteMany({"_id": {"$nin": [*motores, ID_CHECKPOINT]}}))
+    operacoes += [
+        ReplaceOne({"_id": escopo}, _documento_resultado(escopo, motor, agora, checkpoint["ate"]), upsert=True)
+        for escopo, motor in motores.items()
+    ]
+    operacoes.append(ReplaceOne({"_id": ID_CHECKPOINT}, checkpoint, upsert=True))
+
+    # Resultados e checkpoint numa transação, para que uma falha não conte turnos duas vezes
+    try:
+        with db.client.start_session() as sessao:
+            sessao.with_transaction(lambda s: colecao.bulk_write(operacoes, ordered=True, session=s))
+    except OperationFailure as e:
+        if e.code != ERRO_SEM_TRANSACAO:
+            raise
+        print("Aviso: o servidor não suporta transações; gravando sem atomicidade (checkpoint por último)")
+        colecao.bulk_write(operacoes, ordered=True)
+
+
+def executar(processos=PROCESSOS, tamanho_lote=TAMANHO_LOTE, refazer=False):
+    """
+    Processa os turnos novos desde o último checkpoint e atualiza os agregados.
+
+    Returns:
+        dict: resumo da execução
+    """
+    inicio = time.perf_counter()
+    db = conectar_mongodb()
+    colecao = db[COLECAO_RESULTADOS]
+
+    # Turnos de versões anteriores, sem gravado_em (no-op depois da primeira vez)
+    preencher_gravado_em(db)
+    # Com refazer, o checkpoint e os agregados salvos são ignorados (e só substituídos em _gravar)
+    checkpoint = {} if refazer else colecao.find_one({"_id": ID_CHECKPOINT}) or {}
+    desde = checkpoint.get("ate")
+    ate = datetime.utcnow() - timedelta(seconds=MARGEM_S)
+    if desde is not None and desde >= ate:
+        return {"turnos": 0, "mensagens": 0, "desde": desde, "ate": desde, "tempo_s": 0.0}
+
+    motores = {}
+    mensagens = 0
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        pendentes = set()
+        lote = []
+        for linha in _ler_turnos(db, desde, ate, tamanho_lote):
+            lote.append(linha)
+            if len(lote) >= tamanho_lote:
+                pendentes.add(pool.submit(processar_lote, lote))
+                mensagens += len(lote)
+                lote = []
+                # Limita os lotes em memória: no máximo dois por processo
+                if len(pendentes) >= 2 * processos:
+                    prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        _combinar_parciais(motores, futuro.result())
+        if lote:
+            pendentes.add(pool.submit(processar_lote, lote))
+            mensagens += len(lote)
+        for futuro in pendentes:
+            _combinar_parciais(motores, futuro.result())
+
+    duracao = time.perf_counter() - inicio
+    novo_checkpoint = {
+        "_id": ID_CHECKPOINT,
+        "ate": ate,
+        "turnos": mensagens // 2,
+        "mensagens": mensagens,
+        "duracao_s": duracao,
+        "atualizado_em": datetime.utcnow(),
+    }
+    _gravar(db, motores, novo_checkpoint, refazer)
+    return {
+        "turnos": mensagens // 2,
+        "mensagens": mensagens,
+        "escopos": len(motores),
+        "desde": desde,
+        "ate": ate,
+        "tempo_s": time.perf_counter() - inicio,
+        "mensagens_por_s": mensagens / duracao if duracao else 0.0,
+    }
+
+
+def mostrar(escopo="global"):
+    documento = conectar_mongodb()[COLECAO_RESULTADOS].find_one({"_id": escopo}, {"motor": 0})
+    if not documento:
+        print(f"Nenhum resultado para '{escopo}'")
+        return
+    print(f"{escopo}: {documento['mensagens']} mensagens (até {documento['ate']})")
+    for palavra, n in documento["top_palavras"]:
+        print(f"  {palavra}: {n}")
+    print("Coocorrências mais fortes:")
+    for a, b, peso in documento["top_arestas"]:
+        print(f"  {a} — {b}: {peso}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Análise de temas do histórico de conversas")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    executar_cmd = sub.add_parser("executar", help="processa os turnos novos desde o último checkpoint")
+    executar_cmd.add_argument("--processos", type=int, default=PROCESSOS)
+    executar_cmd.add_argument("--lote", type=int, default=TAMANHO_LOTE, help="mensagens por lote do pool")
+    executar_cmd.add_argument("--refazer", action="store_true", help="processa tudo de novo e substitui os resultados ao gravar")
+    mostrar_cmd = sub.add_parser("mostrar", help="exibe um resultado (global, curso:<nome>, semana:<AAAA-Www>)")
+    mostrar_cmd.add_argument("escopo", nargs="?", default="global")
+    args = parser.parse_args()
+
+    if args.comando == "executar":
+        print(executar(args.processos, args.lote, args.refazer))
+    else:
+        mostrar(args.escopo)
@@ -0,0 +1,367 @@
+# banco.py - Camada de acesso ao MongoDB compartilhada por todas as páginas
+import argparse
+import os
+import threading
+import time
+from dotenv import load_dotenv
+import pymongo
+from pymongo import monitoring
+from pymongo.errors import ConnectionFailure, PyMongoError
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
+
+load_dotenv()
+
+NOME_BANCO = os.getenv("MONGO_DB", "chatbot_puc")
+
+
+def _int_env(nome, padrao):
+    """Lê uma variável de ambiente inteira, usando o padrão se vazia"""
+    valor = os.getenv(nome)
+    return int(valor) if valor else padrao
+
+
+def _w_env(nome, padrao):
+    """Lê o 'w' do write concern (número de nós ou 'majority')"""
+    valor = os.getenv(nome) or padrao
+    return int(valor) if str(valor).isdigit() else valor
+
+
+# Configuração do pool (ajustável pelo .env)
+CONFIG_POOL = {
+    "maxPoolSize": _int_env("MONGO_MAX_POOL_SIZE", 50),
+    "minPoolSize": _int_env("MONGO_MIN_POOL_SIZE", 0),
+    "maxIdleTimeMS": _int_env("MONGO_MAX_IDLE_MS", 300000),
+    "waitQueueTimeoutMS": _int_env("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000),
+    "connectTimeoutMS": _int_env("MONGO_CONNECT_TIMEOUT_MS", 10000),
+    "serverSelectionTimeoutMS": _int_env("MONGO_SERVER_SELECTION_TIMEOUT_MS", 10000),
+    "socketTimeoutMS": _int_env("MONGO_SOCKET_TIMEOUT_MS", 20000),
+    "retryWrites": True,
+    "retryReads": True,
+    "appname": "chatbot-puc",
+}
+
+READ_CONCERN = os.getenv("MONGO_READ_CONCERN", "local")
+WRITE_CONCERN_W = _w_env("MONGO_WRITE_CONCERN", "majority")
+READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primaryPreferred")
+
+
+class MetricasPool(monitoring.ConnectionPoolListener):
+    """Coleta métricas do pool de conexões (conexões em uso e tempo de espera)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.conexoes_abertas = 0
+        self.conexoes_em_uso = 0
+        self.pico_em_uso = 0
+        self.checkouts = 0
+        self.falhas_checkout = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+
+    def _registrar_espera(self, evento):
+        duracao = getattr(evento, "duration", None) or 0.0
+        self.espera_total += duracao
+        self.espera_maxima = max(self.espera_maxima, duracao)
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_check_out_started(self, event): pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.conexoes_abertas += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.conexoes_abertas -= 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checkouts += 1
+            self.conexoes_em_uso += 1
+            self.pico_em_uso = max(self.pico_em_uso, self.conexoes_em_uso)
+            self._registrar_espera(event)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.falhas_checkout += 1
+            self._registrar_espera(event)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.conexoes_em_uso -= 1
+
+    def resumo(self):
+        """Retorna um retrato das métricas atuais"""
+        with self._lock:
+            return {
+                "conexoes_abertas": self.conexoes_abertas,
+                "conexoes_em_uso": self.conexoes_em_uso,
+                "pico_em_uso": self.pico_em_uso,
+                "checkouts": self.checkouts,
+                "falhas_checkout": self.falhas_checkout,
+                "espera_media_ms": (self.espera_total / self.checkouts * 1000) if self.checkouts else 0.0,
+                "espera_maxima_ms": self.espera_maxima * 1000,
+                "max_pool_size": CONFIG_POOL["maxPoolSize"],
+            }
+
+
+metricas_pool = MetricasPool()
+
+_cliente = None
+_cliente_lock = threading.Lock()
+_criado_em = None
+_indices_verificados = False
+_indices_lock = threading.Lock()
+_proxima_tentativa_indices = 0.0
+
+# Intervalo entre novas tentativas de criar os índices após uma falha na inicialização
+INTERVALO_RETENTATIVA_INDICES = _int_env("MONGO_RETENTATIVA_INDICES_S", 60)
+
+CRIAR_INDICES_NA_INICIALIZACAO = os.getenv("MONGO_CRIAR_INDICES", "1") != "0"
+
+# Índices esperados por coleção: (nome, chaves, opções)
+INDICES = {
+    "usuarios": [
+        ("email_unico", [("email", pymongo.ASCENDING)], {"unique": True}),
+    ],
+    "historico_conversas": [
+        ("usuario_deleted_timestamp",
+         [("userId", pymongo.ASCENDING), ("deleted", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)],
+         {}),
+        ("chat_timestamp", [("chatId", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)], {}),
+        # Leitura incremental da análise de temas (analise_topicos.py), pelo momento da gravação
+        ("gravado_em", [("gravado_em", pymongo.ASCENDING)], {}),
+        # Busca no histórico do usuário (busca_historico.py); $text exige igualdade em userId.
+        # Só criado por "python banco.py migrar" (ver SO_NA_MIGRACAO)
+        ("busca_texto",
+         [("userId", pymongo.ASCENDING), ("userMessage", pymongo.TEXT), ("AiMessage", pymongo.TEXT)],
+         {"default_language": "portuguese", "weights": {"userMessage": 2, "AiMessage": 1}}),
+    ],
+    "cache_respostas": [
+        ("expiracao", [("expira_em", pymongo.ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+    "chats": [
+        ("usuario_deleted_atualizado",
+         [("userId", pymongo.ASCENDING), ("deleted", pymongo.ASCENDING),
+          ("updated_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+         {}),
+    ],
+}
+
+
+# Índices caros de construir num histórico grande: fora da primeira conexão do app (que
+# bloquearia a primeira página), só em "python banco.py migrar"
+SO_NA_MIGRACAO = {"busca_texto"}
+
+
+def obter_cliente():
+    """Retorna o MongoClient único do processo, criando-o na primeira chamada"""
+    global _cliente, _criado_em
+    if _cliente is None:
+        with _cliente_lock:
+            if _cliente is None:
+                _cliente = pymongo.MongoClient(
+                    os.getenv("MONGO_URL"),
+                    event_listeners=[metricas_pool],
+                    readPreference=READ_PREFERENCE,
+                    **CONFIG_POOL,
+                )
+                _criado_em = time.time()
+    return _cliente
+
+
+# Configuração da conexão com MongoDB
+def conectar_mongodb(criar_indices=True):
+    """Retorna o banco da aplicação usando o cliente compartilhado"""
+    db = obter_cliente().get_database(
+        NOME_BANCO,
+        read_concern=ReadConcern(READ_CONCERN),
+        write_concern=WriteConcern(w=WRITE_CONCERN_W),
+    )
+    if criar_indices and CRIAR_INDICES_NA_INICIALIZACAO and not _indices_verificados:
+        _tentar_indices(db)
+    return db
+
+
+def _tentar_indices(db):
+    """Garante os índices uma vez por processo; após falha, tenta de novo depois do intervalo"""
+    global _indices_verificados, _proxima_tentativa_indices
+    if time.time() < _proxima_tentativa_indices or not _indices_lock.acquire(blocking=False):
+        return
+    try:
+        if _indices_verificados:
+            return
+        _, falhas = garantir_indices(db, na_inicializacao=True)
+        if falhas:
+            _proxima_tentativa_indices = time.time() + INTERVALO_RETENTATIVA_INDICES
+            for nome, erro in falhas.items():
+                print(f"Aviso: não foi possível criar o índice {nome}: {erro}")
+        else:
+            _indices_verificados = True
+    finally:
+        _indices_lock.release()
+
+
+def garantir_indices(db, na_inicializacao=False):
+    """Cria os índices esperados (idempotente); retorna (nomes criados/confirmados, {nome: erro})
+
+    Cada índice é tentado separadamente, para que uma falha (ex.: e-mails duplicados
+    impedindo email_unico) não impeça os demais. Sem conexão com o servidor, desiste
+    dos restantes em vez de esperar o timeout de cada um."""
+    criados, falhas = [], {}
+    for nome_colecao, indices in INDICES.items():
+        colecao = db[nome_colecao]
+        for nome, chaves, opcoes in indices:
+            if na_inicializacao and nome in SO_NA_MIGRACAO:
+                continue
+            try:
+                criados.append(colecao.create_index(chaves, name=nome, **opcoes))
+            except ConnectionFailure as e:
+                falhas[nome] = e
+                return criados, falhas
+            except PyMongoError as e:
+                falhas[nome] = e
+    return criados, falhas
+
+
+def emails_duplicados(db, limite=20):
+    """E-mails com mais de um usuário (impedem o índice único email_unico)"""
+    return list(db["usuarios"].aggregate([
+        {"$group": {"_id": "$email", "quantidade": {"$sum": 1}}},
+        {"$match": {"quantidade": {"$gt": 1}}},
+        {"$sort": {"quantidade": -1}},
+        {"$limit": limite},
+    ]))
+
+
+def verificar_indices(db):
+    """Compara os índices existentes com os esperados; retorna {colecao: [faltando]}"""
+    faltando = {}
+    for nome_colecao, indices in INDICES.items():
+        existentes = db[nome_colecao].index_information()
+        chaves_existentes = [info["key"] for info in existentes.values()]
+        for nome, chaves, opcoes in indices:
+            # Índices de texto aparecem como _fts/_ftsx em index_information: compara pelo nome
+            if chaves not in chaves_existentes and nome not in existentes:
+                faltando.setdefault(nome_colecao, []).append(nome)
+            elif opcoes.get("unique") and not existentes.get(nome, {}).get("unique"):
+                faltando.setdefault(nome_colecao, []).append(nome)
+    return faltando
+
+
+def normalizar_deleted(db):
+    """Preenche deleted=False onde o campo não existe, para o filtro virar igualdade"""
+    resultado = db["historico_conversas"].update_many(
+        {"deleted": {"$exists": False}},
+        {"$set": {"deleted": False}}
+    )
+    return resultado.modified_count
+
+
+def preencher_gravado_em(db):
+    """Turnos gravados antes do campo gravado_em usam o próprio timestamp"""
+    resultado = db["historico_conversas"].update_many(
+        {"gravado_em": {"$exists": False}},
+        [{"$set": {"gravado_em": "$timestamp"}}]
+    )
+    return resultado.modified_count
+
+
+def propagar_chats_apagados(db):
+    """Marca deleted=True nos turnos de chats apagados (antes só o documento do chat era marcado)"""
+    apagados = db["chats"].distinct("_id", {"deleted": True})
+    if not apagados:
+        return 0
+    resultado = db["historico_conversas"].update_many(
+        {"chatId": {"$in": apagados}, "deleted": False},
+        {"$set": {"deleted": True}}
+    )
+    return resultado.modified_count
+
+
+def obter_metricas_pool():
+    """Métricas do pool para dimensionamento (conexões em uso, espera no checkout)"""
+    metricas = metricas_pool.resumo()
+    metricas["cliente_ativo"] = _cliente is not None
+    metricas["uptime_s"] = (time.time() - _criado_em) if _criado_em else 0.0
+    return metricas
+
+
+def fechar_cliente():
+    """Fecha o cliente compartilhado (usado no encerramento do processo)"""
+    global _cliente, _criado_em
+    with _cliente_lock:
+        if _cliente is not None:
+            _cliente.close()
+            _cliente = None
+            _criado_em = None
+
+
+def popular_chats(db):
+    """Cria os documentos da coleção "chats" a partir dos turnos já existentes"""
+    titulo = {"$substrCP": ["$primeira_mensagem", 0, 30]}
+    db["historico_conversas"].aggregate([
+        {"$sort": {"timestamp": 1}},
+        {"$group": {
+            "_id": "$chatId",
+            "userId": {"$first": "$userId"},
+            "created_at": {"$first": "$timestamp"},
+            "updated_at": {"$last": "$timestamp"},
+            "turnos": {"$sum": {"$cond": ["$deleted", 0, 1]}},
+            "deleted": {"$min": "$deleted"},
+            "primeira_mensagem": {"$first": "$userMessage"},
+        }},
+        {"$set": {"titulo": {"$cond": [
+            {"$gt": [{"$strLenCP": "$primeira_mensagem"}, 30]},
+            {"$concat": [titulo, "..."]},
+            "$primeira_mensagem",
+        ]}}},
+        {"$unset": "primeira_mensagem"},
+        {"$merge": {"into": "chats", "on": "_id", "whenMatched": "keepExisting", "whenNotMatched": "insert"}},
+    ])
+    return db["chats"].estimated_document_count()
+
+
+def migrar():
+    """Executa a migração completa: normaliza 'deleted', popula 'chats', cria e verifica índices"""
+    db = conectar_mongodb(criar_indices=False)
+    modificados = normalizar_deleted(db)
+    print(f"Documentos normalizados (deleted=False): {modificados}")
+    print(f"Chats na coleção 'chats': {popular_chats(db)}")
+    print(f"Turnos de chats apagados marcados: {propagar_chats_apagados(db)}")
+    print(f"Turnos com gravado_em preenchido: {preencher_gravado_em(db)}")
+    criados, falhas = garantir_indices(db)
+    for nome in criados:
+        print(f"Índice OK: {nome}")
+    for nome, erro in falhas.items():
+        print(f"Falha ao criar o índice {nome}: {erro}")
+    if "email_unico" in falhas:
+        for duplicado in emails_duplicados(db):
+            print(f"E-mail duplicado em usuarios: {duplicado['_id']} ({duplicado['quantidade']} usuários)")
+    faltando = verificar_indices(db)
+    if faltando or falhas:
+        print(f"Índices ausentes ou divergentes: {faltando}")
+        return False
+    print("Todos os índices estão presentes.")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manutenção do banco do ChatBot PUC Campinas")
+    parser.add_argument("comando", choices=["migrar", "verificar", "metricas"])
+    args = parser.parse_args()
+
+    if args.comando == "migrar":
+        raise SystemExit(0 if migrar() else 1)
+    elif args.comando == "verificar":
+        faltando = verificar_indices(conectar_mongodb(criar_indices=False))
+        print(faltando or "Todos os índices estão presentes.")
+        raise SystemExit(1 if faltando else 0)
+    else:
+        conectar_mongodb().command("ping")
+        print(obter_metricas_pool())
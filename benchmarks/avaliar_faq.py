@@ -0,0 +1,136 @@
+"""Avalia offline o atalho de FAQ: precisão, cobertura e latência por limiar.
+
+As perguntas de teste não fazem parte das paráfrases do índice e incluem quase-acertos
+("qual a nota mínima para passar?" não é a pergunta da frequência mínima), que devem ir
+para o modelo.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.avaliar_faq --limiares 0.4 0.5 0.6 0.7
+    python -m benchmarks.avaliar_faq --margem 0 --erros
+"""
+import argparse
+import time
+from agent import PROMPT
+from faq import MARGEM_FAQ, IndiceFAQ
+from texto import tokenizar
+
+# Conjunto separado das PARAFRASES do faq.py (a avaliação falha se houver sobreposição):
+# (pergunta, número esperado no FAQ ou None quando o modelo deve responder)
+CONJUNTO_TESTE = [
+    ("qual a porcentagem mínima de presença exigida?", 1),
+    ("se eu faltar muito eu reprovo? qual o limite de faltas", 1),
+    ("quantas aulas posso perder sem reprovar por falta", 1),
+    ("preciso ter 75% de presença nas aulas?", 1),
+    ("como solicito a dispensa de uma matéria que já cursei?", 2),
+    ("dá pra aproveitar disciplinas feitas em outra universidade?", 2),
+    ("quero pedir aproveitamento de estudos, como faço", 2),
+    ("onde vejo as datas do calendário acadêmico?", 3),
+    ("tem um manual do aluno da graduação?", 3),
+    ("as aulas do curso EAD são todas online?", 4),
+    ("o curso de educação digital tem encontros presenciais?", 4),
+    ("o diploma EAD tem validade igual ao do presencial?", 5),
+    ("o diploma de educação digital é reconhecido?", 5),
+    ("qual a dedicação necessária pra fazer um curso a distância", 6),
+    ("curso ead exige quanto tempo de estudo?", 6),
+    ("fiz o pagamento, em quanto tempo recebo o acesso à plataforma?", 7),
+    ("paguei por boleto, quando chega o acesso ao ambiente virtual?", 7),
+    ("o certificado da especialização com a PUCPR tem reconhecimento?", 8),
+    ("como fica o certificado da pós em parceria com a PUCPR", 8),
+    ("sou aluno de educação digital, posso usar os espaços do campus?", 9),
+    ("aluno ead pode frequentar a biblioteca?", 9),
+    ("que serviços a central de atendimento ao aluno faz?", 10),
+    ("o que a CAA resolve?", 10),
+    ("como emito documentos acadêmicos?", 10),
+    # Quase iguais a uma pergunta do FAQ, mas a resposta pronta estaria errada
+    ("qual a nota mínima para passar?", None),
+    ("quantas faltas posso ter em medicina?", None),
+    ("quero falar com a caa sobre meu boleto atrasado", None),
+    ("posso usar o estacionamento do campus sendo aluno ead?", None),
+    ("qual a média para ser aprovado na disciplina?", None),
+    ("perdi a prova, posso fazer segunda chamada?", None),
+    ("como trancar a matrícula?", None),
+    ("quanto custa a pós em parceria com a PUCPR?", None),
+    ("meu acesso ao AVA expirou, o que faço?", None),
+    ("esqueci a senha do ambiente virtual de aprendizagem", None),
+    ("como tirar a segunda via do boleto?", None),
+    ("qual o horário de atendimento da CAA?", None),
+    ("quanto tempo demora para o diploma ficar pronto?", None),
+    ("como mudar do curso presencial para o EAD?", None),
+    ("tem bolsa de estudo para pós-graduação?", None),
+    ("quando saem as notas do semestre?", None),
+    ("a biblioteca abre aos sábados?", None),
+    # Fora do FAQ
+    ("qual o endereço do campus I?", None),
+    ("quanto custa a mensalidade de medicina?", None),
+    ("quando é o próximo vestibular?", None),
+    ("quais cursos de engenharia vocês têm?", None),
+    ("como funciona o prouni na puc?", None),
+    ("boa tarde", None),
+    ("obrigado pela ajuda!", None),
+    ("qual o telefone da secretaria?", None),
+    ("tem estacionamento no campus?", None),
+    ("como faço a rematrícula?", None),
+]
+
+
+def verificar_separacao(indice):
+    """Falha se alguma pergunta de teste for igual (após normalizar) a uma pergunta ou paráfrase do índice"""
+    conhecidas = {
+        tuple(tokenizar(texto))
+        for entrada in indice.entradas.values()
+        for texto in [entrada.pergunta, *entrada.parafrases]
+    }
+    repetidas = [pergunta for pergunta, _ in CONJUNTO_TESTE if tuple(tokenizar(pergunta)) in conhecidas]
+    if repetidas:
+        raise SystemExit(f"Perguntas de teste repetem paráfrases do índice: {repetidas}")
+
+
+def avaliar(indice, limiar, margem, erros=None):
+    verdadeiros = falsos = acertos_esperados = 0
+    inicio = time.perf_counter()
+    for pergunta, esperado in CONJUNTO_TESTE:
+        entrada = indice.responder(pergunta, limiar=limiar, margem=margem)
+        if entrada is not None:
+            if entrada.numero == esperado:
+                verdadeiros += 1
+            else:
+                falsos += 1
+                if erros is not None:
+                    erros.append((limiar, pergunta, esperado, entrada.numero))
+        if esperado is not None:
+            acertos_esperados += 1
+    latencia_ms = (time.perf_counter() - inicio) / len(CONJUNTO_TESTE) * 1000
+    respondidas = verdadeiros + falsos
+    return {
+        "precisao": verdadeiros / respondidas if respondidas else 1.0,
+        "cobertura": verdadeiros / acertos_esperados if acertos_esperados else 0.0,
+        "taxa_atalho": respondidas / len(CONJUNTO_TESTE),
+        "latencia_ms": latencia_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limiares", type=float, nargs="+", default=[0.4, 0.5, 0.6, 0.7, 0.8])
+    parser.add_argument("--margem", type=float, default=MARGEM_FAQ, help="folga mínima sobre a segunda entrada")
+    parser.add_argument("--erros", action="store_true", help="lista as respostas locais erradas")
+    args = parser.parse_args()
+
+    indice = IndiceFAQ.do_prompt(PROMPT)
+    verificar_separacao(indice)
+    negativas = sum(1 for _, esperado in CONJUNTO_TESTE if esperado is None)
+    print(f"{len(CONJUNTO_TESTE)} perguntas ({negativas} para o modelo), {len(indice.entradas)} entradas no FAQ, "
+          f"margem {args.margem:.2f}")
+    print(f"{'limiar':>6} | {'precisão':>8} | {'cobertura':>9} | {'atalho':>6} | {'latência (ms)':>13}")
+    erros = []
+    for limiar in args.limiares:
+        r = avaliar(indice, limiar, args.margem, erros)
+        print(f"{limiar:>6.2f} | {r['precisao']:>8.2%} | {r['cobertura']:>9.2%} | "
+              f"{r['taxa_atalho']:>6.2%} | {r['latencia_ms']:>13.3f}")
+    if args.erros:
+        for limiar, pergunta, esperado, respondida in erros:
+            print(f"  limiar {limiar:.2f}: {pergunta!r} -> FAQ {respondida} (esperado: {esperado or 'modelo'})")
+
+
+if __name__ == "__main__":
+    main()
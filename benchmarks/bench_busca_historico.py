@@ -0,0 +1,129 @@
+"""Latência da busca no histórico (índice de texto com prefixo userId) conforme o histórico cresce.
+
+1. Sem banco: tempo de extrair_trecho por resultado, em turnos sintéticos.
+2. Com o MongoDB do MONGO_URL: cria um banco temporário com os índices de banco.INDICES, grava
+   um usuário-alvo com --turnos-usuario turnos e vai completando o histórico com outros usuários
+   até cada tamanho de --turnos (ex.: 10 mil, 100 mil, 1 milhão). Em cada tamanho mede p50/p95
+   de buscar_historico para o usuário-alvo e, como referência, de uma busca por regex nos mesmos
+   campos (o que seria feito sem o índice de texto). O banco temporário é apagado ao final.
+
+Uso (na raiz do projeto, com o MongoDB configurado no .env):
+    python -m benchmarks.bench_busca_historico --turnos 10000 100000 1000000
+    python -m benchmarks.bench_busca_historico --sem-banco
+"""
+import argparse
+import datetime
+import re
+import statistics
+import time
+from benchmarks.bench_palavras_chave import gerar_historico
+from busca_historico import buscar_historico, extrair_trecho
+from texto import tokenizar
+
+CONSULTAS = ["matrícula", "pós graduação", "inscrições", "laboratórios", "notas", "iniciação científica",
+             "ambiente virtual", "professores", "e-mail", "EAD"]
+USUARIO_ALVO = "usuario_alvo"
+CHATS_POR_USUARIO = 20
+TURNOS_POR_OUTRO_USUARIO = 500
+
+
+def percentis(latencias):
+    latencias = sorted(latencias)
+    return statistics.median(latencias), latencias[min(int(len(latencias) * 0.95), len(latencias) - 1)]
+
+
+def medir_trechos(turnos):
+    textos = [texto for i in range(0, turnos, 1000) for texto in gerar_historico(min(1000, turnos - i), semente=i)]
+    latencias = []
+    for i, texto in enumerate(textos):
+        termos = set(tokenizar(CONSULTAS[i % len(CONSULTAS)]))
+        inicio = time.perf_counter()
+        extrair_trecho(texto * 4, termos)
+        latencias.append((time.perf_counter() - inicio) * 1e6)
+    p50, p95 = percentis(latencias)
+    print(f"extrair_trecho em {len(textos)} textos: p50 {p50:.1f} µs, p95 {p95:.1f} µs")
+
+
+def turnos_sinteticos(user_id, quantidade, semente):
+    """Turnos no formato gravado por salvar_mensagem_historico (pergunta e resposta sintéticas)"""
+    mensagens = gerar_historico(2 * quantidade, semente=semente)
+    base = datetime.datetime(2024, 1, 1)
+    return [{
+        "timestamp": base + datetime.timedelta(minutes=i),
+        "chatId": f"{user_id}_chat{i % CHATS_POR_USUARIO}",
+        "userId": user_id,
+        "userMessage": mensagens[2 * i],
+        "AiMessage": mensagens[2 * i + 1] * 3,
+        "deleted": False,
+    } for i in range(quantidade)]
+
+
+def medir_consultas(db, repeticoes, limite):
+    texto, regex = [], []
+    for i in range(repeticoes):
+        consulta = CONSULTAS[i % len(CONSULTAS)]
+        inicio = time.perf_counter()
+        buscar_historico(USUARIO_ALVO, consulta, limite, db=db)
+        texto.append((time.perf_counter() - inicio) * 1000)
+
+        padrao = re.escape(consulta.split()[0])
+        inicio = time.perf_counter()
+        list(db["historico_conversas"].find({
+            "userId": USUARIO_ALVO, "deleted": False,
+            "$or": [{"userMessage": {"$regex": padrao, "$options": "i"}},
+                    {"AiMessage": {"$regex": padrao, "$options": "i"}}],
+        }).limit(limite))
+        regex.append((time.perf_counter() - inicio) * 1000)
+    return percentis(texto), percentis(regex)
+
+
+def medir_banco(tamanhos, turnos_usuario, repeticoes, limite):
+    from banco import INDICES, NOME_BANCO, obter_cliente
+    cliente = obter_cliente()
+    nome_banco = f"{NOME_BANCO}_bench_busca"
+    cliente.drop_database(nome_banco)
+    db = cliente[nome_banco]
+    try:
+        for nome_colecao in ("historico_conversas", "chats"):
+            for nome, chaves, opcoes in INDICES[nome_colecao]:
+                db[nome_colecao].create_index(chaves, name=nome, **opcoes)
+        db["historico_conversas"].insert_many(turnos_sinteticos(USUARIO_ALVO, turnos_usuario, 0))
+        total, outro = turnos_usuario, 0
+
+        print(f"{'turnos':>9} | {'texto p50 (ms)':>14} | {'texto p95 (ms)':>14} | "
+              f"{'regex p50 (ms)':>14} | {'regex p95 (ms)':>14} | {'carga (s)':>9}")
+        for tamanho in sorted(tamanhos):
+            inicio = time.perf_counter()
+            while total < tamanho:
+                quantidade = min(TURNOS_POR_OUTRO_USUARIO, tamanho - total)
+                outro += 1
+                db["historico_conversas"].insert_many(
+                    turnos_sinteticos(f"usuario_{outro}", quantidade, outro), ordered=False
+                )
+                total += quantidade
+            carga = time.perf_counter() - inicio
+            medir_consultas(db, len(CONSULTAS), limite)  # aquece o cache do servidor
+            (texto_p50, texto_p95), (regex_p50, regex_p95) = medir_consultas(db, repeticoes, limite)
+            print(f"{total:>9} | {texto_p50:>14.2f} | {texto_p95:>14.2f} | "
+                  f"{regex_p50:>14.2f} | {regex_p95:>14.2f} | {carga:>9.1f}")
+    finally:
+        cliente.drop_database(nome_banco)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turnos", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="tamanhos totais do histórico (todos os usuários)")
+    parser.add_argument("--turnos-usuario", type=int, default=2000, help="turnos do usuário-alvo")
+    parser.add_argument("--repeticoes", type=int, default=200)
+    parser.add_argument("--limite", type=int, default=20, help="resultados por busca")
+    parser.add_argument("--sem-banco", action="store_true", help="só mede a extração dos trechos")
+    args = parser.parse_args()
+
+    medir_trechos(10000)
+    if not args.sem_banco:
+        medir_banco(args.turnos, args.turnos_usuario, args.repeticoes, args.limite)
+
+
+if __name__ == "__main__":
+    main()
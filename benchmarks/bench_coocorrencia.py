@@ -0,0 +1,70 @@
+"""Escala do motor de coocorrência vetorizado comparado ao laço de criar_grafo_conversa.
+
+Mede separadamente a extração das palavras-chave e o cálculo das coocorrências (Xᵀ·X)
+para tamanhos crescentes de corpus, confere os pesos contra a implementação do networkx
+numa amostra e estima quanto o laço antigo levaria no maior tamanho.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_coocorrencia --tamanhos 10000 100000 1000000
+"""
+import argparse
+import time
+from collections import Counter
+from coocorrencia import CoocorrenciaVetorizada
+from grafos import criar_grafo_conversa
+from benchmarks.bench_palavras_chave import gerar_historico
+
+
+def conferir(mensagens):
+    """Pesos e frequências iguais aos do grafo do networkx"""
+    G, palavras = criar_grafo_conversa([{"content": m} for m in mensagens])
+    motor = CoocorrenciaVetorizada().adicionar(mensagens)
+    pesos_nx = {frozenset((a, b)): d["weight"] for a, b, d in G.edges(data=True)}
+    pesos_motor = {frozenset((a, b)): peso for a, b, peso in motor.arestas()}
+    return pesos_nx == pesos_motor and Counter(palavras) == motor.contador()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--amostra-laco", type=int, default=50000,
+                        help="mensagens usadas para medir o laço antigo do networkx")
+    args = parser.parse_args()
+
+    maior = max(args.tamanhos)
+    inicio = time.perf_counter()
+    mensagens = gerar_historico(maior)
+    print(f"{maior} mensagens sintéticas geradas em {time.perf_counter() - inicio:.1f}s")
+
+    amostra = mensagens[:args.amostra_laco]
+    print(f"Conferência com o networkx ({len(amostra)} mensagens): "
+          f"{'idêntico' if conferir(amostra) else 'DIVERGENTE'}")
+    inicio = time.perf_counter()
+    criar_grafo_conversa([{"content": m} for m in amostra])
+    tempo_laco = (time.perf_counter() - inicio) / len(amostra)
+    inicio = time.perf_counter()
+    CoocorrenciaVetorizada().codificar(amostra)
+    # Só os laços de pares com has_edge/add_edge (a extração é a mesma nos dois caminhos)
+    tempo_pares = max(tempo_laco - (time.perf_counter() - inicio) / len(amostra), 0.0)
+
+    print(f"{'mensagens':>10} | {'extração (s)':>12} | {'Xᵀ·X (s)':>9} | {'total (s)':>9} | "
+          f"{'laço de pares (s, est.)':>23} | {'antigo total (s, est.)':>22}")
+    for tamanho in sorted(args.tamanhos):
+        motor = CoocorrenciaVetorizada()
+        tempo_extracao = tempo_produto = 0.0
+        for inicio_bloco in range(0, tamanho, motor.tamanho_bloco):
+            bloco = mensagens[inicio_bloco:min(inicio_bloco + motor.tamanho_bloco, tamanho)]
+            inicio = time.perf_counter()
+            documentos, termos = motor.codificar(bloco)
+            tempo_extracao += time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            motor.adicionar_ocorrencias(documentos, termos, len(bloco))
+            tempo_produto += time.perf_counter() - inicio
+        print(f"{tamanho:>10} | {tempo_extracao:>12.2f} | {tempo_produto:>9.3f} | "
+              f"{tempo_extracao + tempo_produto:>9.2f} | {tempo_pares * tamanho:>23.2f} | "
+              f"{tempo_laco * tamanho:>22.1f}")
+    print(f"Arestas no maior corpus: {len(motor.arestas())}, termos: {len(motor.contador())}")
+
+
+if __name__ == "__main__":
+    main()
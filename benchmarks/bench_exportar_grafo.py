@@ -0,0 +1,94 @@
+"""Vazão e pico de memória da exportação em fluxo (NDJSON, GraphML, Parquet) x JSON em memória.
+
+Monta grafos sintéticos com vocabulário grande (bem maior que a lista de palavras-chave, para
+simular o corpus) e mede, para cada formato, o tempo, os registros por segundo e o pico de
+memória Python da exportação para um arquivo temporário. O pico vem de uma segunda execução
+com tracemalloc, porque o rastreamento deixa tudo mais lento. A linha "json (antigo)" monta o
+documento inteiro numa string, como exportar_dados_grafo fazia. No Parquet o pico do pool de
+memória do Arrow (fora do tracemalloc) aparece à parte.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_exportar_grafo --arestas 100000 1000000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from coocorrencia import GrafoConversa
+from exportar_grafo import FORMATOS, exportar
+
+
+def grafo_sintetico(arestas, semente=7):
+    """GrafoConversa com ~arestas/10 termos e a quantidade pedida de arestas distintas"""
+    aleatorio = random.Random(semente)
+    termos = [f"termo_{i}" for i in range(max(arestas // 10, 10))]
+    grafo = GrafoConversa(palavras_chave=termos)
+    grafo.frequencias = Counter({termo: aleatorio.randint(1, 5000) for termo in termos})
+    pesos = {}
+    while len(pesos) < arestas:
+        a, b = aleatorio.sample(termos, 2)
+        if (b, a) not in pesos:
+            pesos[(a, b)] = aleatorio.randint(1, 500)
+    grafo.pesos = pesos
+    grafo.mensagens = arestas * 3
+    return grafo
+
+
+def exportar_antigo(grafo, destino):
+    """JSON montado inteiro em memória (mesma estrutura de exportar_dados_grafo)"""
+    dados = {
+        "nos": list(grafo.frequencias),
+        "arestas": [[a, b, peso] for (a, b), peso in grafo.pesos.items()],
+        "frequencias": dict(grafo.frequencias),
+    }
+    texto = json.dumps(dados, indent=2, ensure_ascii=False)
+    with open(destino, "w", encoding="utf-8") as arquivo:
+        arquivo.write(texto)
+
+
+def medir(funcao):
+    inicio = time.perf_counter()
+    funcao()
+    duracao = time.perf_counter() - inicio
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duracao, pico / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--arestas", type=int, nargs="+", default=[100000, 1000000])
+    args = parser.parse_args()
+
+    import pyarrow as pa
+    pasta = tempfile.mkdtemp(prefix="bench_exportar_")
+    print(f"{'arestas':>9} | {'formato':>13} | {'tempo (s)':>9} | {'registros/s':>11} | "
+          f"{'arquivo (MB)':>12} | {'pico Python (MB)':>16}")
+    for quantidade in args.arestas:
+        grafo = grafo_sintetico(quantidade)
+        registros = len(grafo.frequencias) + len(grafo.pesos)
+        caminho = os.path.join(pasta, "antigo.json")
+        duracao, pico = medir(lambda: exportar_antigo(grafo, caminho))
+        print(f"{quantidade:>9} | {'json (antigo)':>13} | {duracao:>9.2f} | {registros / duracao:>11.0f} | "
+              f"{os.path.getsize(caminho) / 2**20:>12.1f} | {pico:>16.1f}")
+        for formato in FORMATOS:
+            caminho = os.path.join(pasta, f"grafo.{formato}")
+            duracao, pico = medir(lambda: exportar(grafo, formato, caminho))
+            print(f"{quantidade:>9} | {formato:>13} | {duracao:>9.2f} | {registros / duracao:>11.0f} | "
+                  f"{os.path.getsize(caminho) / 2**20:>12.1f} | {pico:>16.1f}")
+        os.remove(os.path.join(pasta, "antigo.json"))
+        for formato in FORMATOS:
+            os.remove(os.path.join(pasta, f"grafo.{formato}"))
+    print(f"Pico do pool de memória do Arrow (Parquet, fora do tracemalloc): "
+          f"{pa.default_memory_pool().max_memory() / 2**20:.1f} MB")
+    os.rmdir(pasta)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Tempo de import a frio dos pontos de entrada (python -X importtime) e guarda contra regressões.
+
+Cada módulo é importado várias vezes, sempre num processo novo. O script mostra a mediana
+do tempo de import, quantos módulos foram carregados e as dependências diretas mais caras.
+Sai com código 1 quando um módulo pesado que deveria ser adiado é carregado no import
+(ex.: networkx ao abrir o chat). Também sai com 1 quando um limite passado em --limite é
+ultrapassado.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_importacao --repeticoes 5
+    python -m benchmarks.bench_importacao --limite chatUI=400 --limite trabalho=250
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Módulo de entrada -> dependências pesadas que só podem ser carregadas no primeiro uso
+ENTRADAS = {
+    "trabalho": ("pymongo", "pydantic_ai", "logfire", "networkx", "matplotlib"),
+    "chatUI": ("pydantic_ai", "logfire", "networkx", "matplotlib"),
+    "grafos": ("networkx", "matplotlib"),
+    # CLI e processos do pool da importação em lote: sem a interface
+    "importar_usuarios": ("streamlit", "pymongo"),
+    # Referência: o agente carrega tudo, mas só na primeira mensagem
+    "agent": (),
+}
+
+
+def importar(modulo):
+    """Importa o módulo num processo novo; retorna [(self_us, acumulado_us, nível, nome)]"""
+    ambiente = dict(os.environ, LOGFIRE_SEND_TO_LOGFIRE="false", PYTHONDONTWRITEBYTECODE="1")
+    saida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True, text=True, env=ambiente, check=True,
+    ).stderr
+    registros = []
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, acumulado, nome = linha[len("import time:"):].split("|")
+        nivel = (len(nome) - len(nome.lstrip())) // 2
+        registros.append((int(proprio), int(acumulado), nivel, nome.strip()))
+    return registros
+
+
+def medir(modulo, repeticoes):
+    tempos, registros = [], []
+    for _ in range(repeticoes):
+        registros = importar(modulo)
+        tempos.append(next(a for _, a, nivel, nome in registros if nome == modulo and nivel == 0) / 1000)
+    carregados = {nome for *_, nome in registros}
+    # O import do módulo termina depois de suas dependências: elas vêm antes na saída
+    fim = next(i for i, (_, _, nivel, nome) in enumerate(registros) if nome == modulo and nivel == 0)
+    inicio = max((i + 1 for i, (_, _, nivel, _) in enumerate(registros[:fim]) if nivel == 0), default=0)
+    diretas = [(nome, acumulado / 1000) for _, acumulado, nivel, nome in registros[inicio:fim] if nivel == 1]
+    return statistics.median(tempos), carregados, sorted(diretas, key=lambda d: d[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--limite", action="append", default=[], metavar="MODULO=MS",
+                        help="falha se a mediana do import passar do limite")
+    args = parser.parse_args()
+    limites = {m: float(ms) for m, ms in (item.split("=") for item in args.limite)}
+
+    falhas = []
+    print(f"{'módulo':>9} | {'import (ms)':>11} | {'módulos':>7} | dependências diretas mais caras (ms)")
+    for modulo, proibidos in ENTRADAS.items():
+        tempo, carregados, diretas = medir(modulo, args.repeticoes)
+        caras = ", ".join(f"{nome} {ms:.0f}" for nome, ms in diretas[:4])
+        print(f"{modulo:>9} | {tempo:>11.1f} | {len(carregados):>7} | {caras}")
+        indevidos = [p for p in proibidos if any(nome == p or nome.startswith(p + ".") for nome in carregados)]
+        if indevidos:
+            falhas.append(f"{modulo} carrega no import: {', '.join(indevidos)}")
+        if modulo in limites and tempo > limites[modulo]:
+            falhas.append(f"{modulo}: {tempo:.0f} ms > limite de {limites[modulo]:.0f} ms")
+
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Vazão da importação em lote (leitura do CSV, validação e hash) com 1..N processos.
+
+Gera um CSV sintético no formato da secretaria, com uma fração de linhas inválidas
+(email fora do domínio, nome vazio), e executa importar_usuarios.importar em modo ensaio
+(sem gravar no banco) para cada quantidade de processos e tamanho de lote. A gravação com
+insert_many é medida pelo próprio comando, que mostra a vazão ao importar de verdade.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_importar_usuarios --linhas 200000 --processos 1 2 4 --lotes 500 2000
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+from importar_usuarios import importar
+
+CURSOS = ["Administração", "Ciência da Computação", "Direito", "Engenharia de Computação", "Sistemas de Informação"]
+
+
+def gerar_csv(caminho, linhas, semente=5):
+    aleatorio = random.Random(semente)
+    with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(["Nome", "E-mail", "Senha", "RA", "Curso"])
+        for i in range(linhas):
+            dominio = "gmail.com" if aleatorio.random() < 0.005 else "puccampinas.edu.br"
+            nome = "" if aleatorio.random() < 0.002 else f"Aluno Sintético {i}"
+            escritor.writerow([nome, f"aluno{i}@{dominio}", f"senha-{i}", f"{20000000 + i}", aleatorio.choice(CURSOS)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=200000)
+    parser.add_argument("--processos", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--lotes", type=int, nargs="+", default=[500, 2000])
+    args = parser.parse_args()
+
+    caminho = os.path.join(tempfile.mkdtemp(prefix="bench_importacao_"), "alunos.csv")
+    gerar_csv(caminho, args.linhas)
+    print(f"CSV sintético: {args.linhas} linhas, {os.path.getsize(caminho) / 2**20:.1f} MB "
+          f"(CPUs disponíveis: {len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()})")
+    print(f"{'processos':>9} | {'lote':>5} | {'tempo (s)':>9} | {'linhas/s':>9} | {'válidas':>7} | {'falhas':>6}")
+    for processos in args.processos:
+        for lote in args.lotes:
+            resumo = importar(caminho, processos, lote, gravar=False, progresso=False)
+            print(f"{processos:>9} | {lote:>5} | {resumo['tempo_s']:>9.2f} | {resumo['linhas_por_s']:>9.0f} | "
+                  f"{resumo['inseridos']:>7} | {len(resumo['falhas']):>6}")
+    os.remove(caminho)
+    os.rmdir(os.path.dirname(caminho))
+
+
+if __name__ == "__main__":
+    main()
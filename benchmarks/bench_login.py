@@ -0,0 +1,102 @@
+"""Latência do login sob logins concorrentes: find_one + update_one x find_one_and_update projetado.
+
+Cria uma coleção temporária com usuários sintéticos (e o índice único de email) no banco do
+MONGO_URL e dispara logins de várias threads ao mesmo tempo pelo pool compartilhado. Mostra a
+latência (p50/p95/p99) e a vazão de cada caminho, além do tamanho do objeto guardado na sessão
+(documento inteiro x SessaoUsuario). A coleção é apagada ao final.
+
+Uso (na raiz do projeto, com o MongoDB configurado no .env):
+    python -m benchmarks.bench_login --usuarios 2000 --logins 5000 --threads 1 8 32
+"""
+import argparse
+import datetime
+import pickle
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import ASCENDING
+from banco import conectar_mongodb, obter_metricas_pool
+from usuarios import SessaoUsuario, autenticar_na_colecao, criar_hash_senha
+
+COLECAO = "usuarios_bench_login"
+SENHA = "senha-de-teste"
+CURSOS = ["Administração", "Ciência da Computação", "Direito", "Engenharia de Computação", "Sistemas de Informação"]
+
+
+def usuario_sintetico(i):
+    """Documento no formato gravado por cadastrar_usuario"""
+    agora = datetime.datetime.now()
+    return {
+        "nome_completo": f"Estudante Sintético {i}",
+        "email": f"aluno{i}@puccampinas.edu.br",
+        "senha_hash": criar_hash_senha(SENHA),
+        "tipo_usuario": "estudante",
+        "data_cadastro": agora,
+        "ultimo_acesso": agora,
+        "status": "ativo",
+        "ra": f"{20000000 + i}",
+        "curso": CURSOS[i % len(CURSOS)],
+    }
+
+
+def autenticar_antigo(colecao, email, senha):
+    """Como autenticar_usuario fazia: duas idas ao banco e o documento inteiro na sessão"""
+    usuario = colecao.find_one({"email": email, "senha_hash": criar_hash_senha(senha)})
+    if usuario:
+        colecao.update_one({"_id": usuario["_id"]}, {"$set": {"ultimo_acesso": datetime.datetime.now()}})
+        return True, usuario
+    return False, None
+
+
+def medir(autenticar, colecao, emails, threads):
+    def login(email):
+        inicio = time.perf_counter()
+        sucesso, _ = autenticar(colecao, email, SENHA)
+        if not sucesso:
+            raise RuntimeError(f"login falhou para {email}")
+        return (time.perf_counter() - inicio) * 1000
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencias = sorted(pool.map(login, emails))
+    duracao = time.perf_counter() - inicio
+    percentil = lambda p: latencias[min(int(len(latencias) * p), len(latencias) - 1)]
+    return statistics.median(latencias), percentil(0.95), percentil(0.99), len(emails) / duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--usuarios", type=int, default=2000)
+    parser.add_argument("--logins", type=int, default=5000, help="logins por medição")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    colecao = conectar_mongodb()[COLECAO]
+    colecao.drop()
+    try:
+        colecao.create_index([("email", ASCENDING)], unique=True, name="email_unico")
+        colecao.insert_many([usuario_sintetico(i) for i in range(args.usuarios)], ordered=False)
+        aleatorio = random.Random(3)
+        emails = [f"aluno{aleatorio.randrange(args.usuarios)}@puccampinas.edu.br" for _ in range(args.logins)]
+
+        _, documento = autenticar_antigo(colecao, emails[0], SENHA)
+        _, sessao = autenticar_na_colecao(colecao, emails[0], SENHA)
+        print(f"Objeto na sessão: documento inteiro {len(pickle.dumps(documento))} bytes "
+              f"(com senha_hash) x SessaoUsuario {len(pickle.dumps(sessao))} bytes")
+        assert isinstance(sessao, SessaoUsuario)
+
+        print(f"{'threads':>7} | {'caminho':>22} | {'p50 (ms)':>8} | {'p95 (ms)':>8} | "
+              f"{'p99 (ms)':>8} | {'logins/s':>8}")
+        for threads in args.threads:
+            for nome, autenticar in (("find_one + update_one", autenticar_antigo),
+                                     ("find_one_and_update", autenticar_na_colecao)):
+                p50, p95, p99, vazao = medir(autenticar, colecao, emails, threads)
+                print(f"{threads:>7} | {nome:>22} | {p50:>8.2f} | {p95:>8.2f} | {p99:>8.2f} | {vazao:>8.0f}")
+        print(f"Pool: {obter_metricas_pool()}")
+    finally:
+        colecao.drop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Latência do índice do manual do aluno sobre um corpus sintético grande.
+
+Gera arquivos markdown numa pasta temporária, indexa tudo, mede o tempo de carga do
+índice (mmap), a latência das consultas e a reindexação incremental após alterar um arquivo.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_manual_aluno --arquivos 2000 --palavras 2000 --consultas 500
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from manual_aluno import IndiceManual, indexar, versao_atual
+
+TEMAS = [
+    "matrícula", "rematrícula", "trancamento", "frequência", "avaliação", "prova substitutiva",
+    "aproveitamento de estudos", "estágio obrigatório", "trabalho de conclusão", "biblioteca",
+    "calendário acadêmico", "colação de grau", "diploma", "bolsa", "financiamento", "mensalidade",
+    "ambiente virtual", "atividades complementares", "dependência", "transferência",
+]
+SILABAS = ["ca", "de", "li", "mo", "pra", "sen", "tu", "ri", "vel", "cao", "men", "to", "dis", "ples", "gra"]
+
+
+def gerar_palavra(aleatorio):
+    return "".join(aleatorio.choice(SILABAS) for _ in range(aleatorio.randint(2, 4)))
+
+
+def gerar_corpus(pasta, arquivos, palavras, semente=42):
+    aleatorio = random.Random(semente)
+    vocabulario = [gerar_palavra(aleatorio) for _ in range(20000)]
+    for i in range(arquivos):
+        linhas = [f"# Capítulo {i}"]
+        escritas = 0
+        while escritas < palavras:
+            tema = aleatorio.choice(TEMAS)
+            linhas.append(f"\n## {tema.title()} {aleatorio.randint(1, 99)}\n")
+            corpo = [aleatorio.choice(vocabulario) for _ in range(150)]
+            corpo[aleatorio.randrange(len(corpo))] = tema
+            linhas.append(" ".join(corpo))
+            escritas += len(corpo)
+        subpasta = os.path.join(pasta, f"parte{i % 20:02d}")
+        os.makedirs(subpasta, exist_ok=True)
+        with open(os.path.join(subpasta, f"capitulo{i:05d}.md"), "w", encoding="utf-8") as f:
+            f.write("\n".join(linhas))
+    return vocabulario
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * p), len(ordenados) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--arquivos", type=int, default=2000)
+    parser.add_argument("--palavras", type=int, default=2000, help="palavras por arquivo")
+    parser.add_argument("--consultas", type=int, default=500)
+    parser.add_argument("-k", type=int, default=4)
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix="bench_manual_")
+    pasta, pasta_indice = os.path.join(base, "manual"), os.path.join(base, "indice")
+    try:
+        inicio = time.perf_counter()
+        vocabulario = gerar_corpus(pasta, args.arquivos, args.palavras)
+        print(f"Corpus: {args.arquivos} arquivos x ~{args.palavras} palavras "
+              f"(gerado em {time.perf_counter() - inicio:.1f}s)")
+
+        completo = indexar(pasta, pasta_indice)
+        print(f"Indexação completa: {completo['tempo_s']:.2f}s | {completo['trechos']} trechos, "
+              f"{completo['termos']} termos")
+
+        inicio = time.perf_counter()
+        indice = IndiceManual(versao_atual(pasta_indice))
+        print(f"Carga do índice (mmap): {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+        aleatorio = random.Random(7)
+        consultas = [
+            f"{aleatorio.choice(TEMAS)} {' '.join(aleatorio.sample(vocabulario, 2))}"
+            for _ in range(args.consultas)
+        ]
+        latencias = []
+        for consulta in consultas:
+            inicio = time.perf_counter()
+            indice.buscar(consulta, args.k)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        print(f"Consultas ({len(consultas)}): p50={statistics.median(latencias):.2f} ms "
+              f"p95={percentil(latencias, 0.95):.2f} ms p99={percentil(latencias, 0.99):.2f} ms")
+
+        # Reindexação incremental: só o arquivo alterado é lido e dividido de novo
+        alterado = os.path.join(pasta, "parte00", "capitulo00000.md")
+        with open(alterado, "a", encoding="utf-8") as f:
+            f.write("\n\n## Novidade\nregra nova sobre rematrícula online")
+        incremental = indexar(pasta, pasta_indice)
+        print(f"Reindexação incremental: {incremental['tempo_s']:.2f}s "
+              f"({incremental['reprocessados']} arquivo reprocessado; completa: {completo['tempo_s']:.2f}s)")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
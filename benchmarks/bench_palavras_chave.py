@@ -0,0 +1,74 @@
+"""Compara a extração de palavras-chave antiga (lista + split) com o extrator compilado.
+
+Gera um histórico sintético grande e mede o tempo por mensagem da implementação antiga,
+do extrator compilado mensagem a mensagem e da API em lote; mostra também quantas
+ocorrências cada uma encontra (o extrator reconhece plurais, acentos e termos compostos).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_palavras_chave --mensagens 100000
+"""
+import argparse
+import random
+import re
+import time
+from palavras_chave import LISTA_PALAVRAS_CHAVES, obter_extrator
+
+COMUNS = (
+    "olá gostaria de saber como funciona o processo para alunos do primeiro ano "
+    "obrigado pela ajuda quando posso fazer isso na universidade hoje amanhã"
+).split()
+VARIANTES = [
+    "Pós-graduação", "pos graduacao", "inscrições", "Matrícula", "matricula", "e-mail",
+    "iniciação científica", "ambiente virtual", "laboratórios", "professores", "notas", "EAD",
+]
+
+
+def extrair_legado(texto, lista_palavras):
+    """Implementação anterior de grafos.extrair_palavras_chave"""
+    texto_limpo = re.sub(r"[^\w\s]", "", texto.lower())
+    return [palavra for palavra in texto_limpo.split() if palavra in lista_palavras]
+
+
+def gerar_historico(quantidade, semente=42):
+    aleatorio = random.Random(semente)
+    termos = LISTA_PALAVRAS_CHAVES + VARIANTES
+    mensagens = []
+    for _ in range(quantidade):
+        palavras = aleatorio.choices(COMUNS, k=aleatorio.randint(8, 40))
+        for _ in range(aleatorio.randint(0, 4)):
+            palavras.insert(aleatorio.randrange(len(palavras) + 1), aleatorio.choice(termos))
+        mensagens.append(" ".join(palavras) + aleatorio.choice([".", "?", "!"]))
+    return mensagens
+
+
+def medir(nome, funcao, mensagens):
+    inicio = time.perf_counter()
+    encontradas = funcao(mensagens)
+    duracao = time.perf_counter() - inicio
+    total = sum(len(p) for p in encontradas)
+    print(f"{nome:<28} {duracao:>8.2f}s {duracao / len(mensagens) * 1e6:>10.1f} µs/msg {total:>10} ocorrências")
+    return duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mensagens", type=int, default=100000)
+    parser.add_argument("--lote", type=int, default=1000, help="mensagens por chamada da API em lote")
+    args = parser.parse_args()
+
+    mensagens = gerar_historico(args.mensagens)
+    extrator = obter_extrator()
+    print(f"{len(mensagens)} mensagens sintéticas, {len(LISTA_PALAVRAS_CHAVES)} palavras-chave")
+
+    legado = medir("antiga (lista)", lambda ms: [extrair_legado(m, LISTA_PALAVRAS_CHAVES) for m in ms], mensagens)
+    compilado = medir("compilado (por mensagem)", lambda ms: [extrator.extrair(m) for m in ms], mensagens)
+    lote = medir(
+        "compilado (lote)",
+        lambda ms: [p for i in range(0, len(ms), args.lote) for p in extrator.extrair_lote(ms[i:i + args.lote])],
+        mensagens,
+    )
+    print(f"Ganho: por mensagem {legado / compilado:.1f}x | lote {legado / lote:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compara o PROMPT completo com o prompt montado por recuperação (BM25), offline.
+
+Usa o FunctionModel do pydantic-ai no lugar do Gemini: o "modelo" responde com a entrada
+do FAQ esperada se ela estiver no prompt de sistema, ou manda consultar o site caso contrário.
+Assim é possível medir a redução de tokens de entrada e a paridade das respostas.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_prompt_recuperacao
+"""
+from pydantic_ai.messages import ModelRequest, ModelResponse, SystemPromptPart, TextPart, UserPromptPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+from agent import PROMPT, PerfilUsuario, _criar_agente
+from benchmarks.avaliar_faq import CONJUNTO_TESTE
+from faq import extrair_entradas
+
+ENTRADAS = {e.numero: e for e in extrair_entradas(PROMPT)}
+ESPERADO = dict(CONJUNTO_TESTE)
+RESPOSTA_PADRAO = "Consulte https://www.puc-campinas.edu.br/"
+
+
+def normalizar_espacos(texto):
+    """O PROMPT tem espaços no fim das linhas que extrair_entradas remove; compara sem eles"""
+    return " ".join(texto.split())
+
+
+def criar_modelo(medicoes):
+    def responder(mensagens, info: AgentInfo) -> ModelResponse:
+        sistema, pergunta = [], ""
+        for mensagem in mensagens:
+            if isinstance(mensagem, ModelRequest):
+                for parte in mensagem.parts:
+                    if isinstance(parte, SystemPromptPart):
+                        sistema.append(parte.content)
+                    elif isinstance(parte, UserPromptPart):
+                        pergunta = parte.content
+        texto_sistema = "\n".join(sistema)
+        medicoes.append(len(texto_sistema) // 4)
+        esperado = ESPERADO.get(pergunta)
+        if esperado is not None and normalizar_espacos(ENTRADAS[esperado].resposta) in normalizar_espacos(texto_sistema):
+            return ModelResponse(parts=[TextPart(ENTRADAS[esperado].resposta)])
+        return ModelResponse(parts=[TextPart(RESPOSTA_PADRAO)])
+    return FunctionModel(responder)
+
+
+def executar(recuperacao):
+    medicoes, respostas, tokens_uso = [], [], []
+    agente = _criar_agente(modelo=criar_modelo(medicoes), recuperacao=recuperacao)
+    for pergunta, _ in CONJUNTO_TESTE:
+        resultado = agente.run_sync(pergunta, deps=PerfilUsuario(nome="Maria"))
+        respostas.append(resultado.data)
+        tokens_uso.append(resultado.usage().request_tokens or 0)
+    return medicoes, respostas, tokens_uso
+
+
+def main():
+    tokens_completo, respostas_completo, uso_completo = executar(recuperacao=False)
+    tokens_rag, respostas_rag, uso_rag = executar(recuperacao=True)
+
+    iguais = sum(a == b for a, b in zip(respostas_completo, respostas_rag))
+    media_completo = sum(tokens_completo) / len(tokens_completo)
+    media_rag = sum(tokens_rag) / len(tokens_rag)
+    print(f"Perguntas: {len(CONJUNTO_TESTE)}")
+    print(f"Tokens de sistema por pedido (~4 chars/token): completo={media_completo:.0f} "
+          f"recuperação={media_rag:.0f} redução={1 - media_rag / media_completo:.1%}")
+    print(f"Tokens de entrada (usage do pydantic-ai): completo={sum(uso_completo) / len(uso_completo):.0f} "
+          f"recuperação={sum(uso_rag) / len(uso_rag):.0f}")
+    print(f"Paridade das respostas: {iguais}/{len(CONJUNTO_TESTE)}")
+    positivas = sum(1 for _, esperado in CONJUNTO_TESTE if esperado is not None)
+    print(f"Perguntas do FAQ com a entrada certa no prompt: "
+          f"completo={sum(r != RESPOSTA_PADRAO for r in respostas_completo)}/{positivas} "
+          f"recuperação={sum(r != RESPOSTA_PADRAO for r in respostas_rag)}/{positivas}")
+    for (pergunta, _), a, b in zip(CONJUNTO_TESTE, respostas_completo, respostas_rag):
+        if a != b:
+            print(f"  divergente: {pergunta!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Custo do "Mostrar Grafo": renderização antiga (pyplot, grafo inteiro) x renderizador com cache.
+
+Para chats sintéticos de tamanhos crescentes mede tempo e pico de memória (tracemalloc) da
+renderização antiga, da primeira renderização limitada, do acerto de cache e da renderização
+semeada depois que o chat cresce; ao final mostra quantas figuras do pyplot ficaram abertas.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_render_grafo --mensagens 50 500 5000
+"""
+import argparse
+import io
+import time
+import tracemalloc
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import networkx as nx
+from coocorrencia import GrafoConversa
+from render_grafo import RenderizadorGrafo
+from benchmarks.bench_palavras_chave import gerar_historico
+
+
+def renderizar_antigo(estado):
+    """Como plotar_grafo_conversa desenhava antes: grafo inteiro, pyplot e figura nunca fechada"""
+    G = estado.para_networkx()
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+    pos = nx.spring_layout(G, k=1, iterations=50)
+    nx.draw(G, pos, ax=ax1, with_labels=True, node_color='lightblue',
+            node_size=[estado.frequencias[n] * 300 for n in G.nodes()], font_size=8,
+            font_weight='bold', edge_color='gray', width=[G[u][v]['weight'] * 0.5 for u, v in G.edges()])
+    palavras, frequencias = zip(*estado.frequencias.most_common(10))
+    ax2.barh(range(len(palavras)), frequencias, color='lightcoral')
+    plt.tight_layout()
+    fig.savefig(io.BytesIO(), format="png", dpi=100)
+
+
+def medir(funcao):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcao()
+    duracao = (time.perf_counter() - inicio) * 1000
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duracao, pico / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mensagens", type=int, nargs="+", default=[50, 500, 5000])
+    args = parser.parse_args()
+
+    textos = gerar_historico(max(args.mensagens) + 10)
+    renderizador = RenderizadorGrafo(medir_memoria=True)
+    print(f"{'mensagens':>9} | {'nós':>4} | {'antigo ms / KB':>16} | {'novo ms / KB':>14} | "
+          f"{'novo sem tracemalloc ms':>23} | {'cache ms':>8} | {'semeado ms':>10}")
+    for quantidade in args.mensagens:
+        estado = GrafoConversa().adicionar(textos[:quantidade])
+        antigo = medir(lambda: renderizar_antigo(estado))
+        primeira = renderizador.renderizar(estado, chave=f"chat{quantidade}")
+        sem_medicao = RenderizadorGrafo(medir_memoria=False).renderizar(estado)
+        inicio = time.perf_counter()
+        renderizador.renderizar(estado, chave=f"chat{quantidade}")
+        cache_ms = (time.perf_counter() - inicio) * 1000
+        # O chat cresce: layout parte das posições anteriores
+        estado.adicionar(textos[quantidade:quantidade + 10])
+        semeada = renderizador.renderizar(estado, chave=f"chat{quantidade}")
+        print(f"{quantidade:>9} | {len(estado.frequencias):>4} | {antigo[0]:>7.0f} / {antigo[1]:>6.0f} | "
+              f"{primeira.tempo_ms:>6.0f} / {primeira.memoria_pico_kb:>5.0f} | {sem_medicao.tempo_ms:>23.0f} | "
+              f"{cache_ms:>8.2f} | "
+              f"{semeada.tempo_ms:>10.0f}")
+    print(f"Figuras do pyplot abertas (só a renderização antiga cria): {len(plt.get_fignums())}")
+    print(f"Métricas do renderizador: {renderizador.metricas()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Custo por rerun do gerenciador: exec do arquivo da página x módulo importado uma vez.
+
+1. Sobrecarga pura do roteamento para cada página: ler o arquivo, compilar e executar o nível
+   de módulo (o que o exec fazia a cada rerun) x `from <módulo> import <página>` já importado.
+2. Rerun completo da página de login com streamlit.testing (AppTest), com o gerenciador antigo
+   (exec + load_dotenv a cada rerun, reproduzido num script temporário) e com o atual.
+
+A página do chat não entra no item 2 porque precisa do MongoDB e do modelo.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_roteador --repeticoes 50
+"""
+import argparse
+import importlib
+import os
+import statistics
+import tempfile
+import time
+
+PAGINAS = {"login": ("trabalho.py", "trabalho", "pagina_login"), "chat": ("chatUI.py", "chatUI", "pagina_chat")}
+
+GERENCIADOR_ANTIGO = '''
+import streamlit as st
+from dotenv import load_dotenv
+st.set_page_config(page_title="ChatBot PUC Campinas", page_icon="🎓", layout="wide")
+with open({arquivo!r}, "r", encoding="utf-8") as f:
+    exec(f.read())
+# O exec antigo rodava a interface no nível do módulo; aqui ela está na função da página
+load_dotenv()
+pagina_login()
+'''
+
+
+def mediana_ms(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def sobrecarga(repeticoes):
+    print(f"{'página':>6} | {'exec do arquivo (ms)':>20} | {'módulo importado (ms)':>21}")
+    for pagina, (arquivo, modulo, funcao) in PAGINAS.items():
+        importlib.import_module(modulo)
+
+        def executar_arquivo():
+            with open(arquivo, "r", encoding="utf-8") as f:
+                exec(compile(f.read(), arquivo, "exec"), {"__name__": "__exec__"})
+
+        def importar():
+            getattr(importlib.import_module(modulo), funcao)
+
+        print(f"{pagina:>6} | {mediana_ms(executar_arquivo, repeticoes):>20.2f} | "
+              f"{mediana_ms(importar, repeticoes):>21.4f}")
+
+
+def rerun_login(repeticoes):
+    from streamlit.testing.v1 import AppTest
+    with tempfile.NamedTemporaryFile("w", suffix=".py", dir=".", delete=False, encoding="utf-8") as f:
+        f.write(GERENCIADOR_ANTIGO.format(arquivo="trabalho.py"))
+        antigo = f.name
+    try:
+        for nome, script in (("antigo (exec)", antigo), ("atual (import)", "gerenciador.py")):
+            app = AppTest.from_file(script, default_timeout=60)
+            app.run()
+            if app.exception:
+                raise RuntimeError(app.exception)
+            print(f"Rerun da página de login, {nome}: {mediana_ms(app.run, repeticoes):.2f} ms (mediana)")
+    finally:
+        os.remove(antigo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args()
+    sobrecarga(args.repeticoes)
+    rerun_login(args.repeticoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Compara o snapshot comprimido do agente com a reconstrução a partir de historico_conversas.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_snapshots --turnos 10 50 200
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+import bson
+from memoria import montar_historico, separar_sistema, turnos_de_mensagens_chat
+from snapshots import desserializar_historico, serializar_historico
+
+PERGUNTA = "Qual é a frequência mínima exigida para aprovação nas disciplinas do curso {i}?"
+RESPOSTA = ("Olá! A frequência mínima obrigatória é de **75%** das aulas ministradas e/ou "
+            "atividades realizadas em cada disciplina. Caso tenha dúvidas, procure a CAA ({i}).")
+
+
+def documentos_sinteticos(turnos):
+    """Documentos no formato de historico_conversas"""
+    inicio = datetime(2025, 3, 1)
+    return [{
+        "_id": bson.ObjectId(),
+        "timestamp": inicio + timedelta(minutes=i),
+        "chatId": "abcd1234",
+        "userId": "665f00000000000000000000",
+        "userMessage": PERGUNTA.format(i=i),
+        "AiMessage": RESPOSTA.format(i=i),
+        "deleted": False,
+    } for i in range(turnos)]
+
+
+def reconstruir(documentos):
+    mensagens_chat = []
+    for doc in documentos:
+        mensagens_chat.append({"role": "user", "content": doc["userMessage"]})
+        mensagens_chat.append({"role": "assistant", "content": doc["AiMessage"]})
+    return montar_historico([], None, turnos_de_mensagens_chat(mensagens_chat))
+
+
+def medir(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turnos", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'turnos':>7} | {'docs BSON (KB)':>14} | {'snapshot (KB)':>13} | "
+          f"{'reconstrução (ms)':>17} | {'restauração (ms)':>16}")
+    for turnos in args.turnos:
+        documentos = documentos_sinteticos(turnos)
+        tamanho_docs = sum(len(bson.encode(doc)) for doc in documentos)
+        mensagens = reconstruir(documentos)
+        _, turnos_agente = separar_sistema(mensagens)
+        snapshot = serializar_historico([m for t in turnos_agente for m in t], None)
+
+        # A reconstrução real ainda paga a leitura de `turnos` documentos no Mongo;
+        # o snapshot é uma única leitura por chave.
+        t_reconstrucao = medir(lambda: reconstruir(documentos), args.repeticoes)
+        t_restauracao = medir(lambda: desserializar_historico(snapshot), args.repeticoes)
+        print(f"{turnos:>7} | {tamanho_docs / 1024:>14.1f} | {len(snapshot) / 1024:>13.1f} | "
+              f"{t_reconstrucao:>17.3f} | {t_restauracao:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
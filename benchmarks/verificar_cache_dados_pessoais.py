@@ -0,0 +1,64 @@
+"""Confere que o cache de respostas nunca entrega a um aluno o nome ou o RA de outro.
+
+Simula alunos do mesmo tipo e curso (mesma chave de cache) fazendo as mesmas perguntas no
+primeiro turno, com um "modelo" que responde como o Gemini faria com as informações do usuário
+no prompt: perguntas sobre os dados pessoais citam nome e RA (em formatos variados), as demais
+são genéricas. Cada resposta é guardada como no agente (CacheRespostas.guardar) e, para os
+alunos seguintes, conferida contra os dados de todos os outros. Sai com código 1 se houver
+vazamento ou se as respostas genéricas deixarem de ser reaproveitadas.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.verificar_cache_dados_pessoais --alunos 50
+"""
+import argparse
+import re
+import sys
+from cache_respostas import CacheRespostas
+
+CURSO = "Ciência da Computação"
+PERGUNTAS_PESSOAIS = ["qual é meu RA?", "quais são meus dados?", "me lembra do meu número de matrícula"]
+PERGUNTAS_GERAIS = ["qual a frequência mínima para aprovação?", "como falo com a CAA?"]
+
+
+def responder(pergunta, nome, ra, variante):
+    """Resposta no estilo do modelo, com o perfil do usuário que está no prompt"""
+    if pergunta in PERGUNTAS_PESSOAIS:
+        formatos = [ra, f"{ra[:4]}.{ra[4:]}", f"{ra[:4]}-{ra[4:]}", " ".join(ra)]
+        return f"Olá, {nome.split()[0]}! Seu RA é {formatos[variante % len(formatos)]}, curso {CURSO}."
+    return f"Olá, {nome.split()[0]}! A frequência mínima é de 75% e a CAA atende pelo portal."
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alunos", type=int, default=50)
+    args = parser.parse_args()
+
+    cache = CacheRespostas(versao="verificacao", usar_mongo=False)
+    alunos = [(f"Aluna{chr(65 + i % 26)}{i} Teste", f"{20240000 + 7 * i:08d}") for i in range(args.alunos)]
+    vazamentos, acertos_gerais = [], 0
+    for i, (nome, ra) in enumerate(alunos):
+        outros = [(n, r) for n, r in alunos if r != ra]
+        for pergunta in PERGUNTAS_PESSOAIS + PERGUNTAS_GERAIS:
+            resposta = cache.buscar(pergunta, "estudante", CURSO, nome)
+            if resposta is None:
+                resposta = responder(pergunta, nome, ra, i)
+                cache.guardar(pergunta, "estudante", CURSO, resposta, nome=nome, ra=ra)
+            elif pergunta in PERGUNTAS_GERAIS:
+                acertos_gerais += 1
+            for outro_nome, outro_ra in outros:
+                if outro_ra in re.sub(r"[.\-\s]", "", resposta) \
+                        or re.search(rf"\b{re.escape(outro_nome.split()[0])}\b", resposta):
+                    vazamentos.append((nome, pergunta, resposta))
+
+    metricas = cache.metricas()
+    esperados_gerais = (args.alunos - 1) * len(PERGUNTAS_GERAIS)
+    print(f"{args.alunos} alunos, {len(PERGUNTAS_PESSOAIS + PERGUNTAS_GERAIS)} perguntas cada")
+    print(f"Respostas com RA recusadas pelo cache: {metricas['recusadas_dados_pessoais']}")
+    print(f"Perguntas gerais atendidas pelo cache: {acertos_gerais}/{esperados_gerais}")
+    for nome, pergunta, resposta in vazamentos[:10]:
+        print(f"VAZAMENTO para {nome} em {pergunta!r}: {resposta}")
+    sys.exit(1 if vazamentos or acertos_gerais < esperados_gerais else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# busca_historico.py - Busca textual no histórico de conversas do usuário (índice de texto do MongoDB)
+import argparse
+import os
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from texto import PADRAO_PALAVRA, normalizar, radical, tokenizar
+
+LIMITE_RESULTADOS = int(os.getenv("BUSCA_LIMITE") or 20)
+TAMANHO_TRECHO = int(os.getenv("BUSCA_TAMANHO_TRECHO") or 160)
+
+ROTULOS = {"userMessage": "Você", "AiMessage": "Assistente"}
+ERRO_INDICE_AUSENTE = 27  # IndexNotFound: $text sem o índice "busca_texto"
+
+
+@dataclass(frozen=True)
+class ResultadoBusca:
+    """Um turno encontrado: de qual chat, quando e o trecho com os termos em negrito"""
+    chat_id: str
+    timestamp: datetime
+    campo: str  # "userMessage" ou "AiMessage": de onde saiu o trecho
+    trecho: str
+    pontuacao: float
+    titulo: Optional[str] = None
+
+
+def extrair_trecho(texto, termos, tamanho=TAMANHO_TRECHO):
+    """
+    Escolhe a janela de até `tamanho` caracteres com mais termos distintos da consulta.
+
+    Os termos são comparados como em texto.tokenizar (sem acentos e radicalizados), então
+    "matrícula" na consulta destaca "matriculas" no texto.
+
+    Returns:
+        tuple: (trecho com os termos em **negrito**, termos distintos encontrados)
+    """
+    ocorrencias = [
+        (m.start(), m.end(), termo)
+        for m in PADRAO_PALAVRA.finditer(texto)
+        if (termo := radical(normalizar(m.group()))) in termos
+    ]
+    if not ocorrencias:
+        corte = texto[:tamanho]
+        return corte.replace("\n", " ") + ("…" if len(texto) > tamanho else ""), 0
+
+    # Janela deslizante sobre as ocorrências: mais termos distintos, depois mais ocorrências
+    contagem = Counter()
+    direita = 0
+    melhor = (0, 0, 0, 1)
+    for esquerda, (inicio, _, _) in enumerate(ocorrencias):
+        while direita < len(ocorrencias) and (
+            direita == esquerda or ocorrencias[direita][1] - inicio <= tamanho
+        ):
+            contagem[ocorrencias[direita][2]] += 1
+            direita += 1
+        candidato = (len(contagem), direita - esquerda, esquerda, direita)
+        if candidato[:2] > melhor[:2]:
+            melhor = candidato
+        termo = ocorrencias[esquerda][2]
+        contagem[termo] -= 1
+        if not contagem[termo]:
+            del contagem[termo]
+
+    distintos, _, esquerda, direita = melhor
+    primeira, ultima = ocorrencias[esquerda][0], ocorrencias[direita - 1][1]
+    folga = max(tamanho - (ultima - primeira), 0) // 2
+    inicio = max(primeira - folga, 0)
+    fim = min(ultima + folga, len(texto))
+    # Não corta palavras nas bordas
+    if inicio > 0:
+        espaco = texto.find(" ", inicio, primeira)
+        inicio = espaco + 1 if espaco != -1 else inicio
+    if fim < len(texto):
+        espaco = texto.rfind(" ", ultima, fim)
+        fim = espaco if espaco != -1 else fim
+
+    partes = ["…"] if inicio > 0 else []
+    posicao = inicio
+    for comeco, final, _ in ocorrencias:
+        if comeco >= inicio and final <= fim:
+            partes.append(texto[posicao:comeco])
+            partes.append(f"**{texto[comeco:final]}**")
+            posicao = final
+    partes.append(texto[posicao:fim])
+    if fim < len(texto):
+        partes.append("…")
+    return "".join(partes).replace("\n", " "), distintos
+
+
+def montar_resultado(turno, termos, titulo=None):
+    """Trecho do campo com mais termos da consulta (empate: a resposta do assistente)"""
+    trecho_ia, achados_ia = extrair_trecho(turno.get("AiMessage", ""), termos)
+    trecho_usuario, achados_usuario = extrair_trecho(turno.get("userMessage", ""), termos)
+    campo, trecho = ("userMessage", trecho_usuario) if achados_usuario > achados_ia else ("AiMessage", trecho_ia)
+    return ResultadoBusca(
+        chat_id=turno["chatId"],
+        timestamp=turno["timestamp"],
+        campo=campo,
+        trecho=trecho,
+        pontuacao=turno.get("pontuacao", 0.0),
+        titulo=titulo,
+    )
+
+
+def buscar_historico(user_id, consulta, limite=LIMITE_RESULTADOS, db=None):
+    """
+    Busca nos turnos do usuário (pergunta e resposta), do mais relevante ao menos relevante.
+
+    Usa o índice de texto "busca_texto" (banco.INDICES), que começa por userId: a consulta só
+    percorre as entradas do próprio usuário, e o custo não cresce com o histórico dos outros.
+    Acentos e plurais são tratados pelo índice em português ("matricula" acha "matrículas").
+
+    Returns:
+        list[ResultadoBusca]
+    """
+    consulta = (consulta or "").strip()
+    if not consulta:
+        return []
+    from pymongo.errors import OperationFailure
+    if db is None:
+        from banco import conectar_mongodb
+        db = conectar_mongodb()
+
+    filtro = {"userId": user_id, "deleted": False, "$text": {"$search": consulta}}
+    # Chats apagados antes de "python banco.py migrar" podem ter turnos sem a marca
+    apagados = db["chats"].distinct("_id", {"userId": user_id, "deleted": True})
+    if apagados:
+        filtro["chatId"] = {"$nin": apagados}
+
+    try:
+        turnos = list(db["historico_conversas"].find(
+            filtro,
+            {"_id": 0, "chatId": 1, "timestamp": 1, "userMessage": 1, "AiMessage": 1,
+             "pontuacao": {"$meta": "textScore"}}
+        ).sort([("pontuacao", {"$meta": "textScore"}), ("timestamp", -1)]).limit(limite))
+    except OperationFailure as e:
+        if e.code == ERRO_INDICE_AUSENTE:
+            raise RuntimeError("Índice de busca ainda não criado; execute python banco.py migrar") from e
+        raise
+    if not turnos:
+        return []
+
+    titulos = {
+        chat["_id"]: chat.get("titulo")
+        for chat in db["chats"].find(
+            {"_id": {"$in": list({t["chatId"] for t in turnos})}, "userId": user_id}, {"titulo": 1}
+        )
+    }
+    termos = set(tokenizar(consulta))
+    return [montar_resultado(turno, termos, titulos.get(turno["chatId"])) for turno in turnos]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Busca no histórico de conversas de um usuário")
+    parser.add_argument("user_id", help="id do usuário (como gravado em historico_conversas.userId)")
+    parser.add_argument("consulta", help='termos da busca; aceita "frase exata" e -exclusão')
+    parser.add_argument("--limite", type=int, default=LIMITE_RESULTADOS)
+    args = parser.parse_args()
+
+    resultados = buscar_historico(args.user_id, args.consulta, args.limite)
+    for resultado in resultados:
+        print(f"[{resultado.pontuacao:.2f}] chat {resultado.chat_id} "
+              f"({resultado.titulo or 'sem título'}) {resultado.timestamp:%d/%m/%Y %H:%M}")
+        print(f"    {ROTULOS[resultado.campo]}: {resultado.trecho}")
+    if not resultados:
+        print("Nenhum resultado.")
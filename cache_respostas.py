@@ -0,0 +1,194 @@
+# cache_respostas.py - Cache de respostas para perguntas repetidas (LRU em memória + MongoDB opcional)
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+from banco import conectar_mongodb
+from texto import normalizar
+
+CACHE_ATIVO = os.getenv("CACHE_ATIVO", "1") != "0"
+CACHE_CAPACIDADE = int(os.getenv("CACHE_CAPACIDADE") or 1000)
+CACHE_TTL_S = float(os.getenv("CACHE_TTL_S") or 3600)
+# Camada compartilhada entre processos (coleção "cache_respostas")
+CACHE_MONGO = os.getenv("CACHE_MONGO", "0") == "1"
+
+MARCADOR_NOME = "⟨nome⟩"
+
+# Palavras que indicam que a pergunta depende do contexto anterior
+PALAVRAS_DE_CONTEXTO = {
+    "isso", "disso", "nisso", "esse", "essa", "esses", "essas", "ele", "ela", "eles", "elas",
+    "dele", "dela", "aquilo", "anterior", "acima", "tambem", "entao", "mesmo",
+}
+
+
+def normalizar_pergunta(pergunta: str) -> str:
+    """Forma canônica da pergunta: sem acentos, pontuação e espaços repetidos"""
+    return " ".join(re.sub(r"[^\w\s]", " ", normalizar(pergunta)).split())
+
+
+def pergunta_independente(pergunta: str) -> bool:
+    """Heurística: a pergunta faz sentido sem o histórico da conversa"""
+    palavras = normalizar_pergunta(pergunta).split()
+    if len(palavras) < 3 or palavras[0] in ("e", "mas"):
+        return False
+    return not PALAVRAS_DE_CONTEXTO.intersection(palavras)
+
+
+def versao_prompt(*partes: str) -> str:
+    """Hash curto do prompt e do modelo; muda sempre que o PROMPT muda"""
+    return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()[:16]
+
+
+def _despersonalizar(resposta: str, nome: Optional[str]) -> str:
+    """Troca o nome do usuário por um marcador para a resposta servir a outros usuários"""
+    if not nome or nome == "Usuário":
+        return resposta
+    for parte in sorted({nome, *nome.split()}, key=len, reverse=True):
+        if len(parte) > 2:
+            resposta = re.sub(rf"\b{re.escape(parte)}\b", MARCADOR_NOME, resposta)
+    # Nome completo vira um só marcador
+    return re.sub(rf"{MARCADOR_NOME}(\s+{MARCADOR_NOME})+", MARCADOR_NOME, resposta)
+
+
+def contem_ra(resposta: str, ra: Optional[str]) -> bool:
+    """A resposta cita o RA do usuário (também com pontos, traços ou espaços entre os dígitos)"""
+    if not ra or ra == "Não informado":
+        return False
+    if ra in resposta:
+        return True
+    digitos = re.sub(r"\D", "", ra)
+    return len(digitos) >= 4 and re.search(r"[.\-/\s]?".join(digitos), resposta) is not None
+
+
+def _personalizar(resposta: str, nome: Optional[str]) -> str:
+    """Coloca o primeiro nome do usuário no lugar do marcador"""
+    if not nome or nome == "Usuário":
+        return re.sub(rf",?\s*{MARCADOR_NOME}", "", resposta)
+    return resposta.replace(MARCADOR_NOME, nome.split()[0])
+
+
+class CacheRespostas:
+    """Cache de respostas por (pergunta normalizada, tipo de usuário, curso, versão do prompt)"""
+
+    def __init__(self, versao: str, capacidade=CACHE_CAPACIDADE, ttl_s=CACHE_TTL_S, usar_mongo=CACHE_MONGO):
+        self.versao = versao
+        self.capacidade = capacidade
+        self.ttl_s = ttl_s
+        self.usar_mongo = usar_mongo
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self._metricas = {
+            "consultas": 0,
+            "acertos_memoria": 0,
+            "acertos_mongo": 0,
+            "gravacoes": 0,
+            "recusadas_dados_pessoais": 0,
+            "tempo_modelo_total_s": 0.0,
+            "tempo_acerto_total_s": 0.0,
+        }
+
+    def chave(self, pergunta: str, tipo_usuario: str, curso: Optional[str]) -> str:
+        partes = [normalizar_pergunta(pergunta), tipo_usuario or "", curso or "", self.versao]
+        return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+    def _colecao(self):
+        return conectar_mongodb()["cache_respostas"]
+
+    def buscar(self, pergunta, tipo_usuario, curso, nome=None) -> Optional[str]:
+        """Resposta em cache já personalizada para o usuário, ou None"""
+        inicio = time.perf_counter()
+        chave = self.chave(pergunta, tipo_usuario, curso)
+        resposta, origem = None, None
+        with self._lock:
+            self._metricas["consultas"] += 1
+            item = self._itens.get(chave)
+            if item is not None:
+                if item[1] > time.monotonic():
+                    self._itens.move_to_end(chave)
+                    resposta, origem = item[0], "acertos_memoria"
+                else:
+                    del self._itens[chave]
+
+        if resposta is None and self.usar_mongo:
+            try:
+                documento = self._colecao().find_one(
+                    {"_id": chave, "versao": self.versao, "expira_em": {"$gt": datetime.utcnow()}},
+                    {"resposta": 1}
+                )
+            except Exception as e:
+                print(f"Aviso: cache compartilhado indisponível: {str(e)}")
+                documento = None
+            if documento:
+                resposta, origem = documento["resposta"], "acertos_mongo"
+                self._guardar_local(chave, resposta)
+
+        if resposta is None:
+            return None
+        with self._lock:
+            self._metricas[origem] += 1
+            self._metricas["tempo_acerto_total_s"] += time.perf_counter() - inicio
+        return _personalizar(resposta, nome)
+
+    def _guardar_local(self, chave, resposta):
+        with self._lock:
+            self._itens[chave] = (resposta, time.monotonic() + self.ttl_s)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+
+    def guardar(self, pergunta, tipo_usuario, curso, resposta, nome=None, ra=None, tempo_modelo_s=0.0):
+        """
+        Guarda a resposta gerada pelo modelo (sem o nome do usuário).
+
+        O RA está no prompt mas não na chave: resposta que o cita ("qual é meu RA?") não é
+        guardada, para não ser servida a outro aluno do mesmo curso. Retorna se guardou.
+        """
+        if contem_ra(resposta, ra):
+            with self._lock:
+                self._metricas["recusadas_dados_pessoais"] += 1
+            return False
+        chave = self.chave(pergunta, tipo_usuario, curso)
+        resposta = _despersonalizar(resposta, nome)
+        self._guardar_local(chave, resposta)
+        with self._lock:
+            self._metricas["gravacoes"] += 1
+            self._metricas["tempo_modelo_total_s"] += tempo_modelo_s
+        if self.usar_mongo:
+            agora = datetime.utcnow()
+            try:
+                self._colecao().replace_one(
+                    {"_id": chave},
+                    {
+                        "resposta": resposta,
+                        "versao": self.versao,
+                        "criado_em": agora,
+                        "expira_em": agora + timedelta(seconds=self.ttl_s),
+                    },
+                    upsert=True
+                )
+            except Exception as e:
+                print(f"Aviso: não foi possível gravar no cache compartilhado: {str(e)}")
+        return True
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def metricas(self):
+        """Taxa de acerto e tempo economizado (tempo médio do modelo x tempo do acerto)"""
+        with self._lock:
+            metricas = dict(self._metricas)
+        acertos = metricas["acertos_memoria"] + metricas["acertos_mongo"]
+        tempo_modelo_medio = (
+            metricas["tempo_modelo_total_s"] / metricas["gravacoes"] if metricas["gravacoes"] else 0.0
+        )
+        metricas["taxa_acerto"] = acertos / metricas["consultas"] if metricas["consultas"] else 0.0
+        metricas["tempo_economizado_s"] = max(
+            acertos * tempo_modelo_medio - metricas["tempo_acerto_total_s"], 0.0
+        )
+        metricas["itens_em_memoria"] = len(self._itens)
+        return metricas
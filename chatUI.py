@@ -1,30 +1,19 @@
 import streamlit as st
 from dotenv import load_dotenv
-import os
 import uuid
 from datetime import datetime
-import pymongo
-import asyncio
-from agent import ConversaComMemoria, setup_agent  # Importar a nova classe e função
-from grafos import plotar_grafo_conversa, obter_estatisticas_conversa  # Importar funções do grafo
+from banco import conectar_mongodb
+from persistencia import obter_fila
+from snapshots import carregar_snapshot, salvar_snapshot
+from coocorrencia import GrafoConversa
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
-url_mongo = os.getenv("MONGO_URL")
-
-# Configuração da conexão com MongoDB
-def conectar_mongodb():
-    client = pymongo.MongoClient(url_mongo)
-    db = client["chatbot_puc"]
-    return db
-
 # Função para salvar mensagem no histórico
 def salvar_mensagem_historico(chat_id, user_id, user_message, ai_message):
+    """Enfileira o turno para gravação em segundo plano (ver persistencia.py)"""
     try:
-        db = conectar_mongodb()
-        colecao_historico = db["historico_conversas"]
-        
         documento_historico = {
             "timestamp": datetime.utcnow(),
             "chatId": chat_id,
@@ -34,336 +23,619 @@ def salvar_mensagem_historico(chat_id, user_id, user_message, ai_message):
             "deleted": False
         }
         
-        resultado = colecao_historico.insert_one(documento_historico)
-        return True, str(resultado.inserted_id)
+        turno_id = obter_fila().enfileirar(documento_historico)
+        return True, str(turno_id)
     except Exception as e:
         st.error(f"Erro ao salvar histórico: {str(e)}")
         return False, str(e)
 
-# Função para carregar histórico de chats do usuário
-def carregar_chats_usuario(user_id):
+# Tamanho das páginas de carregamento (chats na sidebar e turnos por chat)
+PAGINA_CHATS = 20
+PAGINA_MENSAGENS = 20
+# Ao abrir um resultado da busca, carrega no máximo esta quantidade de turnos
+MAX_TURNOS_RESULTADO = 200
+
+# Função para carregar os resumos dos chats do usuário (sem mensagens)
+def carregar_resumos_chats(user_id, cursor=None, limite=PAGINA_CHATS):
+    """
+    Carrega uma página de chats da coleção "chats", do mais recente ao mais antigo.
+
+    Args:
+        user_id: id do usuário logado
+        cursor: tupla (updated_at, chat_id) do último chat da página anterior
+        limite: quantidade de chats por página
+
+    Returns:
+        tuple: (dict de chats sem mensagens, cursor da próxima página ou None)
+    """
     try:
         db = conectar_mongodb()
-        colecao_historico = db["historico_conversas"]
+        colecao_chats = db["chats"]
         
-        # Buscar todas as conversas do usuário que não foram deletadas
-        conversas = colecao_historico.find({
-            "userId": user_id,
-            "$or": [
-                {"deleted": {"$exists": False}},
-                {"deleted": False}
+        filtro = {"userId": user_id, "deleted": False}
+        # Paginação por cursor: continua depois do último chat já exibido
+        if cursor:
+            ultima_atividade, ultimo_chat_id = cursor
+            filtro["$or"] = [
+                {"updated_at": {"$lt": ultima_atividade}},
+                {"updated_at": ultima_atividade, "_id": {"$lt": ultimo_chat_id}}
             ]
-        }).sort("timestamp", 1)
         
-        chats_recuperados = {}
+        resumos = list(colecao_chats.find(filtro).sort(
+            [("updated_at", -1), ("_id", -1)]
+        ).limit(limite + 1))
         
-        for conversa in conversas:
-            chat_id = conversa["chatId"]
-            
-            # Se o chat ainda não existe, criar estrutura
-            if chat_id not in chats_recuperados:
-                chats_recuperados[chat_id] = {
-                    "id": chat_id,
-                    "name": f"Chat {len(chats_recuperados) + 1}",
-                    "messages": [],
-                    "created_at": conversa["timestamp"].strftime("%d/%m/%Y %H:%M")
-                }
-            
-            # Adicionar mensagens na ordem cronológica
-            chat_messages = chats_recuperados[chat_id]["messages"]
-            
-            # Adicionar mensagem do usuário
-            chat_messages.append({
-                "role": "user", 
-                "content": conversa["userMessage"]
-            })
-            
-            # Adicionar resposta da IA
-            chat_messages.append({
-                "role": "assistant", 
-                "content": conversa["AiMessage"]
-            })
+        proximo_cursor = None
+        if len(resumos) > limite:
+            resumos = resumos[:limite]
+            proximo_cursor = (resumos[-1]["updated_at"], resumos[-1]["_id"])
         
-        # Renomear chats baseado no primeiro título de cada conversa
-        for i, (chat_id, chat_data) in enumerate(chats_recuperados.items()):
-            if chat_data["messages"]:
-                # Usar primeiras palavras da primeira mensagem como nome
-                primeira_mensagem = chat_data["messages"][0]["content"]
-                nome_chat = primeira_mensagem[:30] + "..." if len(primeira_mensagem) > 30 else primeira_mensagem
-                chat_data["name"] = nome_chat
-            else:
-                chat_data["name"] = f"Chat {i + 1}"
+        chats_recuperados = {}
+        for resumo in resumos:
+            chats_recuperados[resumo["_id"]] = resumo_para_sessao(resumo, len(chats_recuperados) + 1)
         
-        return chats_recuperados
+        return chats_recuperados, proximo_cursor
         
     except Exception as e:
         st.error(f"Erro ao carregar histórico: {str(e)}")
-        return {}
+        return {}, None
+
+# Documento da coleção "chats" no formato usado em st.session_state.chats (sem mensagens)
+def resumo_para_sessao(resumo, posicao):
+    return {
+        "id": resumo["_id"],
+        "name": resumo.get("titulo") or f"Chat {posicao}",
+        "messages": [],
+        "created_at": resumo["created_at"].strftime("%d/%m/%Y %H:%M"),
+        "ultima_atividade": resumo["updated_at"],
+        "turnos": resumo.get("turnos", 0),
+        "carregado": False,
+        "cursor_mensagens": None,
+        "tem_mais_mensagens": False
+    }
+
+# Função para carregar uma página de mensagens de um chat
+def carregar_mensagens_chat(chat_id, user_id, antes_de=None, limite=PAGINA_MENSAGENS):
+    """
+    Carrega os turnos mais recentes de um chat anteriores a `antes_de`.
+
+    Returns:
+        tuple: (mensagens em ordem cronológica, timestamp do turno mais antigo, há mais turnos)
+    """
+    try:
+        # Na página mais recente entram também os turnos ainda na fila de gravação
+        # (lidos antes do banco; deduplicados pelo _id, como em construir_grafo_chat)
+        pendentes = []
+        if antes_de is None:
+            pendentes = sorted(obter_fila().pendentes(chat_id, user_id), key=lambda t: t["timestamp"])
+        db = conectar_mongodb()
+        colecao_historico = db["historico_conversas"]
+        
+        filtro = {"chatId": chat_id, "userId": user_id, "deleted": False}
+        if antes_de is not None:
+            filtro["timestamp"] = {"$lt": antes_de}
+        
+        turnos = list(colecao_historico.find(
+            filtro,
+            {"_id": 1, "timestamp": 1, "userMessage": 1, "AiMessage": 1}
+        ).sort("timestamp", -1).limit(limite + 1))
+        
+        tem_mais = len(turnos) > limite
+        turnos = turnos[:limite]
+        turnos.reverse()
+        gravados = {turno["_id"] for turno in turnos}
+        turnos += [turno for turno in pendentes if turno["_id"] not in gravados]
+        
+        mensagens = []
+        for turno in turnos:
+            mensagens.append({"role": "user", "content": turno["userMessage"]})
+            mensagens.append({"role": "assistant", "content": turno["AiMessage"]})
+        
+        cursor = turnos[0]["timestamp"] if turnos else antes_de
+        return mensagens, cursor, tem_mais
+        
+    except Exception as e:
+        st.error(f"Erro ao carregar mensagens: {str(e)}")
+        return [], antes_de, False
+
+# Estado do grafo de palavras-chave a partir de todos os turnos do chat (só para chats sem estado salvo)
+def construir_grafo_chat(chat_id, user_id):
+    estado = GrafoConversa()
+    try:
+        # Turnos ainda na fila de gravação (lidos antes do banco; deduplicados pelo _id)
+        pendentes = sorted(obter_fila().pendentes(chat_id, user_id), key=lambda t: t["timestamp"])
+        db = conectar_mongodb()
+        turnos = db["historico_conversas"].find(
+            {"chatId": chat_id, "userId": user_id, "deleted": False},
+            {"_id": 1, "userMessage": 1, "AiMessage": 1}
+        ).sort("timestamp", 1).batch_size(500)
+        gravados = set()
+        for turno in turnos:
+            gravados.add(turno["_id"])
+            estado.adicionar([turno.get("userMessage", ""), turno.get("AiMessage", "")])
+        for turno in pendentes:
+            if turno["_id"] not in gravados:
+                estado.adicionar([turno.get("userMessage", ""), turno.get("AiMessage", "")])
+    except Exception as e:
+        st.error(f"Erro ao carregar o grafo da conversa: {str(e)}")
+    return estado
+
+# Estado incremental do grafo do chat (criado uma vez e atualizado a cada turno)
+def grafo_do_chat(chat_id):
+    chat = st.session_state.chats[chat_id]
+    if chat.get("grafo") is None:
+        user_id = st.session_state.usuario_logado.id
+        chat["grafo"] = construir_grafo_chat(chat_id, user_id)
+    return chat["grafo"]
+
+# Carrega a primeira página de mensagens quando o chat é aberto
+def abrir_chat(chat_id):
+    chat = st.session_state.chats.get(chat_id)
+    if not chat or chat.get("carregado", True):
+        return
+    user_id = st.session_state.usuario_logado.id
+    mensagens, cursor, tem_mais = carregar_mensagens_chat(chat_id, user_id)
+    chat["messages"] = mensagens
+    chat["cursor_mensagens"] = cursor
+    chat["tem_mais_mensagens"] = tem_mais
+    chat["carregado"] = True
+
+# O turno de `timestamp` já está entre as mensagens exibidas do chat?
+def turno_na_tela(chat, timestamp):
+    if not chat.get("carregado"):
+        return False
+    cursor = chat.get("cursor_mensagens")
+    return not chat.get("tem_mais_mensagens") or cursor is None or timestamp >= cursor
+
+# Abre o chat de um resultado da busca, carregando só esse chat até o turno encontrado
+def abrir_resultado_busca(chat_id, timestamp):
+    user_id = st.session_state.usuario_logado.id
+    chat = st.session_state.chats.get(chat_id)
+    if chat is not None and turno_na_tela(chat, timestamp):
+        st.session_state.current_chat_id = chat_id
+        return True
+    try:
+        db = conectar_mongodb()
+        if chat_id not in st.session_state.chats:
+            # Chat fora das páginas já exibidas na sidebar
+            resumo = db["chats"].find_one({"_id": chat_id, "userId": user_id, "deleted": False})
+            if not resumo:
+                st.error("Conversa não encontrada.")
+                return False
+            st.session_state.chats[chat_id] = resumo_para_sessao(resumo, len(st.session_state.chats) + 1)
+        # Turnos do encontrado até o mais recente, para a página começar nele
+        posteriores = db["historico_conversas"].count_documents(
+            {"chatId": chat_id, "userId": user_id, "deleted": False, "timestamp": {"$gte": timestamp}}
+        )
+    except Exception as e:
+        st.error(f"Erro ao abrir a conversa: {str(e)}")
+        return False
+    chat = st.session_state.chats[chat_id]
+    limite = min(max(posteriores, PAGINA_MENSAGENS), MAX_TURNOS_RESULTADO)
+    mensagens, cursor, tem_mais = carregar_mensagens_chat(chat_id, user_id, limite=limite)
+    chat["messages"] = mensagens
+    chat["cursor_mensagens"] = cursor
+    chat["tem_mais_mensagens"] = tem_mais
+    chat["carregado"] = True
+    st.session_state.current_chat_id = chat_id
+    return True
+
+# Resultados da busca guardados na sessão: o banco só é consultado quando a consulta muda,
+# não a cada rerun (mensagem enviada, clique na sidebar, "Mostrar Grafo")
+def resultados_da_busca(user_id, consulta):
+    chave = (user_id, consulta)
+    guardado = st.session_state.get("resultados_busca")
+    if guardado is None or guardado[0] != chave:
+        from busca_historico import buscar_historico
+        try:
+            guardado = (chave, buscar_historico(user_id, consulta), None)
+        except Exception as e:
+            guardado = (chave, [], str(e))
+        st.session_state.resultados_busca = guardado
+    return guardado[1], guardado[2]
+
+# Carrega os turnos anteriores ao mais antigo já exibido
+def carregar_mensagens_anteriores(chat_id):
+    chat = st.session_state.chats[chat_id]
+    user_id = st.session_state.usuario_logado.id
+    mensagens, cursor, tem_mais = carregar_mensagens_chat(
+        chat_id, user_id, antes_de=chat["cursor_mensagens"]
+    )
+    chat["messages"] = mensagens + chat["messages"]
+    chat["cursor_mensagens"] = cursor
+    chat["tem_mais_mensagens"] = tem_mais
+
+# Carrega a próxima página de resumos na sidebar
+def carregar_mais_chats():
+    user_id = st.session_state.usuario_logado.id
+    novos_chats, cursor = carregar_resumos_chats(user_id, cursor=st.session_state.cursor_chats)
+    for chat_id, chat_data in novos_chats.items():
+        st.session_state.chats.setdefault(chat_id, chat_data)
+    st.session_state.cursor_chats = cursor
 
 # Função para criar novo chat
 def create_new_chat():
-    chat_id = str(uuid.uuid4())[:8]
+    # uuid completo: o id do chat é o _id global das coleções "chats" e "snapshots_agente"
+    chat_id = str(uuid.uuid4())
     chat_name = f"Chat {len(st.session_state.chats) + 1}"
     new_chat = {
         "id": chat_id,
         "name": chat_name,
         "messages": [],
-        "created_at": datetime.now().strftime("%d/%m/%Y %H:%M")
+        "created_at": datetime.now().strftime("%d/%m/%Y %H:%M"),
+        "carregado": True,
+        "cursor_mensagens": None,
+        "tem_mais_mensagens": False,
+        "grafo": GrafoConversa()
     }
-    st.session_state.chats[chat_id] = new_chat
+    # Novo chat aparece no topo da sidebar (mais recente primeiro)
+    st.session_state.chats = {chat_id: new_chat, **st.session_state.chats}
     st.session_state.current_chat_id = chat_id
     
     # Limpar histórico do bot para novo chat
     if "conversa_bot" in st.session_state:
         st.session_state.conversa_bot.limpar_historico()
+    st.session_state.chat_do_bot = chat_id
     
     return chat_id
 
+# O agente (pydantic-ai, logfire) só é carregado quando o usuário envia a primeira mensagem
+def obter_bot():
+    if "conversa_bot" not in st.session_state:
+        from agent import setup_agent
+        st.session_state.conversa_bot = setup_agent(st.session_state.usuario_logado)
+    return st.session_state.conversa_bot
+
+# Grava o turno, atualiza o grafo só com ele e salva o snapshot (resposta ou mensagem de erro)
+def registrar_turno(bot, chat_id, prompt, resposta):
+    user_id = st.session_state.usuario_logado.id
+    grafo = grafo_do_chat(chat_id)
+    grafo.adicionar([prompt, resposta])
+    
+    sucesso, _ = salvar_mensagem_historico(
+        chat_id=chat_id,
+        user_id=user_id,
+        user_message=prompt,
+        ai_message=resposta
+    )
+    
+    # Snapshot do contexto do agente (e do grafo) para retomar este chat depois
+    try:
+        mensagens_agente, resumo = bot.exportar_snapshot()
+        salvar_snapshot(chat_id, user_id, mensagens_agente, resumo, grafo=grafo.para_dict())
+    except Exception as e:
+        st.warning(f"Não foi possível salvar o contexto da conversa: {str(e)}")
+    return sucesso
+
+# Restaura o contexto do agente para o chat aberto
+def retomar_contexto_chat(chat_id):
+    bot = obter_bot()
+    user_id = st.session_state.usuario_logado.id
+    try:
+        snapshot = carregar_snapshot(chat_id, user_id)
+    except Exception as e:
+        st.warning(f"Não foi possível restaurar o contexto da conversa: {str(e)}")
+        snapshot = None
+    
+    if snapshot:
+        mensagens, resumo, grafo = snapshot
+        bot.restaurar_historico(mensagens, resumo)
+        chat = st.session_state.chats.get(chat_id)
+        if chat is not None and chat.get("grafo") is None:
+            chat["grafo"] = GrafoConversa.de_dict(grafo)
+    else:
+        # Sem snapshot (chats antigos): usa as mensagens já carregadas na tela
+        chat = st.session_state.chats.get(chat_id, {})
+        bot.restaurar_de_mensagens(chat.get("messages", []))
+    st.session_state.chat_do_bot = chat_id
+
+# Função para renomear chat (persistida na coleção "chats")
+def rename_chat(chat_id, novo_nome):
+    try:
+        db = conectar_mongodb()
+        user_id = st.session_state.usuario_logado.id
+        agora = datetime.utcnow()
+        
+        db["chats"].update_one(
+            {"_id": chat_id, "userId": user_id},
+            {
+                "$set": {"titulo": novo_nome},
+                "$setOnInsert": {
+                    "created_at": agora,
+                    "updated_at": agora,
+                    "turnos": 0,
+                    "deleted": False
+                }
+            },
+            upsert=True
+        )
+        st.session_state.chats[chat_id]["name"] = novo_nome
+        
+    except Exception as e:
+        st.error(f"Erro ao renomear conversa: {str(e)}")
+
 # Função para deletar chat
 def delete_chat(chat_id):
     try:
         db = conectar_mongodb()
-        colecao_historico = db["historico_conversas"]
+        user_id = st.session_state.usuario_logado.id
         
-        # Mark all messages of this chat as deleted
-        colecao_historico.update_many(
-            {"chatId": chat_id},
+        db["chats"].update_one(
+            {"_id": chat_id, "userId": user_id},
+            {"$set": {"deleted": True, "updated_at": datetime.utcnow()}}
+        )
+        # Marca também os turnos, para que todo leitor do histórico só precise de deleted=False
+        db["historico_conversas"].update_many(
+            {"chatId": chat_id, "userId": user_id, "deleted": False},
             {"$set": {"deleted": True}}
         )
         
         # Remove from local session state
-        if len(st.session_state.chats) > 1:
-            del st.session_state.chats[chat_id]
+        del st.session_state.chats[chat_id]
+        if not st.session_state.chats:
+            # If it's the last chat, start a fresh one
+            create_new_chat()
+        elif st.session_state.current_chat_id == chat_id:
             # If deleted chat was current, switch to another
-            if st.session_state.current_chat_id == chat_id:
-                st.session_state.current_chat_id = list(st.session_state.chats.keys())[0]
-        else:
-            # If it's the last chat, just clear messages and mark as deleted
-            st.session_state.chats[chat_id]["messages"] = []
+            st.session_state.current_chat_id = list(st.session_state.chats.keys())[0]
             
-        # Limpar histórico do bot quando deletar chat
-        if "conversa_bot" in st.session_state:
+        # Limpar histórico do bot se ele estava com o contexto do chat deletado
+        if "conversa_bot" in st.session_state and st.session_state.get("chat_do_bot") == chat_id:
             st.session_state.conversa_bot.limpar_historico()
+            st.session_state.chat_do_bot = None
             
     except Exception as e:
         st.error(f"Erro ao deletar conversa: {str(e)}")
 
-st.markdown("""
-    <style>
-        .reportview-container {
-            margin-top: -2em;
-        }
-        #MainMenu {visibility: hidden;}
-        .stDeployButton {display:hidden;}
-        footer {visibility: hidden;}
-        #stDecoration {display:none;}
+# Página do chat (chamada pelo gerenciador a cada rerun)
+def pagina_chat():
+    st.markdown("""
+        <style>
+            .reportview-container {
+                margin-top: -2em;
+            }
+            #MainMenu {visibility: hidden;}
+            .stDeployButton {display:hidden;}
+            footer {visibility: hidden;}
+            #stDecoration {display:none;}
         
-        .chat-item {
-            padding: 10px;
-            margin: 5px 0;
-            border-radius: 5px;
-            border: 1px solid #ddd;
-            cursor: pointer;
-        }
+            .chat-item {
+                padding: 10px;
+                margin: 5px 0;
+                border-radius: 5px;
+                border: 1px solid #ddd;
+                cursor: pointer;
+            }
         
-        .chat-item-active {
-            background-color: #e6f3ff;
-            border-color: #4CAF50;
-        }
+            .chat-item-active {
+                background-color: #e6f3ff;
+                border-color: #4CAF50;
+            }
         
-        .chat-item:hover {
-            background-color: #f5f5f5;
-        }
+            .chat-item:hover {
+                background-color: #f5f5f5;
+            }
         
-        .chat-delete-btn {
-            float: right;
-            color: #ff4444;
-            font-size: 12px;
-        }
-    </style>
-""", unsafe_allow_html=True)
-
-if "usuario_logado" not in st.session_state:
-    st.error("❌ Erro: Usuário não autenticado!")
-    st.stop()
-
-# Inicializar estado dos chats
-if "chats" not in st.session_state:
-    # Tentar carregar chats existentes do usuário
-    user_id = str(st.session_state.usuario_logado['_id'])
-    chats_carregados = carregar_chats_usuario(user_id)
+            .chat-delete-btn {
+                float: right;
+                color: #ff4444;
+                font-size: 12px;
+            }
+        </style>
+    """, unsafe_allow_html=True)
+
+    if "usuario_logado" not in st.session_state:
+        st.error("❌ Erro: Usuário não autenticado!")
+        st.stop()
+
+    # Inicializar estado dos chats
+    if "chats" not in st.session_state:
+        # Tentar carregar a primeira página de chats do usuário (só os resumos)
+        user_id = st.session_state.usuario_logado.id
+        chats_carregados, st.session_state.cursor_chats = carregar_resumos_chats(user_id)
     
-    if chats_carregados:
-        st.session_state.chats = chats_carregados
-        # Definir o chat mais recente como atual
-        st.session_state.current_chat_id = list(chats_carregados.keys())[-1]
-        st.success(f"✅ {len(chats_carregados)} conversa(s) recuperada(s)!")
-    else:
-        st.session_state.chats = {}
+        if chats_carregados:
+            st.session_state.chats = chats_carregados
+            # Definir o chat mais recente como atual
+            st.session_state.current_chat_id = next(iter(chats_carregados))
+            st.success(f"✅ {len(chats_carregados)} conversa(s) recuperada(s)!")
+        else:
+            st.session_state.chats = {}
+
+    if "cursor_chats" not in st.session_state:
+        st.session_state.cursor_chats = None
     
-if "current_chat_id" not in st.session_state:
-    st.session_state.current_chat_id = None
-
-# Se não há chats, criar o primeiro
-if not st.session_state.chats:
-    create_new_chat()
-    st.info("💬 Nova conversa criada!")
-
-# Inicializar o agent usando a nova classe
-if "conversa_bot" not in st.session_state:
-    st.session_state.conversa_bot = setup_agent(st.session_state.usuario_logado)
-
-bot = st.session_state.conversa_bot
-
-# ÚNICA seção de sidebar - consolidar tudo aqui
-with st.sidebar:
-    # Informações do usuário logado
-    st.success(f"👤 **{st.session_state.usuario_logado['nome_completo']}**")
-    st.caption(f"📧 {st.session_state.usuario_logado['email']}")
-    st.caption(f"👨‍🎓 {st.session_state.usuario_logado['tipo_usuario'].title()}")
+    if "current_chat_id" not in st.session_state:
+        st.session_state.current_chat_id = None
+
+    # Se não há chats, criar o primeiro
+    if not st.session_state.chats:
+        create_new_chat()
+        st.info("💬 Nova conversa criada!")
+
+    # Mensagens só são buscadas quando o chat é aberto
+    abrir_chat(st.session_state.current_chat_id)
+
+    # ÚNICA seção de sidebar - consolidar tudo aqui
+    with st.sidebar:
+        # Informações do usuário logado
+        st.success(f"👤 **{st.session_state.usuario_logado.nome_completo}**")
+        st.caption(f"📧 {st.session_state.usuario_logado.email}")
+        st.caption(f"👨‍🎓 {st.session_state.usuario_logado.tipo_usuario.title()}")
     
-    if st.button("🚪 Logout", use_container_width=True, type="secondary"):
-        st.session_state.clear()
-        st.success("Logout realizado com sucesso!")
-        st.rerun()
+        if st.button("🚪 Logout", use_container_width=True, type="secondary"):
+            st.session_state.clear()
+            st.success("Logout realizado com sucesso!")
+            st.rerun()
     
-    st.markdown("---")
+        st.markdown("---")
     
-    # Gerenciamento de conversas
-    st.header("💬 Conversas")
+        # Gerenciamento de conversas
+        st.header("💬 Conversas")
     
-    # Botão para criar novo chat
-    if st.button("➕ Nova Conversa", use_container_width=True):
-        create_new_chat()
-        st.rerun()
+        # Botão para criar novo chat
+        if st.button("➕ Nova Conversa", use_container_width=True):
+            create_new_chat()
+            st.rerun()
     
-    st.markdown("---")
+        # Busca no histórico de todas as conversas do usuário
+        consulta = st.text_input("🔎 Buscar nas conversas", key="consulta_busca", placeholder="ex.: trancamento de matrícula")
+        if consulta:
+            from busca_historico import ROTULOS
+            resultados, erro = resultados_da_busca(st.session_state.usuario_logado.id, consulta)
+            if erro:
+                st.error(f"Erro na busca: {erro}")
+            elif not resultados:
+                st.caption("Nenhuma mensagem encontrada.")
+            for posicao, resultado in enumerate(resultados):
+                titulo = resultado.titulo or st.session_state.chats.get(resultado.chat_id, {}).get("name") or "Conversa"
+                if st.button(
+                    f"{titulo} · {resultado.timestamp.strftime('%d/%m/%Y %H:%M')}",
+                    key=f"busca_{posicao}_{resultado.chat_id}",
+                    use_container_width=True
+                ):
+                    if abrir_resultado_busca(resultado.chat_id, resultado.timestamp):
+                        st.rerun()
+                st.caption(f"{ROTULOS[resultado.campo]}: {resultado.trecho}")
     
-    # Lista de chats
-    for chat_id, chat_data in st.session_state.chats.items():
-        is_current = chat_id == st.session_state.current_chat_id
+        st.markdown("---")
+    
+        # Lista de chats
+        for chat_id, chat_data in st.session_state.chats.items():
+            is_current = chat_id == st.session_state.current_chat_id
         
-        chat_container = st.container()
+            chat_container = st.container()
         
-        with chat_container:
-            col1, col2 = st.columns([4, 1])
+            with chat_container:
+                col1, col2 = st.columns([4, 1])
             
-            with col1:
-                if st.button(
-                    chat_data["name"], 
-                    key=f"select_{chat_id}",
-                    use_container_width=True,
-                    type="primary" if is_current else "secondary"
-                ):
-                    st.session_state.current_chat_id = chat_id
-                    # Limpar histórico do bot ao trocar de chat
-                    st.session_state.conversa_bot.limpar_historico()
-                    st.rerun()
+                with col1:
+                    if st.button(
+                        chat_data["name"], 
+                        key=f"select_{chat_id}",
+                        use_container_width=True,
+                        type="primary" if is_current else "secondary"
+                    ):
+                        # O contexto do bot é restaurado na próxima mensagem
+                        st.session_state.current_chat_id = chat_id
+                        st.rerun()
             
-            with col2:
-                if st.button(
-                    "🗑️", 
-                    key=f"delete_{chat_id}",
-                    help="Deletar conversa"
-                ):
-                    delete_chat(chat_id)
-                    st.rerun()
+                with col2:
+                    if st.button(
+                        "🗑️", 
+                        key=f"delete_{chat_id}",
+                        help="Deletar conversa"
+                    ):
+                        delete_chat(chat_id)
+                        st.rerun()
         
-        st.caption(f"📅 {chat_data['created_at']}")
-        st.markdown("---")
+            st.caption(f"📅 {chat_data['created_at']}")
+            st.markdown("---")
     
-    # Seção de informações
-    st.header("ℹ️ Sobre")
-    st.write("Este assistente pode ajudar com:")
-    st.write("• Informações do manual do aluno")
-    st.write("• Perguntas frequentes")
-
-# Área principal do chat
-st.title("🤖 Assistente da PUC Campinas")
-
-# Obter chat atual
-current_chat = st.session_state.chats.get(st.session_state.current_chat_id, {})
-current_messages = current_chat.get("messages", [])
-
-# Mostrar nome do chat atual
-if current_chat:
-    st.write(f"💬 **{current_chat['name']}**")
+        # Paginação da lista de chats
+        if st.session_state.cursor_chats:
+            if st.button("⬇️ Carregar mais conversas", use_container_width=True):
+                carregar_mais_chats()
+                st.rerun()
     
-    # Linha com opções do chat
-    col1, col2 = st.columns([3, 1])
+        # Seção de informações
+        st.header("ℹ️ Sobre")
+        st.write("Este assistente pode ajudar com:")
+        st.write("• Informações do manual do aluno")
+        st.write("• Perguntas frequentes")
+
+    # Área principal do chat
+    st.title("🤖 Assistente da PUC Campinas")
+
+    # Obter chat atual
+    current_chat = st.session_state.chats.get(st.session_state.current_chat_id, {})
+    current_messages = current_chat.get("messages", [])
+
+    # Mostrar nome do chat atual
+    if current_chat:
+        st.write(f"💬 **{current_chat['name']}**")
     
-    with col1:
-        # Opção para renomear chat
-        with st.expander("✏️ Renomear conversa"):
-            new_name = st.text_input("Novo nome:", value=current_chat['name'])
-            if st.button("Salvar nome"):
-                st.session_state.chats[st.session_state.current_chat_id]["name"] = new_name
-                st.rerun()
+        # Linha com opções do chat
+        col1, col2 = st.columns([3, 1])
     
-    with col2:
-        # Botão para mostrar grafo
-        if st.button("📊 Mostrar Grafo", use_container_width=True):
-            st.info("Funcionalidade do grafo será implementada aqui!")
-            plotar_grafo_conversa(current_messages)
-            # Aqui você pode adicionar a lógica para mostrar o grafo
-            # Por exemplo: st.session_state.show_graph = True
-
-st.write("Olá! Sou seu assistente. Como posso ajudar?")
-
-# Exibir mensagens do chat atual
-for message in current_messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
-
-# Input do usuário
-if prompt := st.chat_input("Digite sua pergunta sobre a PUC Campinas..."):
-    # Adicionar mensagem do usuário ao histórico do chat atual
-    current_messages.append({"role": "user", "content": prompt})
-    st.session_state.chats[st.session_state.current_chat_id]["messages"] = current_messages
+        with col1:
+            # Opção para renomear chat
+            with st.expander("✏️ Renomear conversa"):
+                new_name = st.text_input("Novo nome:", value=current_chat['name'])
+                if st.button("Salvar nome"):
+                    rename_chat(st.session_state.current_chat_id, new_name)
+                    st.rerun()
     
-    # Exibir mensagem do usuário
-    with st.chat_message("user"):
-        st.markdown(prompt)
+        with col2:
+            # Botão para mostrar grafo
+            if st.button("📊 Mostrar Grafo", use_container_width=True):
+                # grafos (e o desenho com networkx/matplotlib) só é carregado ao pedir o grafo
+                from grafos import plotar_grafo_conversa
+                st.info("Funcionalidade do grafo será implementada aqui!")
+                plotar_grafo_conversa(
+                    current_messages,
+                    grafo_do_chat(st.session_state.current_chat_id),
+                    chave=st.session_state.current_chat_id
+                )
+                # Aqui você pode adicionar a lógica para mostrar o grafo
+                # Por exemplo: st.session_state.show_graph = True
+
+    st.write("Olá! Sou seu assistente. Como posso ajudar?")
+
+    # Turnos mais antigos são carregados sob demanda
+    if current_chat.get("tem_mais_mensagens"):
+        if st.button("⬆️ Carregar mensagens anteriores"):
+            carregar_mensagens_anteriores(st.session_state.current_chat_id)
+            st.rerun()
+
+    # Exibir mensagens do chat atual
+    for message in current_messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
+    # Input do usuário
+    if prompt := st.chat_input("Digite sua pergunta sobre a PUC Campinas..."):
+        bot = obter_bot()
+        from agent import RespostaInterrompida
+        # O agente guarda o contexto de um chat por vez; ao trocar de chat ele é restaurado
+        # (antes de a pergunta nova entrar nas mensagens do chat)
+        if st.session_state.get("chat_do_bot") != st.session_state.current_chat_id:
+            retomar_contexto_chat(st.session_state.current_chat_id)
+
+        # Adicionar mensagem do usuário ao histórico do chat atual
+        current_messages.append({"role": "user", "content": prompt})
+        st.session_state.chats[st.session_state.current_chat_id]["messages"] = current_messages
+    
+        # Exibir mensagem do usuário
+        with st.chat_message("user"):
+            st.markdown(prompt)
     
-    # Gerar resposta do assistente
-    with st.chat_message("assistant"):
-        with st.spinner("Pensando..."):
+        # Gerar resposta do assistente
+        with st.chat_message("assistant"):
             try:
-                # Chamada síncrona simples - SEM asyncio.run() ou await
-                response = bot.conversar(prompt)
-                st.markdown(response)
-                
+                # Resposta renderizada em streaming; retorna o texto completo ao final
+                response = st.write_stream(bot.conversar_stream(prompt))
+            
                 # Adicionar resposta ao histórico do chat atual
                 current_messages.append({"role": "assistant", "content": response})
                 st.session_state.chats[st.session_state.current_chat_id]["messages"] = current_messages
-                
-                # Salvar no banco de dados
-                user_id = str(st.session_state.usuario_logado['_id'])
-                chat_id = st.session_state.current_chat_id
-                
-                sucesso, resultado = salvar_mensagem_historico(
-                    chat_id=chat_id,
-                    user_id=user_id,
-                    user_message=prompt,
-                    ai_message=response
-                )
-                
+            
+                sucesso = registrar_turno(bot, st.session_state.current_chat_id, prompt, response)
                 if not sucesso:
                     st.warning("Mensagem salva localmente, mas houve problema ao sincronizar com o servidor.")
-                
+            
+            except RespostaInterrompida as e:
+                # O agente não guardou este turno: a resposta parcial fica só na tela, marcada,
+                # e não é gravada no histórico, no grafo nem no snapshot
+                st.error(f"Desculpe, a resposta foi interrompida: {str(e.__cause__)}")
+                current_messages.append({"role": "assistant", "content": f"{e.parcial}\n\n*(resposta interrompida)*"})
+                st.session_state.chats[st.session_state.current_chat_id]["messages"] = current_messages
+            
             except Exception as e:
                 error_msg = f"Desculpe, ocorreu um erro: {str(e)}"
                 st.error(error_msg)
                 current_messages.append({"role": "assistant", "content": error_msg})
                 st.session_state.chats[st.session_state.current_chat_id]["messages"] = current_messages
-                
+            
                 # Salvar erro no banco também
-                user_id = str(st.session_state.usuario_logado['_id'])
-                chat_id = st.session_state.current_chat_id
-                
-                salvar_mensagem_historico(
-                    chat_id=chat_id,
-                    user_id=user_id,
-                    user_message=prompt,
-                    ai_message=error_msg
-                )
+                registrar_turno(bot, st.session_state.current_chat_id, prompt, error_msg)
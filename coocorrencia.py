@@ -0,0 +1,236 @@
+# coocorrencia.py - Estado incremental do grafo de coocorrência de palavras-chave de um chat
+import hashlib
+from collections import Counter
+from typing import Iterable, List, Optional, Sequence
+from palavras_chave import LISTA_PALAVRAS_CHAVES, obter_extrator
+
+VERSAO_GRAFO = 1
+
+
+def versao_palavras(palavras: Sequence[str]) -> str:
+    """Hash curto do conjunto de palavras-chave; o estado salvo só vale para a mesma lista"""
+    return hashlib.sha256("\x1f".join(palavras).encode("utf-8")).hexdigest()[:12]
+
+
+class GrafoConversa:
+    """
+    Frequências das palavras-chave e pesos das coocorrências de um chat.
+
+    É atualizado só com as mensagens novas e guarda a ordem de primeira aparição de nós
+    e arestas, para que o grafo do networkx seja idêntico ao de criar_grafo_conversa.
+    """
+
+    def __init__(self, palavras_chave: Sequence[str] = LISTA_PALAVRAS_CHAVES):
+        self.palavras_chave = tuple(palavras_chave)
+        self.frequencias = Counter()
+        # (palavra1, palavra2) na orientação da primeira ocorrência -> peso
+        self.pesos = {}
+        self.mensagens = 0
+
+    def adicionar(self, conteudos: Iterable[str]):
+        """Incorpora novas mensagens (na ordem em que foram enviadas)"""
+        conteudos = list(conteudos)
+        for palavras in obter_extrator(self.palavras_chave).extrair_lote(conteudos):
+            self._adicionar_palavras(palavras)
+        self.mensagens += len(conteudos)
+        return self
+
+    def _adicionar_palavras(self, palavras: List[str]):
+        self.frequencias.update(palavras)
+        pesos = self.pesos
+        for i, palavra1 in enumerate(palavras):
+            for palavra2 in palavras[i + 1:]:
+                if palavra1 == palavra2:
+                    continue
+                if (palavra1, palavra2) in pesos:
+                    pesos[(palavra1, palavra2)] += 1
+                elif (palavra2, palavra1) in pesos:
+                    pesos[(palavra2, palavra1)] += 1
+                else:
+                    pesos[(palavra1, palavra2)] = 1
+
+    @classmethod
+    def de_mensagens(cls, mensagens_chat, palavras_chave: Sequence[str] = LISTA_PALAVRAS_CHAVES):
+        """Estado completo a partir das mensagens do chat ({'role', 'content'})"""
+        return cls(palavras_chave).adicionar(m.get("content", "") for m in mensagens_chat)
+
+    @property
+    def total_ocorrencias(self) -> int:
+        return sum(self.frequencias.values())
+
+    def iter_nos(self):
+        """(palavra, frequência) na ordem de primeira aparição"""
+        return iter(self.frequencias.items())
+
+    def iter_arestas(self):
+        """(palavra1, palavra2, peso) na ordem de primeira aparição"""
+        return ((a, b, peso) for (a, b), peso in self.pesos.items())
+
+    def para_networkx(self):
+        """Grafo do networkx com os mesmos nós, arestas e pesos da reconstrução completa"""
+        import networkx as nx
+        G = nx.Graph()
+        G.add_nodes_from(self.frequencias)
+        G.add_weighted_edges_from((a, b, peso) for (a, b), peso in self.pesos.items())
+        return G
+
+    def estatisticas(self, total_mensagens: Optional[int] = None):
+        """Mesmo formato de grafos.obter_estatisticas_conversa"""
+        return {
+            "total_mensagens": self.mensagens if total_mensagens is None else total_mensagens,
+            "palavras_unicas": len(self.frequencias),
+            "total_palavras_chave": self.total_ocorrencias,
+            "conexoes": len(self.pesos),
+            "palavra_mais_frequente": self.frequencias.most_common(1)[0] if self.frequencias else None,
+            "top_5_palavras": self.frequencias.most_common(5)
+        }
+
+    def para_dict(self):
+        """Representação serializável (JSON/BSON) para salvar junto com o chat"""
+        return {
+            "v": VERSAO_GRAFO,
+            "palavras": versao_palavras(self.palavras_chave),
+            "mensagens": self.mensagens,
+            "frequencias": [[palavra, n] for palavra, n in self.frequencias.items()],
+            "arestas": [[a, b, peso] for (a, b), peso in self.pesos.items()],
+        }
+
+    @classmethod
+    def de_dict(cls, dados, palavras_chave: Sequence[str] = LISTA_PALAVRAS_CHAVES):
+        """Inverso de para_dict; None se o formato ou a lista de palavras-chave mudaram"""
+        if not dados or dados.get("v") != VERSAO_GRAFO:
+            return None
+        estado = cls(palavras_chave)
+        if dados.get("palavras") != versao_palavras(estado.palavras_chave):
+            return None
+        estado.mensagens = dados.get("mensagens", 0)
+        estado.frequencias = Counter(dict((palavra, n) for palavra, n in dados["frequencias"]))
+        estado.pesos = {(a, b): peso for a, b, peso in dados["arestas"]}
+        return estado
+
+
+class CoocorrenciaVetorizada:
+    """
+    Motor de coocorrência para o corpus inteiro (milhões de mensagens).
+
+    As palavras-chave viram ids inteiros e cada bloco de mensagens vira uma matriz
+    documento-termo X; os pesos das arestas saem de um único produto Xᵀ·X (fora da
+    diagonal), que conta os mesmos pares que o laço de criar_grafo_conversa. Os blocos
+    são densos (o vocabulário tem ~110 termos), montados com np.bincount.
+    """
+
+    def __init__(self, palavras_chave: Sequence[str] = LISTA_PALAVRAS_CHAVES, tamanho_bloco: int = 50000):
+        import numpy as np
+        self._np = np
+        self.palavras_chave = tuple(palavras_chave)
+        self.tamanho_bloco = tamanho_bloco
+        # Grafias exibidas pelo extrator (uma por termo normalizado), na ordem da lista
+        extrator = obter_extrator(self.palavras_chave)
+        self.termos = list(dict.fromkeys(
+            termo for palavra in self.palavras_chave for termo in extrator.extrair(palavra)
+        ))
+        self.ids = {termo: i for i, termo in enumerate(self.termos)}
+        total = len(self.termos)
+        self.frequencias = np.zeros(total, dtype=np.int64)
+        self.pesos = np.zeros((total, total), dtype=np.int64)
+        self.mensagens = 0
+
+    def codificar(self, conteudos: Sequence[str]):
+        """Ocorrências das palavras-chave como pares (mensagem, id do termo)"""
+        np = self._np
+        documentos, termos = [], []
+        ids = self.ids
+        for doc, palavras in enumerate(obter_extrator(self.palavras_chave).extrair_lote(conteudos)):
+            for palavra in palavras:
+                documentos.append(doc)
+                termos.append(ids[palavra])
+        return np.asarray(documentos, dtype=np.int64), np.asarray(termos, dtype=np.int64)
+
+    def adicionar(self, conteudos: Sequence[str]):
+        """Processa as mensagens em blocos de tamanho_bloco"""
+        for inicio in range(0, len(conteudos), self.tamanho_bloco):
+            bloco = conteudos[inicio:inicio + self.tamanho_bloco]
+            documentos, termos = self.codificar(bloco)
+            self.adicionar_ocorrencias(documentos, termos, len(bloco))
+        return self
+
+    def adicionar_ocorrencias(self, documentos, termos, total_mensagens: int):
+        """Acumula um bloco já codificado (ids de mensagem relativos ao bloco, não precisam ser contíguos)"""
+        np = self._np
+        total_termos = len(self.termos)
+        self.mensagens += total_mensagens
+        if len(termos) == 0:
+            return self
+        # Só as mensagens com alguma palavra-chave viram linhas da matriz
+        linhas, documentos = np.unique(documentos, return_inverse=True)
+        X = np.bincount(
+            documentos * total_termos + termos, minlength=len(linhas) * total_termos
+        ).reshape(len(linhas), total_termos).astype(np.float64)
+        # O produto em float64 usa o BLAS (o de inteiros não); as contagens de um bloco
+        # ficam muito abaixo de 2**53, então o resultado é exato e volta para int64
+        produto = np.rint(X.T @ X).astype(np.int64)
+        np.fill_diagonal(produto, 0)
+        self.pesos += produto
+        self.frequencias += np.bincount(termos, minlength=total_termos)
+        return self
+
+    def combinar(self, outro: "CoocorrenciaVetorizada"):
+        """Soma os resultados de outro motor com as mesmas palavras-chave (ex.: outro processo)"""
+        self.frequencias += outro.frequencias
+        self.pesos += outro.pesos
+        self.mensagens += outro.mensagens
+        return self
+
+    def contador(self) -> Counter:
+        """Frequências das palavras-chave encontradas"""
+        return Counter({self.termos[i]: int(self.frequencias[i]) for i in self._np.flatnonzero(self.frequencias)})
+
+    def iter_nos(self):
+        """(palavra, frequência) das palavras encontradas, na ordem da lista"""
+        for i in self._np.flatnonzero(self.frequencias).tolist():
+            yield self.termos[i], int(self.frequencias[i])
+
+    def iter_arestas(self):
+        """(palavra1, palavra2, peso) com peso > 0, cada par uma vez, linha a linha da matriz"""
+        for a in range(len(self.termos)):
+            linha = self.pesos[a]
+            for b in (self._np.flatnonzero(linha[a + 1:]) + a + 1).tolist():
+                yield self.termos[a], self.termos[b], int(linha[b])
+
+    def arestas(self):
+        """[(palavra1, palavra2, peso)] com peso > 0, cada par uma vez"""
+        return list(self.iter_arestas())
+
+    def para_networkx(self, top_n: Optional[int] = None):
+        """Converte para networkx só na hora de exibir; top_n limita aos nós mais frequentes"""
+        import networkx as nx
+        contador = self.contador()
+        nos = [p for p, _ in contador.most_common(top_n)] if top_n else list(contador)
+        manter = set(nos)
+        G = nx.Graph()
+        G.add_nodes_from(nos)
+        G.add_weighted_edges_from(
+            (a, b, peso) for a, b, peso in self.arestas() if a in manter and b in manter
+        )
+        return G
+
+    def para_dict(self):
+        return {
+            "v": VERSAO_GRAFO,
+            "palavras": versao_palavras(self.palavras_chave),
+            "mensagens": self.mensagens,
+            "termos": self.termos,
+            "frequencias": self.frequencias.tolist(),
+            "pesos": self.pesos.tolist(),
+        }
+
+    @classmethod
+    def de_dict(cls, dados, palavras_chave: Sequence[str] = LISTA_PALAVRAS_CHAVES):
+        """Inverso de para_dict; None se o formato ou a lista de palavras-chave mudaram"""
+        motor = cls(palavras_chave)
+        if not dados or dados.get("v") != VERSAO_GRAFO or dados.get("palavras") != versao_palavras(motor.palavras_chave):
+            return None
+        motor.mensagens = dados["mensagens"]
+        motor.frequencias = motor._np.asarray(dados["frequencias"], dtype=motor._np.int64)
+        motor.pesos = motor._np.asarray(dados["pesos"], dtype=motor._np.int64)
+        return motor
@@ -0,0 +1,183 @@
+# exportar_grafo.py - Exportação em fluxo do grafo de palavras-chave (NDJSON, GraphML, Parquet)
+import argparse
+import json
+import os
+from itertools import islice
+from xml.sax.saxutils import quoteattr
+
+FORMATOS = ("ndjson", "graphml", "parquet")
+# Linhas por escrita no arquivo (NDJSON/GraphML) e por row group (Parquet)
+TAMANHO_LOTE = int(os.getenv("EXPORTACAO_TAMANHO_LOTE") or 50000)
+
+
+def _lotes(iteravel, tamanho):
+    iterador = iter(iteravel)
+    while True:
+        lote = list(islice(iterador, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+def linhas_ndjson(grafo, nome="grafo"):
+    """
+    Uma linha JSON por registro: cabeçalho, depois nós e arestas (com peso).
+
+    Args:
+        grafo: GrafoConversa (um chat) ou CoocorrenciaVetorizada (corpus)
+        nome: identificação do grafo no cabeçalho
+    """
+    # Só as strings passam pelo encoder; montar o objeto e chamar json.dumps por linha é ~3x mais lento
+    texto = json.JSONEncoder(ensure_ascii=False).encode
+    yield json.dumps({"tipo": "grafo", "nome": nome, "mensagens": grafo.mensagens}, ensure_ascii=False) + "\n"
+    for palavra, frequencia in grafo.iter_nos():
+        yield f'{{"tipo": "no", "id": {texto(palavra)}, "frequencia": {frequencia}}}\n'
+    for palavra1, palavra2, peso in grafo.iter_arestas():
+        yield f'{{"tipo": "aresta", "origem": {texto(palavra1)}, "destino": {texto(palavra2)}, "peso": {peso}}}\n'
+
+
+def linhas_graphml(grafo, nome="grafo"):
+    """GraphML não direcionado; frequencia nos nós e weight nas arestas (como o networkx lê)"""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+    yield '  <key id="d0" for="graph" attr.name="mensagens" attr.type="long"/>\n'
+    yield '  <key id="d1" for="node" attr.name="frequencia" attr.type="long"/>\n'
+    yield '  <key id="d2" for="edge" attr.name="weight" attr.type="long"/>\n'
+    yield f'  <graph id={quoteattr(nome)} edgedefault="undirected">\n'
+    yield f'    <data key="d0">{grafo.mensagens}</data>\n'
+    for palavra, frequencia in grafo.iter_nos():
+        yield f'    <node id={quoteattr(palavra)}><data key="d1">{frequencia}</data></node>\n'
+    for palavra1, palavra2, peso in grafo.iter_arestas():
+        yield (f'    <edge source={quoteattr(palavra1)} target={quoteattr(palavra2)}>'
+               f'<data key="d2">{peso}</data></edge>\n')
+    yield '  </graph>\n</graphml>\n'
+
+
+def escrever_parquet(grafo, destino, nome="grafo", tamanho_lote=TAMANHO_LOTE):
+    """
+    Tabela única com nós e arestas, gravada em row groups de tamanho_lote linhas.
+
+    Colunas: tipo ("no"/"aresta"), palavra1, palavra2 (nula nos nós) e peso (frequência nos nós).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = pa.schema([
+        ("tipo", pa.string()),
+        ("palavra1", pa.string()),
+        ("palavra2", pa.string()),
+        ("peso", pa.int64()),
+    ]).with_metadata({"nome": nome, "mensagens": str(grafo.mensagens)})
+
+    def registros():
+        for palavra, frequencia in grafo.iter_nos():
+            yield "no", palavra, None, frequencia
+        for palavra1, palavra2, peso in grafo.iter_arestas():
+            yield "aresta", palavra1, palavra2, peso
+
+    with pq.ParquetWriter(destino, esquema, compression="zstd") as escritor:
+        for lote in _lotes(registros(), tamanho_lote):
+            tipos, palavras1, palavras2, pesos = zip(*lote)
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(tipos), pa.array(palavras1), pa.array(palavras2, type=pa.string()), pa.array(pesos)],
+                schema=esquema,
+            ))
+
+
+def exportar(grafo, formato, destino, nome="grafo", tamanho_lote=TAMANHO_LOTE):
+    """
+    Escreve o grafo aos poucos em destino, sem montar a saída inteira na memória.
+
+    Args:
+        grafo: GrafoConversa ou CoocorrenciaVetorizada
+        formato: "ndjson", "graphml" ou "parquet"
+        destino: caminho do arquivo ou stream binário (ex.: io.BytesIO, sys.stdout.buffer)
+        nome: identificação do grafo na saída
+
+    Returns:
+        int: bytes escritos
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato '{formato}' não suportado; use {', '.join(FORMATOS)}")
+
+    if isinstance(destino, (str, os.PathLike)):
+        # Arquivo temporário + replace: uma exportação interrompida não deixa arquivo pela metade
+        temporario = os.fspath(destino) + ".tmp"
+        try:
+            with open(temporario, "wb") as arquivo:
+                escritos = exportar(grafo, formato, arquivo, nome, tamanho_lote)
+            os.replace(temporario, destino)
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+        return escritos
+
+    if formato == "parquet":
+        inicio = destino.tell() if destino.seekable() else 0
+        escrever_parquet(grafo, destino, nome, tamanho_lote)
+        return destino.tell() - inicio if destino.seekable() else 0
+
+    linhas = linhas_ndjson(grafo, nome) if formato == "ndjson" else linhas_graphml(grafo, nome)
+    escritos = 0
+    for lote in _lotes(linhas, tamanho_lote):
+        dados = "".join(lote).encode("utf-8")
+        destino.write(dados)
+        escritos += len(dados)
+    return escritos
+
+
+def grafo_do_chat(chat_id, user_id):
+    """GrafoConversa de um chat do usuário a partir do histórico no banco (cursor em lotes)"""
+    from banco import conectar_mongodb
+    from coocorrencia import GrafoConversa
+    db = conectar_mongodb()
+    # Mesmo filtro da sidebar: o chat precisa ser do usuário e não estar apagado
+    if not db["chats"].find_one({"_id": chat_id, "userId": user_id, "deleted": False}, {"_id": 1}):
+        raise LookupError(f"Chat '{chat_id}' não encontrado para o usuário '{user_id}' (ou foi apagado)")
+    estado = GrafoConversa()
+    turnos = db["historico_conversas"].find(
+        {"chatId": chat_id, "userId": user_id, "deleted": False},
+        {"_id": 0, "userMessage": 1, "AiMessage": 1}
+    ).sort("timestamp", 1).batch_size(500)
+    for turno in turnos:
+        estado.adicionar([turno.get("userMessage", ""), turno.get("AiMessage", "")])
+    return estado
+
+
+def grafo_do_corpus(escopo="global"):
+    """Grafo agregado gravado por analise_topicos.py (global, curso:<nome>, semana:<AAAA-Www>)"""
+    from analise_topicos import COLECAO_RESULTADOS
+    from banco import conectar_mongodb
+    from coocorrencia import CoocorrenciaVetorizada
+    documento = conectar_mongodb()[COLECAO_RESULTADOS].find_one({"_id": escopo}, {"motor": 1})
+    if not documento:
+        raise LookupError(f"Nenhum resultado para '{escopo}'; execute python analise_topicos.py executar")
+    motor = CoocorrenciaVetorizada.de_dict(documento.get("motor"))
+    if motor is None:
+        raise LookupError(f"Resultado '{escopo}' foi gerado com outra lista de palavras-chave")
+    return motor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta o grafo de palavras-chave em fluxo")
+    sub = parser.add_subparsers(dest="fonte", required=True)
+    chat_cmd = sub.add_parser("chat", help="grafo de um chat, a partir do histórico")
+    chat_cmd.add_argument("user_id", help="dono do chat (historico_conversas.userId)")
+    chat_cmd.add_argument("chat_id")
+    corpus_cmd = sub.add_parser("corpus", help="grafo agregado do job de análise de temas")
+    corpus_cmd.add_argument("escopo", nargs="?", default="global")
+    for comando in (chat_cmd, corpus_cmd):
+        comando.add_argument("--formato", choices=FORMATOS, default="ndjson")
+        comando.add_argument("--saida", required=True, help="arquivo de saída ('-' para a saída padrão)")
+    args = parser.parse_args()
+
+    if args.fonte == "chat":
+        grafo, nome = grafo_do_chat(args.chat_id, args.user_id), args.chat_id
+    else:
+        grafo, nome = grafo_do_corpus(args.escopo), args.escopo
+    if args.saida == "-":
+        import sys
+        exportar(grafo, args.formato, sys.stdout.buffer, nome)
+        sys.stdout.buffer.flush()
+    else:
+        print(f"{exportar(grafo, args.formato, args.saida, nome)} bytes escritos em {args.saida}")
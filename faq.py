@@ -0,0 +1,211 @@
+# faq.py - Respostas locais para as perguntas frequentes do PROMPT (sem chamar o modelo)
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from texto import tokenizar
+
+LIMIAR_FAQ = float(os.getenv("FAQ_LIMIAR") or 0.5)
+# Diferença mínima para a segunda entrada mais parecida (evita responder na dúvida entre duas)
+MARGEM_FAQ = float(os.getenv("FAQ_MARGEM") or 0.1)
+FAQ_ATIVO = os.getenv("FAQ_ATIVO", "1") != "0"
+FAQ_PERSONALIZAR = os.getenv("FAQ_PERSONALIZAR", "1") != "0"
+
+# Paráfrases conhecidas de cada pergunta (número da pergunta no PROMPT)
+PARAFRASES = {
+    1: [
+        "qual a frequência mínima",
+        "quantas faltas posso ter",
+        "presença mínima para passar na disciplina",
+        "porcentagem de frequência para aprovação",
+        "quanto de presença preciso para ser aprovado",
+    ],
+    2: [
+        "como pedir aproveitamento de estudos",
+        "como dispensar uma disciplina",
+        "dispensa de matéria",
+        "validar disciplinas cursadas em outra faculdade",
+    ],
+    3: [
+        "onde encontro o calendário acadêmico",
+        "calendário da graduação",
+        "onde fica o manual do aluno",
+        "datas do semestre letivo",
+    ],
+    4: [
+        "curso ead tem aula presencial",
+        "educação digital é totalmente online",
+        "preciso ir presencialmente no curso a distância",
+    ],
+    5: [
+        "diploma ead tem a mesma validade",
+        "diploma do curso a distância vale igual ao presencial",
+        "diploma ead é reconhecido",
+    ],
+    6: [
+        "quanto tempo preciso dedicar ao curso ead",
+        "curso a distância exige muita dedicação",
+        "carga de estudo na educação digital",
+    ],
+    7: [
+        "quando recebo acesso ao ambiente virtual de aprendizagem",
+        "depois do pagamento quando recebo o acesso",
+        "acesso ao ava após pagar o boleto",
+        "quanto tempo para liberar a plataforma de estudos",
+    ],
+    8: [
+        "como é o certificado da pós em parceria com a pucpr",
+        "certificado da pós-graduação pucpr",
+        "pós-graduação com a pucpr é reconhecida",
+    ],
+    9: [
+        "aluno ead pode usar o campus",
+        "posso frequentar os espaços físicos sendo aluno ead",
+        "aluno a distância pode ir na biblioteca do campus",
+    ],
+    10: [
+        "quais serviços a caa oferece",
+        "o que posso solicitar na central de atendimento ao aluno",
+        "como falar com a caa",
+        "como emitir documentos acadêmicos",
+    ],
+}
+
+# Palavras de pedido que não mudam o assunto ("quero", "como faço"); qualquer outro termo da
+# pergunta precisa aparecer na entrada ("nota mínima" não é "frequência mínima")
+TERMOS_NEUTROS = set(tokenizar(
+    "quero queria gostaria preciso posso pode consigo faço fazer faz fiz vejo ver fica sou estou "
+    "tenho ter saber sei todo toda todos todas muito ajuda favor dúvida"
+))
+
+PADRAO_SECAO = re.compile(r"^##\s+(?!#)(.+?)\s*$", re.MULTILINE)
+PADRAO_PERGUNTA = re.compile(r"^###\s+(\d+)\.\s+(.+?)\s*$", re.MULTILINE)
+
+
+@dataclass
+class EntradaFAQ:
+    """Uma pergunta frequente do PROMPT com resposta e paráfrases"""
+    numero: int
+    secao: str
+    pergunta: str
+    resposta: str
+    parafrases: List[str] = field(default_factory=list)
+
+
+def extrair_entradas(prompt: str) -> List[EntradaFAQ]:
+    """Lê as entradas "### N. Pergunta" do PROMPT e suas respostas"""
+    secoes = [(m.start(), m.group(1)) for m in PADRAO_SECAO.finditer(prompt)]
+    perguntas = list(PADRAO_PERGUNTA.finditer(prompt))
+    entradas = []
+    for i, m in enumerate(perguntas):
+        fim = perguntas[i + 1].start() if i + 1 < len(perguntas) else len(prompt)
+        corpo = prompt[m.end():fim]
+        # A resposta termina no separador "---" ou no próximo título de seção
+        corpo = re.split(r"^---\s*$|^##\s", corpo, maxsplit=1, flags=re.MULTILINE)[0]
+        secao = next((nome for inicio, nome in reversed(secoes) if inicio < m.start()), "")
+        numero = int(m.group(1))
+        entradas.append(EntradaFAQ(
+            numero=numero,
+            secao=secao,
+            pergunta=m.group(2),
+            resposta="\n".join(linha.rstrip() for linha in corpo.strip().splitlines()),
+            parafrases=PARAFRASES.get(numero, []),
+        ))
+    return entradas
+
+
+class IndiceFAQ:
+    """Índice TF-IDF sobre as perguntas e paráfrases do FAQ"""
+
+    def __init__(self, entradas: List[EntradaFAQ], limiar: float = LIMIAR_FAQ, margem: float = MARGEM_FAQ):
+        self.entradas = {e.numero: e for e in entradas}
+        self.limiar = limiar
+        self.margem = margem
+        # Termos que cada entrada cobre: pergunta, paráfrases e resposta
+        self._vocabulario = {
+            e.numero: set(tokenizar(" ".join([e.pergunta, *e.parafrases, e.resposta]))) | TERMOS_NEUTROS
+            for e in entradas
+        }
+        self._lock = threading.Lock()
+        self._metricas = {"consultas": 0, "acertos": 0, "tempo_total_ms": 0.0}
+
+        textos = [(e.numero, t) for e in entradas for t in [e.pergunta, *e.parafrases]]
+        documentos = [(numero, Counter(tokenizar(t))) for numero, t in textos]
+        frequencia_doc = Counter(termo for _, termos in documentos for termo in termos)
+        total = len(documentos)
+        self.idf = {termo: math.log((1 + total) / (1 + df)) + 1 for termo, df in frequencia_doc.items()}
+        self._vetores = [(numero, self._vetor(termos)) for numero, termos in documentos]
+
+    @classmethod
+    def do_prompt(cls, prompt: str, limiar: float = LIMIAR_FAQ, margem: float = MARGEM_FAQ):
+        return cls(extrair_entradas(prompt), limiar, margem)
+
+    def _vetor(self, termos: Counter) -> Dict[str, float]:
+        vetor = {t: (1 + math.log(n)) * self.idf.get(t, 0.0) for t, n in termos.items()}
+        norma = math.sqrt(sum(v * v for v in vetor.values())) or 1.0
+        return {t: v / norma for t, v in vetor.items()}
+
+    def _pontuar(self, termos: Counter) -> List[Tuple[int, float]]:
+        """Melhor similaridade (cosseno) de cada entrada, da maior para a menor"""
+        consulta = self._vetor(termos)
+        por_entrada = {}
+        for numero, vetor in self._vetores:
+            score = sum(peso * vetor.get(termo, 0.0) for termo, peso in consulta.items())
+            if score > por_entrada.get(numero, 0.0):
+                por_entrada[numero] = score
+        return sorted(por_entrada.items(), key=lambda item: item[1], reverse=True)
+
+    def buscar(self, pergunta: str) -> Tuple[Optional[EntradaFAQ], float]:
+        """Entrada mais parecida e a similaridade (cosseno), sem aplicar o limiar"""
+        ranking = self._pontuar(Counter(tokenizar(pergunta)))
+        if not ranking:
+            return None, 0.0
+        numero, score = ranking[0]
+        return self.entradas[numero], score
+
+    def responder(self, pergunta: str, limiar: Optional[float] = None,
+                  margem: Optional[float] = None) -> Optional[EntradaFAQ]:
+        """
+        Retorna a entrada só com alta confiança; registra as métricas.
+
+        Exige similaridade acima do limiar, folga sobre a segunda entrada e que todos os termos
+        da pergunta (fora os de TERMOS_NEUTROS) apareçam na entrada escolhida.
+        """
+        inicio = time.perf_counter()
+        termos = Counter(tokenizar(pergunta))
+        ranking = self._pontuar(termos)
+        entrada, acerto = None, False
+        if ranking:
+            numero, score = ranking[0]
+            segundo = ranking[1][1] if len(ranking) > 1 else 0.0
+            entrada = self.entradas[numero]
+            acerto = (
+                score >= (self.limiar if limiar is None else limiar)
+                and score - segundo >= (self.margem if margem is None else margem)
+                and all(termo in self._vocabulario[numero] for termo in termos)
+            )
+        with self._lock:
+            self._metricas["consultas"] += 1
+            self._metricas["acertos"] += int(acerto)
+            self._metricas["tempo_total_ms"] += (time.perf_counter() - inicio) * 1000
+        return entrada if acerto else None
+
+    def metricas(self):
+        """Consultas, acertos, taxa de acerto e latência média"""
+        with self._lock:
+            metricas = dict(self._metricas)
+        consultas = metricas["consultas"]
+        metricas["taxa_acerto"] = metricas["acertos"] / consultas if consultas else 0.0
+        metricas["latencia_media_ms"] = metricas["tempo_total_ms"] / consultas if consultas else 0.0
+        return metricas
+
+
+def formatar_resposta(entrada: EntradaFAQ, nome: Optional[str] = None) -> str:
+    """Resposta do FAQ, opcionalmente com saudação pelo primeiro nome"""
+    if FAQ_PERSONALIZAR and nome and nome != "Usuário":
+        return f"Olá, {nome.split()[0]}! {entrada.resposta}"
+    return entrada.resposta
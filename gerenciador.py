@@ -10,12 +10,13 @@ st.set_page_config(
     layout="wide"
 )
 
-# Verificar estado de login
+# As páginas são módulos importados uma única vez por processo (ficam em sys.modules);
+# nos reruns só a função da página é executada
 if "usuario_logado" not in st.session_state:
     # Se não estiver logado, mostrar página de login
-    with open("trabalho.py", "r", encoding="utf-8") as f:
-        exec(f.read())
+    from trabalho import pagina_login
+    pagina_login()
 else:
     # Se estiver logado, mostrar chat
-    with open("chatUI.py", "r", encoding="utf-8") as f:
-        exec(f.read())
\ No newline at end of file
+    from chatUI import pagina_chat
+    pagina_chat()
\ No newline at end of file
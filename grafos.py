@@ -1,56 +1,21 @@
-import networkx as nx
-import matplotlib.pyplot as plt
 import re
-from collections import Counter
 import streamlit as st
+from palavras_chave import LISTA_PALAVRAS_CHAVES, obter_extrator
+from coocorrencia import GrafoConversa
+from render_grafo import obter_renderizador
 
-# Lista de palavras-chave específicas para PUC Campinas
-LISTA_PALAVRAS_CHAVES = [
-    # Cursos e áreas acadêmicas
-    "curso", "cursos", "graduação", "pós-graduação", "mestrado", "doutorado",
-    "engenharia", "direito", "medicina", "psicologia", "administração", "economia",
-    "arquitetura", "design", "comunicação", "jornalismo", "publicidade", "marketing",
-    
-    # Processo seletivo e ingresso
-    "vestibular", "enem", "sisu", "prouni", "fies", "nota", "notas", "prova", "provas",
-    "inscrição", "inscrições", "matrícula", "rematrícula", "transferência", "transferências",
-    
-    # Estrutura acadêmica
-    "campus", "laboratório", "laboratórios", "biblioteca", "sala", "salas", "auditório",
-    "restaurante", "cantina", "estacionamento", "quadra", "ginásio",
-    
-    # Ensino e aprendizagem
-    "disciplina", "disciplinas", "matéria", "matérias", "professor", "professores",
-    "aula", "aulas", "presencial", "ead", "online", "distância", "híbrido",
-    "nota", "média", "frequência", "aprovação", "reprovação", "dp",
-    
-    # Documentos e serviços
-    "histórico", "diploma", "certificado", "declaração", "atestado", "comprovante",
-    "boleto", "mensalidade", "taxa", "desconto", "bolsa", "financiamento",
-    
-    # Apoio ao estudante
-    "caa", "atendimento", "secretaria", "ouvidoria", "monitoria", "estágio", "tcc",
-    "iniciação", "científica", "pesquisa", "extensão", "intercâmbio",
-    
-    # Tecnologia e sistemas
-    "portal", "sistema", "login", "senha", "email", "plataforma", "ambiente", "virtual",
-    
-    # Localização e contato
-    "campinas", "endereço", "telefone", "contato", "horário", "funcionamento",
-    
-    # Outros termos relevantes
-    "aluno", "aluna", "estudante", "universitário", "acadêmico", "semestre", "período"
-]
 
 def limpar_texto(texto):
     """Remove pontuações e transforma em minúsculas"""
     return re.sub(r"[^\w\s]", "", texto.lower())
 
-def extrair_palavras_chave(texto, lista_palavras):
-    """Extrai palavras-chave do texto que estão na lista"""
-    texto_limpo = limpar_texto(texto)
-    palavras_texto = texto_limpo.split()
-    return [palavra for palavra in palavras_texto if palavra in lista_palavras]
+def extrair_palavras_chave(texto, lista_palavras=LISTA_PALAVRAS_CHAVES):
+    """Extrai palavras-chave do texto que estão na lista (ignora acentos, hífens e plurais)"""
+    return obter_extrator(lista_palavras).extrair(texto)
+
+def extrair_palavras_chave_lote(textos, lista_palavras=LISTA_PALAVRAS_CHAVES):
+    """Extrai as palavras-chave de várias mensagens de uma vez"""
+    return obter_extrator(lista_palavras).extrair_lote(textos)
 
 def criar_grafo_conversa(mensagens_chat, lista_palavras_chaves=None):
     """
@@ -67,13 +32,14 @@ def criar_grafo_conversa(mensagens_chat, lista_palavras_chaves=None):
     if lista_palavras_chaves is None:
         lista_palavras_chaves = LISTA_PALAVRAS_CHAVES
     
+    import networkx as nx
     G = nx.Graph()
     todas_palavras = []
     
+    conteudos = [mensagem.get("content", "") for mensagem in mensagens_chat]
+    
     # Processar cada mensagem
-    for mensagem in mensagens_chat:
-        conteudo = mensagem.get("content", "")
-        palavras_encontradas = extrair_palavras_chave(conteudo, lista_palavras_chaves)
+    for palavras_encontradas in extrair_palavras_chave_lote(conteudos, lista_palavras_chaves):
         todas_palavras.extend(palavras_encontradas)
         
         # Adicionar nós e arestas baseados na coocorrência
@@ -89,73 +55,57 @@ def criar_grafo_conversa(mensagens_chat, lista_palavras_chaves=None):
     
     return G, todas_palavras
 
-def plotar_grafo_conversa(chat_messages):
+def _estado_grafo(chat_messages, estado=None):
+    """Estado incremental do chat, ou um estado montado a partir das mensagens"""
+    if estado is None:
+        estado = GrafoConversa.de_mensagens(chat_messages or [])
+    return estado
+
+def plotar_grafo_conversa(chat_messages, estado=None, chave=None):
     """
     Plota o grafo das palavras-chave da conversa atual usando Streamlit
     
     Args:
         chat_messages: lista de mensagens do chat atual
+        estado: GrafoConversa já atualizado do chat (opcional, evita reprocessar as mensagens)
+        chave: id do chat; reaproveita as posições do layout anterior quando o grafo cresce
     """
-    if not chat_messages:
+    if not chat_messages and (estado is None or not estado.mensagens):
         st.warning("⚠️ Nenhuma mensagem encontrada no chat atual!")
         return
     
     # Criar grafo
-    G, palavras_encontradas = criar_grafo_conversa(chat_messages)
+    estado = _estado_grafo(chat_messages, estado)
     
-    if not G.nodes():
+    if not estado.frequencias:
         st.warning("⚠️ Nenhuma palavra-chave relevante encontrada na conversa!")
         return
     
     # Estatísticas
-    contador_palavras = Counter(palavras_encontradas)
-    
-    # Criar visualização
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-    
-    # Grafo de palavras-chave
-    pos = nx.spring_layout(G, k=1, iterations=50)
-    
-    # Tamanho dos nós baseado na frequência
-    node_sizes = [contador_palavras[node] * 300 for node in G.nodes()]
+    contador_palavras = estado.frequencias
+    
+    # Imagem em cache pelo conteúdo; só os nós e arestas mais fortes são desenhados
+    renderizacao = obter_renderizador().renderizar(estado, chave)
+    st.image(renderizacao.imagem, use_container_width=True)
+    legenda = f"Exibindo {renderizacao.nos} de {len(contador_palavras)} termos · "
+    if renderizacao.do_cache:
+        legenda += "imagem em cache"
+    else:
+        legenda += f"renderizado em {renderizacao.tempo_ms:.0f} ms"
+        if renderizacao.memoria_pico_kb is not None:
+            legenda += f" · pico de memória {renderizacao.memoria_pico_kb:.0f} KB"
+    st.caption(legenda)
     
-    # Espessura das arestas baseada no peso
-    edge_weights = [G[u][v].get('weight', 1) for u, v in G.edges()]
-    
-    nx.draw(G, pos, ax=ax1, 
-            with_labels=True, 
-            node_color='lightblue',
-            node_size=node_sizes,
-            font_size=8,
-            font_weight='bold',
-            edge_color='gray',
-            width=[w * 0.5 for w in edge_weights])
-    
-    ax1.set_title(f"Grafo de Palavras-chave\n({len(G.nodes())} termos encontrados)", 
-                  fontsize=12, fontweight='bold')
-    
-    # Gráfico de barras das palavras mais frequentes
     palavras_top = contador_palavras.most_common(10)
-    if palavras_top:
-        palavras, frequencias = zip(*palavras_top)
-        ax2.barh(range(len(palavras)), frequencias, color='lightcoral')
-        ax2.set_yticks(range(len(palavras)))
-        ax2.set_yticklabels(palavras)
-        ax2.set_xlabel('Frequência')
-        ax2.set_title('Top 10 Palavras-chave', fontsize=12, fontweight='bold')
-        ax2.invert_yaxis()
-    
-    plt.tight_layout()
-    st.pyplot(fig)
     
     # Mostrar estatísticas
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Palavras-chave únicas", len(G.nodes()))
+        st.metric("Palavras-chave únicas", len(estado.frequencias))
     with col2:
-        st.metric("Conexões", len(G.edges()))
+        st.metric("Conexões", len(estado.pesos))
     with col3:
-        st.metric("Total de ocorrências", len(palavras_encontradas))
+        st.metric("Total de ocorrências", estado.total_ocorrencias)
     
     # Mostrar palavras mais relevantes
     if palavras_top:
@@ -163,52 +113,44 @@ def plotar_grafo_conversa(chat_messages):
         for palavra, freq in palavras_top[:5]:
             st.write(f"• **{palavra}**: {freq} ocorrência(s)")
 
-def obter_estatisticas_conversa(chat_messages):
+def obter_estatisticas_conversa(chat_messages, estado=None):
     """
     Retorna estatísticas básicas da conversa
     
     Args:
         chat_messages: lista de mensagens do chat atual
+        estado: GrafoConversa já atualizado do chat (opcional)
     
     Returns:
         dict: dicionário com estatísticas
     """
-    if not chat_messages:
+    if not chat_messages and (estado is None or not estado.mensagens):
         return {}
     
-    G, palavras_encontradas = criar_grafo_conversa(chat_messages)
-    contador_palavras = Counter(palavras_encontradas)
-    
-    return {
-        "total_mensagens": len(chat_messages),
-        "palavras_unicas": len(G.nodes()),
-        "total_palavras_chave": len(palavras_encontradas),
-        "conexoes": len(G.edges()),
-        "palavra_mais_frequente": contador_palavras.most_common(1)[0] if contador_palavras else None,
-        "top_5_palavras": contador_palavras.most_common(5)
-    }
+    return _estado_grafo(chat_messages, estado).estatisticas()
 
-def exportar_dados_grafo(chat_messages, formato="json"):
+def exportar_dados_grafo(chat_messages, formato="json", estado=None):
     """
     Exporta dados do grafo em diferentes formatos
     
     Args:
         chat_messages: lista de mensagens do chat atual
-        formato: "json", "csv" ou "txt"
+        formato: "json", "csv", "txt", "ndjson" ou "graphml"
+        estado: GrafoConversa já atualizado do chat (opcional)
     
     Returns:
-        str: dados formatados
+        str: dados formatados (para arquivos grandes ou Parquet use exportar_grafo.exportar)
     """
-    G, palavras_encontradas = criar_grafo_conversa(chat_messages)
-    contador_palavras = Counter(palavras_encontradas)
+    estado = _estado_grafo(chat_messages, estado)
+    contador_palavras = estado.frequencias
     
     if formato == "json":
         import json
         dados = {
-            "nos": list(G.nodes()),
-            "arestas": list(G.edges()),
+            "nos": list(contador_palavras),
+            "arestas": [[a, b, peso] for a, b, peso in estado.iter_arestas()],
             "frequencias": dict(contador_palavras),
-            "estatisticas": obter_estatisticas_conversa(chat_messages)
+            "estatisticas": obter_estatisticas_conversa(chat_messages, estado) if estado.mensagens else {}
         }
         return json.dumps(dados, indent=2, ensure_ascii=False)
     
@@ -225,13 +167,18 @@ def exportar_dados_grafo(chat_messages, formato="json"):
     elif formato == "txt":
         resultado = "ANÁLISE DA CONVERSA\n"
         resultado += "=" * 50 + "\n\n"
-        resultado += f"Total de palavras-chave únicas: {len(G.nodes())}\n"
-        resultado += f"Total de conexões: {len(G.edges())}\n"
-        resultado += f"Total de ocorrências: {len(palavras_encontradas)}\n\n"
+        resultado += f"Total de palavras-chave únicas: {len(contador_palavras)}\n"
+        resultado += f"Total de conexões: {len(estado.pesos)}\n"
+        resultado += f"Total de ocorrências: {estado.total_ocorrencias}\n\n"
         resultado += "PALAVRAS MAIS FREQUENTES:\n"
         resultado += "-" * 30 + "\n"
         for palavra, freq in contador_palavras.most_common(10):
             resultado += f"{palavra}: {freq} ocorrência(s)\n"
         return resultado
     
+    elif formato in ("ndjson", "graphml"):
+        from exportar_grafo import linhas_graphml, linhas_ndjson
+        linhas = linhas_ndjson(estado) if formato == "ndjson" else linhas_graphml(estado)
+        return "".join(linhas)
+    
     return ""
\ No newline at end of file
@@ -0,0 +1,185 @@
+# importar_usuarios.py - Importação em lote de usuários a partir do CSV da secretaria (início de semestre)
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from usuarios import criar_hash_senha, montar_documento_usuario, validar_email
+
+PROCESSOS = int(os.getenv("IMPORTACAO_PROCESSOS") or os.cpu_count() or 1)
+TAMANHO_LOTE = int(os.getenv("IMPORTACAO_TAMANHO_LOTE") or 1000)
+
+# Cabeçalhos aceitos no CSV -> campo do cadastro
+COLUNAS = {
+    "nome": "nome", "nome_completo": "nome",
+    "email": "email", "e-mail": "email",
+    "senha": "senha",
+    "tipo": "tipo_usuario", "tipo_usuario": "tipo_usuario",
+    "ra": "ra", "curso": "curso", "departamento": "departamento",
+}
+TIPOS_USUARIO = ("estudante", "professor", "funcionario")
+ERRO_CHAVE_DUPLICADA = 11000
+
+
+def preparar_lote(linhas):
+    """
+    Executado nos processos do pool: valida as linhas e calcula o hash das senhas.
+
+    Args:
+        linhas: lista de (número da linha no CSV, dict com os campos do cadastro)
+
+    Returns:
+        tuple: ([(número, documento)], [(número, email, motivo)])
+    """
+    documentos, falhas = [], []
+    for numero, campos in linhas:
+        email = campos.get("email", "")
+        tipo_usuario = campos.get("tipo_usuario") or "estudante"
+        if not campos.get("nome"):
+            falhas.append((numero, email, "nome vazio"))
+        elif not validar_email(email):
+            falhas.append((numero, email, "email institucional inválido"))
+        elif not campos.get("senha"):
+            falhas.append((numero, email, "senha vazia"))
+        elif tipo_usuario not in TIPOS_USUARIO:
+            falhas.append((numero, email, f"tipo de usuário desconhecido: {tipo_usuario}"))
+        else:
+            documentos.append((numero, montar_documento_usuario(
+                campos["nome"], email, criar_hash_senha(campos["senha"]), tipo_usuario,
+                ra=campos.get("ra") or None,
+                curso=campos.get("curso") or None,
+                departamento=campos.get("departamento") or None,
+            )))
+    return documentos, falhas
+
+
+def ler_csv(caminho, tamanho_lote):
+    """Lê o CSV aos poucos; gera lotes de (número da linha, campos)"""
+    with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+        leitor = csv.DictReader(arquivo)
+        colunas = {nome: COLUNAS.get(nome.strip().lower()) for nome in leitor.fieldnames or []}
+        if "email" not in colunas.values():
+            raise ValueError(f"O CSV precisa de uma coluna de email; colunas encontradas: {leitor.fieldnames}")
+        lote = []
+        for linha in leitor:
+            campos = {
+                colunas[nome]: (valor or "").strip()
+                for nome, valor in linha.items() if colunas.get(nome)
+            }
+            lote.append((leitor.line_num, campos))
+            if len(lote) >= tamanho_lote:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+
+
+def _gravar(colecao, documentos):
+    """insert_many não ordenado; duplicados são rejeitados pelo índice único de email"""
+    from pymongo.errors import BulkWriteError
+    if not documentos:
+        return 0, []
+    numeros = [numero for numero, _ in documentos]
+    try:
+        resultado = colecao.insert_many([documento for _, documento in documentos], ordered=False)
+        return len(resultado.inserted_ids), []
+    except BulkWriteError as e:
+        falhas = []
+        for erro in e.details.get("writeErrors", []):
+            documento = documentos[erro["index"]][1]
+            motivo = "email já cadastrado" if erro.get("code") == ERRO_CHAVE_DUPLICADA else erro.get("errmsg", "")
+            falhas.append((numeros[erro["index"]], documento["email"], motivo))
+        return e.details.get("nInserted", 0), falhas
+
+
+def importar(caminho, processos=PROCESSOS, tamanho_lote=TAMANHO_LOTE, gravar=True, progresso=True):
+    """
+    Importa os usuários do CSV: validação e hash em paralelo, gravação em lotes.
+
+    Args:
+        caminho: CSV com cabeçalho (nome, email, senha e, opcionalmente, ra, curso, tipo, departamento)
+        gravar: False só valida e calcula os hashes (ensaio, sem acessar o banco)
+
+    Returns:
+        dict: resumo com linhas lidas, inseridas, falhas por linha e vazão
+    """
+    inicio = time.perf_counter()
+    colecao = None
+    if gravar:
+        from banco import conectar_mongodb, verificar_indices
+        db = conectar_mongodb()
+        # Sem o índice único a deduplicação não acontece: melhor parar do que duplicar usuários
+        if "usuarios" in verificar_indices(db):
+            raise RuntimeError("Índice único de email ausente em 'usuarios'; execute python banco.py migrar")
+        colecao = db["usuarios"]
+
+    resumo = {"linhas": 0, "inseridos": 0, "falhas": []}
+    ultimo_progresso = inicio
+
+    def concluir(documentos, falhas):
+        nonlocal ultimo_progresso
+        inseridos, falhas_gravacao = _gravar(colecao, documentos) if gravar else (len(documentos), [])
+        resumo["inseridos"] += inseridos
+        resumo["falhas"].extend(falhas + falhas_gravacao)
+        agora = time.perf_counter()
+        # Progresso no máximo uma vez por segundo
+        if progresso and agora - ultimo_progresso >= 1:
+            ultimo_progresso = agora
+            decorrido = agora - inicio
+            print(f"{resumo['linhas']} linhas lidas, {resumo['inseridos']} {'inseridas' if gravar else 'válidas'}, "
+                  f"{len(resumo['falhas'])} falhas ({resumo['linhas'] / decorrido:.0f} linhas/s)")
+
+    if processos <= 1:
+        for lote in ler_csv(caminho, tamanho_lote):
+            resumo["linhas"] += len(lote)
+            concluir(*preparar_lote(lote))
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            pendentes = set()
+            for lote in ler_csv(caminho, tamanho_lote):
+                resumo["linhas"] += len(lote)
+                pendentes.add(pool.submit(preparar_lote, lote))
+                # Limita os lotes em memória: no máximo dois por processo
+                if len(pendentes) >= 2 * processos:
+                    prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        concluir(*futuro.result())
+            for futuro in pendentes:
+                concluir(*futuro.result())
+
+    duracao = time.perf_counter() - inicio
+    resumo["falhas"].sort()
+    resumo["tempo_s"] = duracao
+    resumo["linhas_por_s"] = resumo["linhas"] / duracao if duracao else 0.0
+    return resumo
+
+
+def salvar_falhas(falhas, caminho):
+    with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(["linha", "email", "motivo"])
+        escritor.writerows(falhas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa usuários em lote a partir de um CSV")
+    parser.add_argument("csv", help="arquivo CSV com cabeçalho (nome, email, senha, ra, curso, tipo, departamento)")
+    parser.add_argument("--processos", type=int, default=PROCESSOS)
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE, help="linhas por lote (pool e insert_many)")
+    parser.add_argument("--falhas", help="CSV com as linhas rejeitadas (padrão: <csv>.falhas.csv)")
+    parser.add_argument("--ensaio", action="store_true", help="só valida e calcula os hashes, sem gravar")
+    args = parser.parse_args()
+
+    resumo = importar(args.csv, args.processos, args.lote, gravar=not args.ensaio)
+    print(f"Concluído: {resumo['linhas']} linhas, {resumo['inseridos']} "
+          f"{'válidas' if args.ensaio else 'inseridas'}, {len(resumo['falhas'])} falhas "
+          f"em {resumo['tempo_s']:.1f}s ({resumo['linhas_por_s']:.0f} linhas/s)")
+    if resumo["falhas"]:
+        caminho_falhas = args.falhas or f"{args.csv}.falhas.csv"
+        salvar_falhas(resumo["falhas"], caminho_falhas)
+        for numero, email, motivo in resumo["falhas"][:10]:
+            print(f"  linha {numero}: {email or '(sem email)'} - {motivo}")
+        if len(resumo["falhas"]) > 10:
+            print(f"  ... {len(resumo['falhas']) - 10} outras")
+        print(f"Falhas por linha em {caminho_falhas}")
+    raise SystemExit(1 if resumo["falhas"] else 0)
@@ -0,0 +1,388 @@
+# manual_aluno.py - Base de conhecimento do manual do aluno (índice invertido local, mapeado em memória)
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import List
+import numpy as np
+from texto import tokenizar
+
+MANUAL_ATIVO = os.getenv("MANUAL_ATIVO", "1") != "0"
+PASTA_MANUAL = os.getenv("MANUAL_PASTA", "manual_aluno")
+PASTA_INDICE = os.getenv("MANUAL_INDICE", ".indice_manual")
+MANUAL_TOP_K = int(os.getenv("MANUAL_TOP_K") or 4)
+
+PALAVRAS_POR_TRECHO = 120
+SOBREPOSICAO = 30
+EXTENSOES = (".md", ".markdown", ".txt", ".pdf")
+VERSOES_MANTIDAS = 2
+SEPARADOR_SECAO = "\x1f"
+
+# Parâmetros do BM25
+K1 = 1.5
+B = 0.75
+
+PADRAO_TITULO_MD = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+
+
+@dataclass
+class Trecho:
+    """Passagem do manual devolvida pela busca"""
+    texto: str
+    fonte: str
+    secao: str
+    pontuacao: float = 0.0
+
+
+# ---------------------------------------------------------------------------
+# Leitura e divisão dos documentos
+# ---------------------------------------------------------------------------
+
+def _secoes_markdown(conteudo):
+    """Divide o markdown pelos títulos: [(título, texto)]"""
+    titulos = list(PADRAO_TITULO_MD.finditer(conteudo))
+    if not titulos:
+        return [("", conteudo)]
+    secoes = [("", conteudo[:titulos[0].start()])]
+    for i, m in enumerate(titulos):
+        fim = titulos[i + 1].start() if i + 1 < len(titulos) else len(conteudo)
+        secoes.append((m.group(1), conteudo[m.end():fim]))
+    return secoes
+
+
+def _secoes_pdf(caminho):
+    """Uma seção por página; o suporte a PDF depende do pacote opcional pypdf"""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        print(f"Aviso: instale 'pypdf' para indexar PDFs ({caminho} ignorado)")
+        return []
+    leitor = PdfReader(caminho)
+    return [(f"página {i}", pagina.extract_text() or "") for i, pagina in enumerate(leitor.pages, 1)]
+
+
+def _janelas(texto, tamanho=PALAVRAS_POR_TRECHO, sobreposicao=SOBREPOSICAO):
+    palavras = texto.split()
+    passo = tamanho - sobreposicao
+    for inicio in range(0, max(len(palavras) - sobreposicao, 1), passo):
+        janela = palavras[inicio:inicio + tamanho]
+        if janela:
+            yield " ".join(janela)
+
+
+def dividir_em_trechos(caminho):
+    """Lê um arquivo e retorna seus trechos com os termos já contados"""
+    if caminho.lower().endswith(".pdf"):
+        secoes = _secoes_pdf(caminho)
+    else:
+        with open(caminho, "r", encoding="utf-8", errors="replace") as f:
+            conteudo = f.read()
+        secoes = _secoes_markdown(conteudo) if caminho.lower().endswith((".md", ".markdown")) else [("", conteudo)]
+
+    trechos = []
+    for secao, texto in secoes:
+        for janela in _janelas(texto):
+            termos = Counter(tokenizar(f"{secao} {janela}"))
+            if termos:
+                trechos.append({"secao": secao, "texto": janela, "termos": dict(termos)})
+    return trechos
+
+
+# ---------------------------------------------------------------------------
+# Indexação incremental
+# ---------------------------------------------------------------------------
+
+def _assinatura(caminho):
+    info = os.stat(caminho)
+    return [info.st_mtime_ns, info.st_size]
+
+
+def _arquivo_cache(pasta_indice, relativo):
+    nome = hashlib.sha1(relativo.encode("utf-8")).hexdigest()
+    return os.path.join(pasta_indice, "arquivos", f"{nome}.json")
+
+
+def _listar_documentos(pasta):
+    documentos = []
+    for raiz, _, arquivos in os.walk(pasta):
+        for nome in arquivos:
+            if nome.lower().endswith(EXTENSOES):
+                caminho = os.path.join(raiz, nome)
+                documentos.append((os.path.relpath(caminho, pasta).replace(os.sep, "/"), caminho))
+    return sorted(documentos)
+
+
+def _ler_json(caminho, padrao):
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return padrao
+
+
+def _gravar_json(caminho, dados):
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def indexar(pasta=PASTA_MANUAL, pasta_indice=PASTA_INDICE):
+    """
+    Atualiza o índice: só arquivos novos ou alterados são lidos e divididos de novo.
+
+    Returns:
+        dict: estatísticas da indexação
+    """
+    inicio = time.perf_counter()
+    os.makedirs(os.path.join(pasta_indice, "arquivos"), exist_ok=True)
+    caminho_manifesto = os.path.join(pasta_indice, "manifesto.json")
+    manifesto = _ler_json(caminho_manifesto, {})
+    novo_manifesto = {}
+    reprocessados = 0
+
+    # 1) Trechos por arquivo, reaproveitando o cache dos que não mudaram
+    trechos_por_arquivo = []
+    for relativo, caminho in _listar_documentos(pasta):
+        assinatura = _assinatura(caminho)
+        cache = _arquivo_cache(pasta_indice, relativo)
+        trechos = None
+        if manifesto.get(relativo) == assinatura:
+            trechos = _ler_json(cache, None)
+        if trechos is None:
+            trechos = dividir_em_trechos(caminho)
+            _gravar_json(cache, trechos)
+            reprocessados += 1
+        novo_manifesto[relativo] = assinatura
+        trechos_por_arquivo.append((relativo, trechos))
+
+    removidos = [relativo for relativo in manifesto if relativo not in novo_manifesto]
+    for relativo in removidos:
+        try:
+            os.remove(_arquivo_cache(pasta_indice, relativo))
+        except OSError:
+            pass
+
+    # 2) Listas invertidas (junção linear dos caches, sem reler os documentos)
+    postings = {}
+    tamanhos, fontes, trecho_fonte, textos = [], [], [], []
+    for indice_fonte, (relativo, trechos) in enumerate(trechos_por_arquivo):
+        fontes.append(relativo)
+        for trecho in trechos:
+            doc = len(tamanhos)
+            tamanhos.append(sum(trecho["termos"].values()))
+            trecho_fonte.append(indice_fonte)
+            textos.append(f"{trecho['secao']}{SEPARADOR_SECAO}{trecho['texto']}".encode("utf-8"))
+            for termo, quantidade in trecho["termos"].items():
+                postings.setdefault(termo, []).append((doc, quantidade))
+
+    vocabulario = sorted(postings)
+    posicoes_termos = np.zeros((len(vocabulario), 2), dtype=np.int64)
+    total_postings = sum(len(lista) for lista in postings.values())
+    postings_doc = np.empty(total_postings, dtype=np.uint32)
+    postings_tf = np.empty(total_postings, dtype=np.uint16)
+    cursor = 0
+    for i, termo in enumerate(vocabulario):
+        lista = postings[termo]
+        posicoes_termos[i] = (cursor, len(lista))
+        postings_doc[cursor:cursor + len(lista)] = [doc for doc, _ in lista]
+        postings_tf[cursor:cursor + len(lista)] = [min(tf, 65535) for _, tf in lista]
+        cursor += len(lista)
+
+    posicoes_textos = np.zeros((len(textos), 2), dtype=np.int64)
+    deslocamento = 0
+    for i, texto in enumerate(textos):
+        posicoes_textos[i] = (deslocamento, len(texto))
+        deslocamento += len(texto)
+
+    # 3) Grava uma nova versão e troca o ponteiro atomicamente
+    versao = f"v{time.time_ns()}"
+    pasta_versao = os.path.join(pasta_indice, versao)
+    os.makedirs(pasta_versao)
+    with open(os.path.join(pasta_versao, "termos.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(vocabulario))
+    np.save(os.path.join(pasta_versao, "termos_pos.npy"), posicoes_termos)
+    np.save(os.path.join(pasta_versao, "postings_doc.npy"), postings_doc)
+    np.save(os.path.join(pasta_versao, "postings_tf.npy"), postings_tf)
+    np.save(os.path.join(pasta_versao, "tamanhos.npy"), np.asarray(tamanhos, dtype=np.uint32))
+    np.save(os.path.join(pasta_versao, "trecho_fonte.npy"), np.asarray(trecho_fonte, dtype=np.uint32))
+    np.save(os.path.join(pasta_versao, "textos_pos.npy"), posicoes_textos)
+    with open(os.path.join(pasta_versao, "textos.bin"), "wb") as f:
+        f.write(b"".join(textos))
+    _gravar_json(os.path.join(pasta_versao, "fontes.json"), fontes)
+
+    with open(os.path.join(pasta_indice, "ATUAL.tmp"), "w", encoding="utf-8") as f:
+        f.write(versao)
+    os.replace(os.path.join(pasta_indice, "ATUAL.tmp"), os.path.join(pasta_indice, "ATUAL"))
+    _gravar_json(caminho_manifesto, novo_manifesto)
+    _remover_versoes_antigas(pasta_indice)
+
+    return {
+        "arquivos": len(novo_manifesto),
+        "reprocessados": reprocessados,
+        "removidos": len(removidos),
+        "trechos": len(tamanhos),
+        "termos": len(vocabulario),
+        "tempo_s": time.perf_counter() - inicio,
+    }
+
+
+def _remover_versoes_antigas(pasta_indice):
+    versoes = sorted(
+        nome for nome in os.listdir(pasta_indice)
+        if nome.startswith("v") and os.path.isdir(os.path.join(pasta_indice, nome))
+    )
+    for nome in versoes[:-VERSOES_MANTIDAS]:
+        shutil.rmtree(os.path.join(pasta_indice, nome), ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Consulta
+# ---------------------------------------------------------------------------
+
+class IndiceManual:
+    """Índice carregado de disco; os arrays grandes ficam mapeados em memória (mmap)"""
+
+    def __init__(self, pasta_versao):
+        self.pasta_versao = pasta_versao
+        with open(os.path.join(pasta_versao, "termos.txt"), "r", encoding="utf-8") as f:
+            conteudo = f.read()
+        termos = conteudo.split("\n") if conteudo else []
+        self.vocabulario = {termo: i for i, termo in enumerate(termos)}
+
+        def carregar(nome):
+            return np.load(os.path.join(pasta_versao, nome), mmap_mode="r")
+
+        self.termos_pos = carregar("termos_pos.npy")
+        self.postings_doc = carregar("postings_doc.npy")
+        self.postings_tf = carregar("postings_tf.npy")
+        self.tamanhos = carregar("tamanhos.npy")
+        self.trecho_fonte = carregar("trecho_fonte.npy")
+        self.textos_pos = carregar("textos_pos.npy")
+        self.fontes = _ler_json(os.path.join(pasta_versao, "fontes.json"), [])
+        self.tamanho_medio = float(self.tamanhos.mean()) if len(self.tamanhos) else 0.0
+
+        self._arquivo_textos = open(os.path.join(pasta_versao, "textos.bin"), "rb")
+        tamanho = os.fstat(self._arquivo_textos.fileno()).st_size
+        self._textos = mmap.mmap(self._arquivo_textos.fileno(), 0, access=mmap.ACCESS_READ) if tamanho else b""
+
+    def _texto(self, doc):
+        inicio, tamanho = self.textos_pos[doc]
+        secao, _, texto = bytes(self._textos[inicio:inicio + tamanho]).decode("utf-8").partition(SEPARADOR_SECAO)
+        return secao, texto
+
+    def buscar(self, consulta, k=MANUAL_TOP_K) -> List[Trecho]:
+        """Os k trechos mais relevantes (BM25) com a fonte de cada um"""
+        total = len(self.tamanhos)
+        if total == 0:
+            return []
+        pontuacoes = np.zeros(total, dtype=np.float32)
+        for termo in set(tokenizar(consulta)):
+            i = self.vocabulario.get(termo)
+            if i is None:
+                continue
+            inicio, quantidade = (int(x) for x in self.termos_pos[i])
+            docs = self.postings_doc[inicio:inicio + quantidade]
+            tf = self.postings_tf[inicio:inicio + quantidade].astype(np.float32)
+            idf = math.log(1 + (total - quantidade + 0.5) / (quantidade + 0.5))
+            normalizacao = K1 * (1 - B + B * self.tamanhos[docs] / (self.tamanho_medio or 1.0))
+            pontuacoes[docs] += idf * tf * (K1 + 1) / (tf + normalizacao)
+
+        k = min(k, total)
+        melhores = np.argpartition(-pontuacoes, k - 1)[:k]
+        melhores = melhores[np.argsort(-pontuacoes[melhores])]
+        trechos = []
+        for doc in melhores:
+            if pontuacoes[doc] <= 0:
+                break
+            secao, texto = self._texto(doc)
+            trechos.append(Trecho(
+                texto=texto,
+                fonte=self.fontes[self.trecho_fonte[doc]],
+                secao=secao,
+                pontuacao=float(pontuacoes[doc]),
+            ))
+        return trechos
+
+
+_indice = None
+_indice_versao = None
+_indice_lock = threading.Lock()
+
+
+def versao_atual(pasta_indice=PASTA_INDICE):
+    """Pasta da versão publicada do índice, ou None se ainda não houver índice"""
+    try:
+        with open(os.path.join(pasta_indice, "ATUAL"), "r", encoding="utf-8") as f:
+            return os.path.join(pasta_indice, f.read().strip())
+    except OSError:
+        return None
+
+
+def manual_disponivel(pasta_indice=PASTA_INDICE):
+    """Se a tool deve ser registrada: MANUAL_ATIVO e um índice já publicado (comando indexar)"""
+    return MANUAL_ATIVO and versao_atual(pasta_indice) is not None
+
+
+def obter_indice_manual(pasta_indice=PASTA_INDICE):
+    """Índice atual do processo; recarrega quando uma nova versão é publicada
+
+    Nunca indexa no caminho da requisição: sem versão publicada retorna None
+    (o índice é criado por "python manual_aluno.py indexar")."""
+    global _indice, _indice_versao
+    versao = versao_atual(pasta_indice)
+    if versao is None:
+        return None
+    if versao != _indice_versao:
+        with _indice_lock:
+            if versao != _indice_versao:
+                _indice = IndiceManual(versao)
+                _indice_versao = versao
+    return _indice
+
+
+def manual_aluno_conhecimento(consulta: str) -> str:
+    """Consulta o Manual do Aluno da PUC-Campinas e retorna os trechos mais relevantes com a fonte.
+
+    Args:
+        consulta: dúvida do usuário ou palavras-chave sobre regras acadêmicas, calendário, serviços etc.
+    """
+    indice = obter_indice_manual()
+    trechos = indice.buscar(consulta) if indice else []
+    if not trechos:
+        return "Nenhum trecho do manual do aluno encontrado para esta consulta."
+    partes = []
+    for i, trecho in enumerate(trechos, 1):
+        origem = f"{trecho.fonte} — {trecho.secao}" if trecho.secao else trecho.fonte
+        partes.append(f"[{i}] ({origem})\n{trecho.texto}")
+    return "\n\n".join(partes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice local do manual do aluno")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    sub.add_parser("indexar", help="indexa (incrementalmente) os arquivos de MANUAL_PASTA")
+    consultar = sub.add_parser("consultar", help="busca trechos no índice")
+    consultar.add_argument("consulta")
+    consultar.add_argument("-k", type=int, default=MANUAL_TOP_K)
+    args = parser.parse_args()
+
+    if args.comando == "indexar":
+        print(indexar())
+    else:
+        inicio = time.perf_counter()
+        indice = obter_indice_manual()
+        carregado = time.perf_counter()
+        trechos = indice.buscar(args.consulta, args.k) if indice else []
+        fim = time.perf_counter()
+        print(f"carga: {(carregado - inicio) * 1000:.1f} ms | consulta: {(fim - carregado) * 1000:.2f} ms")
+        for trecho in trechos:
+            print(f"\n[{trecho.pontuacao:.2f}] {trecho.fonte} — {trecho.secao}\n{trecho.texto}")
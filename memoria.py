@@ -0,0 +1,123 @@
+# memoria.py - Política de memória da conversa (janela de turnos + resumo acumulado)
+import os
+from dataclasses import dataclass, replace
+from typing import List, Optional
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    UserPromptPart,
+)
+
+PREFIXO_RESUMO = "Resumo da conversa até aqui (turnos anteriores):\n"
+
+
+@dataclass(frozen=True)
+class PoliticaMemoria:
+    """Quantos turnos/tokens manter literalmente antes de resumir os mais antigos"""
+    max_turnos: int = 10
+    max_tokens: int = 4000
+    # Depois de resumir, a janela volta a este tamanho (evita resumir a cada turno)
+    turnos_apos_resumo: int = 5
+
+    @classmethod
+    def do_ambiente(cls):
+        """Lê a política do .env"""
+        return cls(
+            max_turnos=int(os.getenv("MEMORIA_MAX_TURNOS") or cls.max_turnos),
+            max_tokens=int(os.getenv("MEMORIA_MAX_TOKENS") or cls.max_tokens),
+            turnos_apos_resumo=int(os.getenv("MEMORIA_TURNOS_APOS_RESUMO") or cls.turnos_apos_resumo),
+        )
+
+    def estourou(self, turnos: List[List[ModelMessage]]) -> bool:
+        """Indica se a janela passou do limite de turnos ou de tokens"""
+        return len(turnos) > self.max_turnos or estimar_tokens(turnos) > self.max_tokens
+
+    def separar(self, turnos: List[List[ModelMessage]]):
+        """Divide os turnos em (a resumir, a manter literalmente)"""
+        manter = min(self.turnos_apos_resumo, self.max_turnos)
+        # Se ainda estiver acima do orçamento de tokens, mantém menos turnos
+        while manter > 1 and estimar_tokens(turnos[-manter:]) > self.max_tokens:
+            manter -= 1
+        corte = max(len(turnos) - manter, 0)
+        return turnos[:corte], turnos[corte:]
+
+
+def _eh_inicio_de_turno(mensagem: ModelMessage) -> bool:
+    return isinstance(mensagem, ModelRequest) and any(
+        isinstance(parte, UserPromptPart) for parte in mensagem.parts
+    )
+
+
+def separar_sistema(mensagens: List[ModelMessage]):
+    """Retorna (partes de sistema, turnos sem as partes de sistema)"""
+    partes_sistema = []
+    turnos = []
+    for mensagem in mensagens:
+        if isinstance(mensagem, ModelRequest):
+            sistema = [p for p in mensagem.parts if isinstance(p, SystemPromptPart)]
+            if sistema:
+                # O resumo anterior é recalculado, não acumulado nas partes de sistema
+                partes_sistema.extend(p for p in sistema if not p.content.startswith(PREFIXO_RESUMO))
+                mensagem = replace(mensagem, parts=[p for p in mensagem.parts if not isinstance(p, SystemPromptPart)])
+        if _eh_inicio_de_turno(mensagem) or not turnos:
+            turnos.append([])
+        turnos[-1].append(mensagem)
+    return partes_sistema, turnos
+
+
+def texto_das_mensagens(mensagens: List[ModelMessage]) -> str:
+    """Texto legível das mensagens do usuário e do assistente"""
+    linhas = []
+    for mensagem in mensagens:
+        for parte in mensagem.parts:
+            if isinstance(parte, UserPromptPart):
+                conteudo = parte.content if isinstance(parte.content, str) else " ".join(map(str, parte.content))
+                linhas.append(f"Usuário: {conteudo}")
+            elif isinstance(parte, TextPart):
+                linhas.append(f"Assistente: {parte.content}")
+    return "\n".join(linhas)
+
+
+def estimar_tokens(turnos) -> int:
+    """Estimativa barata de tokens (~4 caracteres por token)"""
+    return sum(len(texto_das_mensagens(turno)) for turno in turnos) // 4
+
+
+def montar_historico(partes_sistema, resumo: Optional[str], turnos) -> List[ModelMessage]:
+    """Reconstrói o histórico: partes de sistema + resumo no primeiro pedido, depois a janela"""
+    mensagens = [m for turno in turnos for m in turno]
+    if not mensagens:
+        return []
+    cabecalho = list(partes_sistema)
+    if resumo:
+        cabecalho.append(SystemPromptPart(content=PREFIXO_RESUMO + resumo))
+    primeira = mensagens[0]
+    if isinstance(primeira, ModelRequest):
+        mensagens[0] = replace(primeira, parts=cabecalho + list(primeira.parts))
+    else:
+        mensagens.insert(0, ModelRequest(parts=cabecalho))
+    return mensagens
+
+
+def turnos_de_mensagens_chat(mensagens_chat) -> List[List[ModelMessage]]:
+    """Converte as mensagens exibidas no chat ({'role', 'content'}) em turnos do agente"""
+    turnos = []
+    for mensagem in mensagens_chat:
+        if mensagem["role"] == "user":
+            turnos.append([ModelRequest(parts=[UserPromptPart(content=mensagem["content"])])])
+        elif turnos:
+            turnos[-1].append(ModelResponse(parts=[TextPart(content=mensagem["content"])]))
+    return turnos
+
+
+def tokens_do_uso(uso) -> dict:
+    """Contagem de tokens de uma execução (usage do pydantic-ai)"""
+    return {
+        "tokens_entrada": uso.request_tokens or 0,
+        "tokens_saida": uso.response_tokens or 0,
+        "tokens_total": uso.total_tokens or 0,
+    }
+
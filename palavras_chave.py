@@ -0,0 +1,159 @@
+# palavras_chave.py - Reconhecimento compilado de palavras-chave (termos compostos, acentos e plurais)
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence
+from texto import normalizar
+
+# Lista de palavras-chave específicas para PUC Campinas
+LISTA_PALAVRAS_CHAVES = [
+    # Cursos e áreas acadêmicas
+    "curso", "cursos", "graduação", "pós-graduação", "mestrado", "doutorado",
+    "engenharia", "direito", "medicina", "psicologia", "administração", "economia",
+    "arquitetura", "design", "comunicação", "jornalismo", "publicidade", "marketing",
+
+    # Processo seletivo e ingresso
+    "vestibular", "enem", "sisu", "prouni", "fies", "nota", "notas", "prova", "provas",
+    "inscrição", "inscrições", "matrícula", "rematrícula", "transferência", "transferências",
+
+    # Estrutura acadêmica
+    "campus", "laboratório", "laboratórios", "biblioteca", "sala", "salas", "auditório",
+    "restaurante", "cantina", "estacionamento", "quadra", "ginásio",
+
+    # Ensino e aprendizagem
+    "disciplina", "disciplinas", "matéria", "matérias", "professor", "professores",
+    "aula", "aulas", "presencial", "ead", "online", "distância", "híbrido",
+    "nota", "média", "frequência", "aprovação", "reprovação", "dp",
+
+    # Documentos e serviços
+    "histórico", "diploma", "certificado", "declaração", "atestado", "comprovante",
+    "boleto", "mensalidade", "taxa", "desconto", "bolsa", "financiamento",
+
+    # Apoio ao estudante
+    "caa", "atendimento", "secretaria", "ouvidoria", "monitoria", "estágio", "tcc",
+    "iniciação científica", "iniciação", "científica", "pesquisa", "extensão", "intercâmbio",
+
+    # Tecnologia e sistemas
+    "portal", "sistema", "login", "senha", "email", "e-mail", "plataforma", "ambiente virtual",
+    "ambiente", "virtual",
+
+    # Localização e contato
+    "campinas", "endereço", "telefone", "contato", "horário", "funcionamento",
+
+    # Outros termos relevantes
+    "aluno", "aluna", "estudante", "universitário", "acadêmico", "semestre", "período"
+]
+
+PADRAO_TERMO = re.compile(r"\w+")
+SEPARADOR_LOTE = "\x00"
+PADRAO_TERMO_LOTE = re.compile(r"\w+|\x00")
+# Limite do memo de formas normalizadas por extrator
+MAX_FORMAS_MEMO = 200000
+
+# Plurais regulares do português, já sem acentos (do mais específico para o mais geral)
+PLURAIS = (
+    ("oes", "ao"), ("aes", "ao"), ("aos", "ao"),
+    ("ais", "al"), ("eis", "el"), ("ois", "ol"), ("uis", "ul"),
+    ("res", "r"), ("zes", "z"), ("ses", "s"),
+    ("ns", "m"), ("s", ""),
+)
+
+
+def singular(termo):
+    """Forma singular aproximada de um termo sem acentos ("inscricoes" -> "inscricao")"""
+    if len(termo) <= 3:
+        return termo
+    for sufixo, troca in PLURAIS:
+        if termo.endswith(sufixo):
+            return termo[:-len(sufixo)] + troca
+    return termo
+
+
+def formas_normalizadas(texto) -> List[str]:
+    """Termos do texto sem acentos, no singular; hífen e pontuação viram separadores"""
+    return [singular(t) for t in PADRAO_TERMO.findall(normalizar(texto))]
+
+
+class ExtratorPalavrasChave:
+    """
+    Reconhecedor compilado uma vez por conjunto de palavras-chave.
+
+    Cada palavra-chave vira uma sequência de formas normalizadas numa trie; o texto é
+    percorrido uma vez e, em cada posição, vale o termo mais longo reconhecido.
+    """
+
+    def __init__(self, palavras: Iterable[str]):
+        self.trie: Dict = {}
+        # termo em minúsculas -> forma normalizada (evita refazer a remoção de acentos)
+        self._formas: Dict[str, str] = {}
+        for palavra in palavras:
+            formas = formas_normalizadas(palavra)
+            if not formas:
+                continue
+            no = self.trie
+            for forma in formas:
+                no = no.setdefault(forma, {})
+            # A primeira grafia da lista é a exibida (ex.: "cursos" -> "curso")
+            no.setdefault(None, palavra)
+
+    def _reconhecer(self, formas: Sequence[str]) -> List[str]:
+        encontradas = []
+        i, total = 0, len(formas)
+        while i < total:
+            no = self.trie.get(formas[i])
+            if no is None:
+                i += 1
+                continue
+            termo, fim = no.get(None), i + 1
+            j = i + 1
+            while j < total:
+                no = no.get(formas[j])
+                if no is None:
+                    break
+                j += 1
+                if None in no:
+                    termo, fim = no[None], j
+            if termo is None:
+                i += 1
+            else:
+                encontradas.append(termo)
+                i = fim
+        return encontradas
+
+    def _forma(self, termo: str) -> str:
+        forma = self._formas.get(termo)
+        if forma is None:
+            if len(self._formas) >= MAX_FORMAS_MEMO:
+                self._formas.clear()
+            forma = self._formas[termo] = singular(normalizar(termo))
+        return forma
+
+    def extrair(self, texto: str) -> List[str]:
+        """Palavras-chave do texto, na ordem em que aparecem"""
+        return self._reconhecer([self._forma(t) for t in PADRAO_TERMO.findall(texto.lower())])
+
+    def extrair_lote(self, textos: Sequence[str]) -> List[List[str]]:
+        """Palavras-chave de várias mensagens, tokenizadas numa única passada"""
+        if not textos:
+            return []
+        termos = PADRAO_TERMO_LOTE.findall(
+            SEPARADOR_LOTE.join(t.replace(SEPARADOR_LOTE, " ") for t in textos).lower()
+        )
+        resultado, formas = [], []
+        for termo in termos:
+            if termo == SEPARADOR_LOTE:
+                resultado.append(self._reconhecer(formas))
+                formas = []
+            else:
+                formas.append(self._forma(termo))
+        resultado.append(self._reconhecer(formas))
+        return resultado
+
+
+@lru_cache(maxsize=16)
+def _compilar(palavras: tuple) -> ExtratorPalavrasChave:
+    return ExtratorPalavrasChave(palavras)
+
+
+def obter_extrator(palavras: Sequence[str] = LISTA_PALAVRAS_CHAVES) -> ExtratorPalavrasChave:
+    """Extrator compilado para o conjunto de palavras (reaproveitado entre chamadas)"""
+    return _compilar(tuple(palavras))
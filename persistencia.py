@@ -0,0 +1,282 @@
+# persistencia.py - Fila de gravação em segundo plano (write-behind) do histórico de conversas
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from bson import ObjectId, json_util
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from banco import conectar_mongodb
+
+# Configuração da fila (ajustável pelo .env)
+TAMANHO_LOTE = int(os.getenv("PERSISTENCIA_TAMANHO_LOTE") or 50)
+INTERVALO_FLUSH_S = float(os.getenv("PERSISTENCIA_INTERVALO_S") or 1.0)
+MAX_TENTATIVAS = int(os.getenv("PERSISTENCIA_MAX_TENTATIVAS") or 5)
+BACKOFF_INICIAL_S = float(os.getenv("PERSISTENCIA_BACKOFF_S") or 0.5)
+CAPACIDADE_FILA = int(os.getenv("PERSISTENCIA_CAPACIDADE") or 10000)
+# Espera máxima por espaço na fila cheia antes de mandar o turno para o spool
+ESPERA_FILA_CHEIA_S = float(os.getenv("PERSISTENCIA_ESPERA_S") or 1.0)
+# Arquivo local para guardar turnos durante uma queda do Mongo (vazio = desativado)
+ARQUIVO_SPOOL = os.getenv("PERSISTENCIA_SPOOL", "")
+
+ERRO_CHAVE_DUPLICADA = 11000
+
+
+def titulo_chat(primeira_mensagem, posicao):
+    """Usa as primeiras palavras da primeira mensagem como nome do chat"""
+    if not primeira_mensagem:
+        return f"Chat {posicao}"
+    return primeira_mensagem[:30] + "..." if len(primeira_mensagem) > 30 else primeira_mensagem
+
+
+def operacoes_metadados_chats(turnos, contagens=None):
+    """
+    Monta os upserts da coleção "chats" para um lote de turnos (um por chat).
+
+    Args:
+        contagens: {(chatId, userId): total de turnos} dos chats recontados; os demais usam $inc
+    """
+    contagens = contagens or {}
+    por_chat = {}
+    for turno in sorted(turnos, key=lambda t: t["timestamp"]):
+        chave = (turno["chatId"], turno["userId"])
+        if chave not in por_chat:
+            por_chat[chave] = {"primeiro": turno, "ultimo": turno["timestamp"], "turnos": 0}
+        por_chat[chave]["ultimo"] = turno["timestamp"]
+        por_chat[chave]["turnos"] += 1
+
+    operacoes = []
+    for (chat_id, user_id), dados in por_chat.items():
+        primeiro = dados["primeiro"]
+        atualizacao = {
+            "$setOnInsert": {
+                "titulo": titulo_chat(primeiro["userMessage"], 1),
+                "created_at": primeiro["timestamp"],
+                "deleted": False
+            },
+            "$max": {"updated_at": dados["ultimo"]},
+        }
+        if (chat_id, user_id) in contagens:
+            atualizacao["$set"] = {"turnos": contagens[(chat_id, user_id)]}
+        else:
+            atualizacao["$inc"] = {"turnos": dados["turnos"]}
+        operacoes.append(UpdateOne({"_id": chat_id, "userId": user_id}, atualizacao, upsert=True))
+    return operacoes
+
+
+def gravar_turnos(turnos):
+    """Grava um lote de turnos e atualiza os metadados dos chats (síncrono)"""
+    db = conectar_mongodb()
+    # Momento da gravação (o timestamp é o do envio): a análise de temas lê por ele, então
+    # turnos regravados do spool depois de uma queda não ficam para trás do checkpoint
+    gravado_em = datetime.utcnow()
+    for turno in turnos:
+        turno["gravado_em"] = gravado_em
+    duplicados = []
+    try:
+        db["historico_conversas"].insert_many(turnos, ordered=False)
+    except BulkWriteError as e:
+        # Turnos já gravados numa tentativa anterior podem ser ignorados
+        erros = e.details.get("writeErrors", [])
+        if any(erro.get("code") != ERRO_CHAVE_DUPLICADA for erro in erros):
+            raise
+        duplicados = [turnos[erro["index"]] for erro in erros]
+    # Nova tentativa ou spool regravado: não se sabe se o $inc da vez anterior foi aplicado,
+    # então o total desses chats é recontado
+    contagens = {}
+    for turno in duplicados:
+        chave = (turno["chatId"], turno["userId"])
+        if chave not in contagens:
+            contagens[chave] = db["historico_conversas"].count_documents(
+                {"chatId": chave[0], "userId": chave[1], "deleted": False}
+            )
+    db["chats"].bulk_write(operacoes_metadados_chats(turnos, contagens), ordered=False)
+    # Turnos que ainda estavam na fila quando o chat foi apagado
+    apagados = db["chats"].distinct("_id", {"_id": {"$in": list({t["chatId"] for t in turnos})}, "deleted": True})
+    if apagados:
+        db["historico_conversas"].update_many(
+            {"chatId": {"$in": apagados}, "deleted": False},
+            {"$set": {"deleted": True}}
+        )
+
+
+class FilaPersistencia:
+    """Fila em memória drenada por uma thread que grava os turnos em lote no MongoDB"""
+
+    def __init__(self, tamanho_lote=TAMANHO_LOTE, intervalo_s=INTERVALO_FLUSH_S,
+                 arquivo_spool=ARQUIVO_SPOOL, gravar=gravar_turnos):
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_s = intervalo_s
+        self.arquivo_spool = arquivo_spool
+        self._gravar_lote = gravar
+        self._fila = queue.Queue(maxsize=CAPACIDADE_FILA)
+        self._parar = threading.Event()
+        self._lock_spool = threading.Lock()
+        self._lock_metricas = threading.Lock()
+        # Lote retirado da fila e ainda não confirmado no MongoDB
+        self._em_gravacao = []
+        self._lock_em_gravacao = threading.Lock()
+        self._metricas = {
+            "lotes": 0,
+            "turnos_gravados": 0,
+            "falhas": 0,
+            "turnos_no_spool": 0,
+            "turnos_perdidos": 0,
+            "ultimo_flush_ms": 0.0,
+            "flush_total_ms": 0.0,
+        }
+        self._thread = threading.Thread(target=self._executar, name="fila-persistencia", daemon=True)
+        self._thread.start()
+
+    def enfileirar(self, turno):
+        """Coloca um turno na fila e retorna imediatamente"""
+        # _id gerado aqui para que novas tentativas não dupliquem o turno
+        turno.setdefault("_id", ObjectId())
+        try:
+            self._fila.put(turno, timeout=ESPERA_FILA_CHEIA_S)
+        except queue.Full:
+            # Fila cheia: vai para o spool em vez de esperar as retentativas na thread da página
+            self._salvar_no_spool([turno])
+        return turno["_id"]
+
+    def _coletar_lote(self):
+        """Espera o primeiro turno e junta outros até o tamanho do lote ou o fim do intervalo"""
+        try:
+            lote = [self._fila.get(timeout=self.intervalo_s)]
+        except queue.Empty:
+            return []
+        limite = time.monotonic() + self.intervalo_s
+        while len(lote) < self.tamanho_lote:
+            restante = limite - time.monotonic()
+            if restante <= 0 or self._parar.is_set():
+                try:
+                    lote.append(self._fila.get_nowait())
+                    continue
+                except queue.Empty:
+                    break
+            try:
+                lote.append(self._fila.get(timeout=restante))
+            except queue.Empty:
+                break
+        return lote
+
+    def _executar(self):
+        while not self._parar.is_set() or not self._fila.empty():
+            lote = self._coletar_lote()
+            if lote:
+                with self._lock_em_gravacao:
+                    self._em_gravacao = lote
+                try:
+                    self._gravar_com_retentativas(lote)
+                finally:
+                    with self._lock_em_gravacao:
+                        self._em_gravacao = []
+            elif self.arquivo_spool and not self._parar.is_set():
+                self._reprocessar_spool()
+
+    def _gravar_com_retentativas(self, lote):
+        """Grava o lote com backoff exponencial; se todas as tentativas falharem, usa o spool"""
+        inicio = time.perf_counter()
+        for tentativa in range(MAX_TENTATIVAS):
+            try:
+                self._gravar_lote(lote)
+                self._registrar_flush(len(lote), inicio)
+                return True
+            except Exception as e:
+                with self._lock_metricas:
+                    self._metricas["falhas"] += 1
+                print(f"Erro ao gravar histórico (tentativa {tentativa + 1}): {str(e)}")
+                if self._parar.is_set() and tentativa > 0:
+                    break
+                time.sleep(BACKOFF_INICIAL_S * (2 ** tentativa))
+        self._salvar_no_spool(lote)
+        return False
+
+    def _registrar_flush(self, quantidade, inicio):
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+        with self._lock_metricas:
+            self._metricas["lotes"] += 1
+            self._metricas["turnos_gravados"] += quantidade
+            self._metricas["ultimo_flush_ms"] = duracao_ms
+            self._metricas["flush_total_ms"] += duracao_ms
+
+    def _salvar_no_spool(self, lote):
+        """Guarda o lote em disco (JSON estendido, um turno por linha)"""
+        chave = "turnos_no_spool" if self.arquivo_spool else "turnos_perdidos"
+        with self._lock_metricas:
+            self._metricas[chave] += len(lote)
+        if not self.arquivo_spool:
+            print(f"Aviso: {len(lote)} turno(s) descartado(s); configure PERSISTENCIA_SPOOL")
+            return
+        with self._lock_spool:
+            pasta = os.path.dirname(self.arquivo_spool)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+            with open(self.arquivo_spool, "a", encoding="utf-8") as f:
+                for turno in lote:
+                    f.write(json_util.dumps(turno) + "\n")
+
+    def _reprocessar_spool(self):
+        """Tenta gravar os turnos guardados em disco; mantém o arquivo se o Mongo ainda falhar"""
+        with self._lock_spool:
+            if not os.path.exists(self.arquivo_spool):
+                return
+            with open(self.arquivo_spool, "r", encoding="utf-8") as f:
+                turnos = [json_util.loads(linha) for linha in f if linha.strip()]
+            if not turnos:
+                os.remove(self.arquivo_spool)
+                return
+            try:
+                for i in range(0, len(turnos), self.tamanho_lote):
+                    self._gravar_lote(turnos[i:i + self.tamanho_lote])
+            except Exception:
+                return
+            os.remove(self.arquivo_spool)
+        with self._lock_metricas:
+            self._metricas["turnos_gravados"] += len(turnos)
+            self._metricas["turnos_no_spool"] = 0
+
+    def pendentes(self, chat_id, user_id):
+        """
+        Turnos do chat que podem ainda não estar no MongoDB (na fila ou no lote em gravação).
+
+        A fila é lida antes do lote em gravação: um turno que muda de um para o outro no meio
+        aparece duas vezes (quem lê deduplica pelo _id), nunca nenhuma.
+        """
+        with self._fila.mutex:
+            na_fila = list(self._fila.queue)
+        with self._lock_em_gravacao:
+            em_gravacao = list(self._em_gravacao)
+        return [t for t in em_gravacao + na_fila if t.get("chatId") == chat_id and t.get("userId") == user_id]
+
+    def encerrar(self, timeout=10.0):
+        """Para o worker depois de gravar o que ainda estiver na fila"""
+        self._parar.set()
+        self._thread.join(timeout)
+
+    def metricas(self):
+        """Profundidade da fila e latência de flush"""
+        with self._lock_metricas:
+            metricas = dict(self._metricas)
+        metricas["profundidade"] = self._fila.qsize()
+        metricas["flush_medio_ms"] = (
+            metricas["flush_total_ms"] / metricas["lotes"] if metricas["lotes"] else 0.0
+        )
+        return metricas
+
+
+_fila = None
+_fila_lock = threading.Lock()
+
+
+def obter_fila():
+    """Retorna a fila de persistência única do processo, iniciando o worker na primeira chamada"""
+    global _fila
+    if _fila is None:
+        with _fila_lock:
+            if _fila is None:
+                _fila = FilaPersistencia()
+                atexit.register(_fila.encerrar)
+    return _fila
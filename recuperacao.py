@@ -0,0 +1,81 @@
+# recuperacao.py - Montagem do prompt por recuperação (BM25 sobre as entradas do FAQ)
+import math
+import os
+from collections import Counter
+from typing import List, Sequence, Tuple
+from faq import EntradaFAQ, extrair_entradas
+from texto import tokenizar
+
+PROMPT_RECUPERACAO = os.getenv("PROMPT_RECUPERACAO", "1") != "0"
+PROMPT_TOP_K = int(os.getenv("PROMPT_TOP_K") or 3)
+
+MARCADOR_FAQ = "## Perguntas frequentes"
+
+
+class IndiceBM25:
+    """Índice BM25 em memória sobre documentos já tokenizados"""
+
+    def __init__(self, documentos: Sequence[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.frequencias = [Counter(doc) for doc in documentos]
+        self.tamanhos = [len(doc) for doc in documentos]
+        self.tamanho_medio = (sum(self.tamanhos) / len(self.tamanhos)) if self.tamanhos else 0.0
+        total = len(documentos)
+        df = Counter(termo for freq in self.frequencias for termo in freq)
+        self.idf = {t: math.log(1 + (total - n + 0.5) / (n + 0.5)) for t, n in df.items()}
+
+    def pontuar(self, termos: List[str]) -> List[float]:
+        pontuacoes = []
+        for freq, tamanho in zip(self.frequencias, self.tamanhos):
+            score = 0.0
+            normalizacao = self.k1 * (1 - self.b + self.b * tamanho / (self.tamanho_medio or 1))
+            for termo in termos:
+                tf = freq.get(termo)
+                if tf:
+                    score += self.idf[termo] * tf * (self.k1 + 1) / (tf + normalizacao)
+            pontuacoes.append(score)
+        return pontuacoes
+
+    def buscar(self, termos: List[str], k: int) -> List[Tuple[int, float]]:
+        """Índices e pontuações dos k melhores documentos com pontuação > 0"""
+        pontuacoes = self.pontuar(termos)
+        melhores = sorted(range(len(pontuacoes)), key=lambda i: pontuacoes[i], reverse=True)[:k]
+        return [(i, pontuacoes[i]) for i in melhores if pontuacoes[i] > 0]
+
+
+def separar_instrucoes(prompt: str) -> str:
+    """Parte do PROMPT com as instruções, sem a seção de perguntas frequentes"""
+    posicao = prompt.find(MARCADOR_FAQ)
+    if posicao < 0:
+        return prompt
+    return prompt[:posicao].rstrip().rstrip("-").rstrip() + "\n"
+
+
+def formatar_entrada(entrada: EntradaFAQ) -> str:
+    return f"### {entrada.numero}. {entrada.pergunta}\n{entrada.resposta}"
+
+
+class BaseConhecimento:
+    """Entradas do FAQ endereçáveis, recuperadas por pergunta"""
+
+    def __init__(self, entradas: List[EntradaFAQ]):
+        self.entradas = entradas
+        self.indice = IndiceBM25([
+            tokenizar(" ".join([e.secao, e.pergunta, *e.parafrases, e.resposta])) for e in entradas
+        ])
+
+    @classmethod
+    def do_prompt(cls, prompt: str):
+        return cls(extrair_entradas(prompt))
+
+    def relevantes(self, pergunta: str, k: int = PROMPT_TOP_K) -> List[EntradaFAQ]:
+        return [self.entradas[i] for i, _ in self.indice.buscar(tokenizar(pergunta), k)]
+
+    def trecho_prompt(self, pergunta: str, k: int = PROMPT_TOP_K) -> str:
+        """Trecho do prompt de sistema com as k entradas mais relevantes para a pergunta"""
+        entradas = self.relevantes(pergunta, k)
+        if not entradas:
+            return "## Base de conhecimento\nNenhuma pergunta frequente relacionada a esta dúvida."
+        corpo = "\n\n---\n\n".join(formatar_entrada(e) for e in entradas)
+        return f"## Perguntas frequentes relacionadas à dúvida:\n\n{corpo}"
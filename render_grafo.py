@@ -0,0 +1,212 @@
+# render_grafo.py - Renderização do grafo de palavras-chave com cache, limite de tamanho e métricas
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+# Limites do grafo exibido (os nós e arestas mais fortes)
+MAX_NOS = int(os.getenv("GRAFO_MAX_NOS") or 30)
+MAX_ARESTAS = int(os.getenv("GRAFO_MAX_ARESTAS") or 60)
+# Quantidade de imagens e de layouts guardados em memória
+CAPACIDADE_CACHE = int(os.getenv("GRAFO_CACHE") or 64)
+# Pico de memória por renderização via tracemalloc (deixa o desenho ~4x mais lento)
+MEDIR_MEMORIA = os.getenv("GRAFO_MEDIR_MEMORIA", "0") == "1"
+
+ITERACOES_LAYOUT = 50
+# Partindo das posições anteriores, o layout converge com menos iterações
+ITERACOES_LAYOUT_SEMEADO = 15
+TAMANHO_MAXIMO_NO = 3000
+
+# O matplotlib não é thread-safe: um desenho por vez (também isola a medição de memória)
+_desenho_lock = threading.Lock()
+
+
+@dataclass
+class Renderizacao:
+    """Imagem PNG do grafo, as posições dos nós nela e o custo para produzi-la"""
+    imagem: bytes
+    hash: str
+    nos: int
+    arestas: int
+    tempo_ms: float
+    memoria_pico_kb: Optional[float]
+    do_cache: bool
+    posicoes: Dict[str, Tuple[float, float]]
+
+
+def subgrafo_limitado(frequencias, pesos, max_nos=MAX_NOS, max_arestas=MAX_ARESTAS):
+    """
+    Os max_nos termos mais frequentes e, entre eles, as max_arestas coocorrências mais fortes.
+
+    Returns:
+        tuple: ([(palavra, frequência)], [(palavra1, palavra2, peso)])
+    """
+    nos = frequencias.most_common(max_nos)
+    manter = {palavra for palavra, _ in nos}
+    arestas = [(a, b, peso) for (a, b), peso in pesos.items() if a in manter and b in manter]
+    arestas.sort(key=lambda aresta: aresta[2], reverse=True)
+    return nos, arestas[:max_arestas]
+
+
+def hash_conteudo(nos, arestas) -> str:
+    """Identifica o conteúdo exibido; grafos iguais produzem a mesma imagem"""
+    conteudo = json.dumps([nos, arestas, MAX_NOS, MAX_ARESTAS], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(conteudo.encode("utf-8")).hexdigest()
+
+
+class RenderizadorGrafo:
+    """Cache de imagens (por hash do conteúdo) e de posições (por chat) para o "Mostrar Grafo" """
+
+    def __init__(self, capacidade=CAPACIDADE_CACHE, medir_memoria=MEDIR_MEMORIA):
+        self.capacidade = capacidade
+        self.medir_memoria = medir_memoria
+        self._imagens: "OrderedDict[str, Renderizacao]" = OrderedDict()
+        self._posicoes: "OrderedDict[str, Dict[str, Tuple[float, float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._metricas = {"renderizacoes": 0, "acertos_cache": 0, "tempo_total_ms": 0.0, "memoria_pico_kb": 0.0}
+
+    def _guardar(self, cache, chave, valor):
+        cache[chave] = valor
+        cache.move_to_end(chave)
+        while len(cache) > self.capacidade:
+            cache.popitem(last=False)
+
+    def renderizar(self, estado, chave: Optional[str] = None) -> Renderizacao:
+        """
+        Imagem do grafo do estado (GrafoConversa); reaproveita a imagem se o conteúdo não mudou.
+
+        Args:
+            estado: GrafoConversa do chat
+            chave: identificador do chat, para semear o layout com as posições anteriores
+        """
+        nos, arestas = subgrafo_limitado(estado.frequencias, estado.pesos)
+        codigo = hash_conteudo(nos, arestas)
+        with self._lock:
+            anterior = self._imagens.get(codigo)
+            if anterior is not None:
+                self._imagens.move_to_end(codigo)
+                self._metricas["acertos_cache"] += 1
+                # A imagem pode ter sido desenhada com outras posições (outro chat ou outra
+                # semente): o próximo layout deste chat parte das posições que foram exibidas
+                if chave:
+                    self._guardar(self._posicoes, chave, anterior.posicoes)
+        if anterior is not None:
+            return Renderizacao(
+                anterior.imagem, codigo, anterior.nos, anterior.arestas, 0.0, None,
+                do_cache=True, posicoes=anterior.posicoes
+            )
+
+        with self._lock:
+            posicoes_anteriores = self._posicoes.get(chave) if chave else None
+
+        with _desenho_lock:
+            rastreando = tracemalloc.is_tracing()
+            if self.medir_memoria:
+                if not rastreando:
+                    tracemalloc.start()
+                tracemalloc.reset_peak()
+            inicio = time.perf_counter()
+            try:
+                # As barras usam os mesmos termos do hash (os mais frequentes)
+                imagem, posicoes = _desenhar(nos, arestas, nos[:10], posicoes_anteriores)
+            finally:
+                memoria_kb = None
+                if self.medir_memoria:
+                    memoria_kb = tracemalloc.get_traced_memory()[1] / 1024
+                    if not rastreando:
+                        tracemalloc.stop()
+            tempo_ms = (time.perf_counter() - inicio) * 1000
+
+        resultado = Renderizacao(
+            imagem, codigo, len(nos), len(arestas), tempo_ms, memoria_kb, do_cache=False, posicoes=posicoes
+        )
+        with self._lock:
+            self._guardar(self._imagens, codigo, resultado)
+            if chave:
+                self._guardar(self._posicoes, chave, posicoes)
+            self._metricas["renderizacoes"] += 1
+            self._metricas["tempo_total_ms"] += tempo_ms
+            if memoria_kb is not None:
+                self._metricas["memoria_pico_kb"] = max(self._metricas["memoria_pico_kb"], memoria_kb)
+        return resultado
+
+    def metricas(self):
+        with self._lock:
+            metricas = dict(self._metricas)
+            metricas["imagens_em_cache"] = len(self._imagens)
+        metricas["tempo_medio_ms"] = (
+            metricas["tempo_total_ms"] / metricas["renderizacoes"] if metricas["renderizacoes"] else 0.0
+        )
+        return metricas
+
+
+def _desenhar(nos, arestas, palavras_top, posicoes_anteriores=None) -> Tuple[bytes, Dict]:
+    """Desenha grafo + barras numa Figure própria (fora do pyplot) e devolve o PNG e as posições"""
+    import networkx as nx
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    G = nx.Graph()
+    G.add_nodes_from(palavra for palavra, _ in nos)
+    G.add_weighted_edges_from(arestas)
+
+    semente: Optional[Dict] = None
+    if posicoes_anteriores:
+        semente = {n: posicoes_anteriores[n] for n in G if n in posicoes_anteriores} or None
+    posicoes = nx.spring_layout(
+        G, pos=semente, k=1, seed=42,
+        iterations=ITERACOES_LAYOUT_SEMEADO if semente else ITERACOES_LAYOUT,
+    )
+
+    frequencias = dict(nos)
+    fig = Figure(figsize=(15, 6))
+    FigureCanvasAgg(fig)
+    try:
+        ax1, ax2 = fig.subplots(1, 2)
+        nx.draw(G, posicoes, ax=ax1,
+                with_labels=True,
+                node_color='lightblue',
+                node_size=[min(frequencias[n] * 300, TAMANHO_MAXIMO_NO) for n in G.nodes()],
+                font_size=8,
+                font_weight='bold',
+                edge_color='gray',
+                width=[min(G[u][v]['weight'] * 0.5, 8) for u, v in G.edges()])
+        ax1.set_title(f"Grafo de Palavras-chave\n({len(G.nodes())} termos exibidos)",
+                      fontsize=12, fontweight='bold')
+
+        if palavras_top:
+            palavras, valores = zip(*palavras_top)
+            ax2.barh(range(len(palavras)), valores, color='lightcoral')
+            ax2.set_yticks(range(len(palavras)))
+            ax2.set_yticklabels(palavras)
+            ax2.set_xlabel('Frequência')
+            ax2.set_title('Top 10 Palavras-chave', fontsize=12, fontweight='bold')
+            ax2.invert_yaxis()
+
+        fig.tight_layout()
+        saida = io.BytesIO()
+        fig.savefig(saida, format="png", dpi=100)
+    finally:
+        # Libera a figura na hora, sem depender do coletor de lixo nem do estado global do pyplot
+        fig.clear()
+    return saida.getvalue(), {n: tuple(float(c) for c in p) for n, p in posicoes.items()}
+
+
+_renderizador = None
+_renderizador_lock = threading.Lock()
+
+
+def obter_renderizador():
+    """Renderizador único do processo (o cache é compartilhado entre sessões)"""
+    global _renderizador
+    if _renderizador is None:
+        with _renderizador_lock:
+            if _renderizador is None:
+                _renderizador = RenderizadorGrafo()
+    return _renderizador
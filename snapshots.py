@@ -0,0 +1,118 @@
+# snapshots.py - Retratos compactos do histórico do agente por chat (retomada instantânea)
+import atexit
+import json
+import threading
+import zlib
+from datetime import datetime
+from bson import Binary
+from pymongo import ReplaceOne
+from banco import conectar_mongodb
+
+VERSAO_SNAPSHOT = 1
+NIVEL_COMPRESSAO = 6
+
+
+def serializar_historico(mensagens, resumo=None) -> bytes:
+    """Serializa as mensagens do agente (sem as partes de sistema) em JSON comprimido"""
+    from pydantic_core import to_jsonable_python
+    dados = {
+        "v": VERSAO_SNAPSHOT,
+        "resumo": resumo,
+        "mensagens": to_jsonable_python(mensagens, bytes_mode="base64"),
+    }
+    texto = json.dumps(dados, ensure_ascii=False, separators=(",", ":"))
+    return zlib.compress(texto.encode("utf-8"), NIVEL_COMPRESSAO)
+
+
+def desserializar_historico(dados: bytes):
+    """Inverso de serializar_historico; retorna (mensagens, resumo)"""
+    conteudo = json.loads(zlib.decompress(dados))
+    if conteudo.get("v") != VERSAO_SNAPSHOT:
+        return None, None
+    # pydantic-ai só é importado quando há um snapshot para restaurar
+    from pydantic_ai.messages import ModelMessagesTypeAdapter
+    mensagens = ModelMessagesTypeAdapter.validate_python(conteudo["mensagens"])
+    return mensagens, conteudo.get("resumo")
+
+
+def carregar_snapshot(chat_id, user_id):
+    """
+    Lê o snapshot do chat com uma única consulta por chave.
+
+    Returns:
+        tuple: (mensagens, resumo, grafo) ou None; grafo é o dict do GrafoConversa, se houver
+    """
+    db = conectar_mongodb()
+    documento = db["snapshots_agente"].find_one(
+        {"_id": chat_id, "userId": user_id},
+        {"dados": 1, "grafo": 1}
+    )
+    if not documento:
+        return None
+    mensagens, resumo = desserializar_historico(bytes(documento["dados"]))
+    if mensagens is None:
+        return None
+    return mensagens, resumo, documento.get("grafo")
+
+
+class GravadorSnapshots:
+    """Grava snapshots em segundo plano; só a versão mais recente de cada chat é escrita"""
+
+    def __init__(self):
+        self._pendentes = {}
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._executar, name="gravador-snapshots", daemon=True)
+        self._thread.start()
+
+    def agendar(self, chat_id, user_id, dados: bytes, grafo=None):
+        documento = {
+            "_id": chat_id,
+            "userId": user_id,
+            "dados": Binary(dados),
+            "tamanho": len(dados),
+            "versao": VERSAO_SNAPSHOT,
+            "atualizado_em": datetime.utcnow(),
+        }
+        if grafo is not None:
+            # Estado do grafo de palavras-chave do chat (GrafoConversa.para_dict)
+            documento["grafo"] = grafo
+        with self._cond:
+            self._pendentes[chat_id] = documento
+            self._cond.notify()
+
+    def _executar(self):
+        while True:
+            with self._cond:
+                while not self._pendentes:
+                    self._cond.wait()
+            self.descarregar()
+
+    def descarregar(self):
+        """Grava tudo o que estiver pendente"""
+        with self._cond:
+            pendentes, self._pendentes = self._pendentes, {}
+        if not pendentes:
+            return
+        try:
+            conectar_mongodb()["snapshots_agente"].bulk_write(
+                [ReplaceOne({"_id": chat_id}, doc, upsert=True) for chat_id, doc in pendentes.items()],
+                ordered=False
+            )
+        except Exception as e:
+            # O snapshot é só um atalho: sem ele o chat é reconstruído pelas mensagens
+            print(f"Erro ao gravar snapshot do agente: {str(e)}")
+
+
+_gravador = None
+_gravador_lock = threading.Lock()
+
+
+def salvar_snapshot(chat_id, user_id, mensagens, resumo=None, grafo=None):
+    """Serializa e agenda a gravação do snapshot do chat (e do estado do grafo, se informado)"""
+    global _gravador
+    if _gravador is None:
+        with _gravador_lock:
+            if _gravador is None:
+                _gravador = GravadorSnapshots()
+                atexit.register(_gravador.descarregar)
+    _gravador.agendar(chat_id, user_id, serializar_historico(mensagens, resumo), grafo)
@@ -0,0 +1,54 @@
+# texto.py - Normalização de texto em português (acentos, stopwords, radicais)
+import re
+import unicodedata
+
+PADRAO_PALAVRA = re.compile(r"\w+")
+
+STOPWORDS = {
+    "a", "ao", "aos", "as", "à", "às", "com", "como", "da", "das", "de", "do", "dos", "e", "é",
+    "ela", "ele", "em", "entre", "essa", "esse", "esta", "este", "eu", "foi", "há", "isso", "já",
+    "la", "lhe", "mais", "mas", "me", "meu", "minha", "na", "nas", "no", "nos", "num", "numa",
+    "o", "os", "ou", "para", "pela", "pelas", "pelo", "pelos", "por", "pra", "qual", "quais",
+    "que", "se", "ser", "seu", "sua", "são", "também", "te", "tem", "um", "uma", "uns", "umas",
+    "vc", "você", "voces", "vocês", "ola", "olá", "oi", "tudo", "bem", "sobre", "sim", "não", "nao",
+}
+
+# Sufixos removidos pelo radicalizador leve (do mais longo para o mais curto)
+SUFIXOS = (
+    "amentos", "imentos", "amento", "imento", "ações", "acoes", "ação", "acao", "mente",
+    "idades", "idade", "ências", "encias", "ência", "encia", "ismos", "ismo",
+    "istas", "ista", "ões", "oes", "ais", "eis", "ado", "ada", "ados", "adas",
+    "ido", "ida", "idos", "idas", "ar", "er", "ir", "es", "s",
+)
+
+
+def remover_acentos(texto):
+    """Remove acentos e cedilha ("pós-graduação" -> "pos-graduacao")"""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos"""
+    return remover_acentos(texto.lower())
+
+
+def radical(palavra):
+    """Radicalização leve para português: corta um sufixo comum se sobrar ao menos 4 letras"""
+    for sufixo in SUFIXOS:
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) >= 4:
+            return palavra[:-len(sufixo)]
+    return palavra
+
+
+STOPWORDS_NORMALIZADAS = {normalizar(p) for p in STOPWORDS}
+
+
+def tokenizar(texto, remover_stopwords=True, radicalizar=True):
+    """Quebra o texto em termos normalizados, opcionalmente sem stopwords e radicalizados"""
+    termos = PADRAO_PALAVRA.findall(normalizar(texto))
+    if remover_stopwords:
+        termos = [t for t in termos if t not in STOPWORDS_NORMALIZADAS]
+    if radicalizar:
+        termos = [radical(t) for t in termos]
+    return termos
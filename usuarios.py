@@ -0,0 +1,83 @@
+# usuarios.py - Regras do cadastro e da sessão do usuário, sem interface (login e importação em lote)
+import datetime
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+# Campos do usuário que a UI e o agente usam (nunca o hash da senha)
+CAMPOS_SESSAO = {"nome_completo": 1, "email": 1, "tipo_usuario": 1, "ra": 1, "curso": 1}
+
+@dataclass(frozen=True)
+class SessaoUsuario:
+    """Usuário logado guardado em st.session_state: compacto e imutável"""
+    id: str
+    nome_completo: str
+    email: str
+    tipo_usuario: str
+    ra: Optional[str] = None
+    curso: Optional[str] = None
+
+    @classmethod
+    def do_documento(cls, documento: dict):
+        """Monta a sessão a partir do documento projetado com CAMPOS_SESSAO"""
+        return cls(
+            id=str(documento["_id"]),
+            nome_completo=documento.get("nome_completo", ""),
+            email=documento.get("email", ""),
+            tipo_usuario=documento.get("tipo_usuario", "estudante"),
+            ra=documento.get("ra"),
+            curso=documento.get("curso"),
+        )
+
+# Função para validar email institucional
+def validar_email(email):
+    padrao = r'^[a-zA-Z0-9._%+-]+@(puc-campinas\.edu\.br|puccampinas\.edu\.br)$'
+    return bool(re.match(padrao, email))
+
+# Função para criar hash de senha
+def criar_hash_senha(senha):
+    return hashlib.sha256(senha.encode()).hexdigest()
+
+# Documento do usuário como é gravado na coleção "usuarios" (cadastro e importação em lote)
+def montar_documento_usuario(nome, email, senha_hash, tipo_usuario, ra=None, curso=None, departamento=None):
+    agora = datetime.datetime.now()
+    novo_usuario = {
+        "nome_completo": nome,
+        "email": email,
+        "senha_hash": senha_hash,
+        "tipo_usuario": tipo_usuario,
+        "data_cadastro": agora,
+        "ultimo_acesso": agora,
+        "status": "ativo"
+    }
+    
+    # Adiciona campos específicos por tipo de usuário
+    if tipo_usuario == "estudante" and ra:
+        novo_usuario["ra"] = ra
+        novo_usuario["curso"] = curso
+    elif tipo_usuario == "professor":
+        novo_usuario["departamento"] = departamento
+        novo_usuario["curso"] = curso
+    elif tipo_usuario == "funcionario":
+        novo_usuario["departamento"] = departamento
+    return novo_usuario
+
+def autenticar_na_colecao(colecao_usuarios, email, senha):
+    """
+    Confere a senha, atualiza o último acesso e lê os campos da sessão numa única ida ao banco.
+
+    Returns:
+        tuple: (True, SessaoUsuario) ou (False, None)
+    """
+    # Atômico e indexado pelo email único: um find_one_and_update em vez de find_one + update_one
+    usuario = colecao_usuarios.find_one_and_update(
+        {"email": email, "senha_hash": criar_hash_senha(senha)},
+        {"$set": {"ultimo_acesso": datetime.datetime.now()}},
+        projection=CAMPOS_SESSAO,
+    )
+    
+    if usuario:
+        return True, SessaoUsuario.do_documento(usuario)
+    
+    return False, None